@@ -0,0 +1,204 @@
+import heapq
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List
+
+
+# Alert fields counted per value
+COUNTED_FIELDS = ("severity", "alert_type", "attack_name", "mitre_technique")
+
+# Histogram resolution -> (bucket width in seconds, buckets kept)
+HISTOGRAMS = {
+    "1m": (60, 60),
+    "1h": (3600, 48),
+    "1d": (86400, 30),
+}
+
+TOP_IPS = 10
+
+
+class SpaceSaving:
+    """
+    Approximate top-k counter in fixed memory (Space-Saving, Metwally
+    et al.). Tracks at most `capacity` keys; a new key replaces one with
+    the smallest count and inherits it, so counts can be overestimated
+    by at most that inherited amount, and any key seen more than
+    total / capacity times is always present.
+
+    Keys are grouped by count, so add() is O(1) even when every key is
+    new (e.g. a flood from spoofed addresses).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self._by_count: Dict[int, Dict[str, None]] = {}
+        self._min = 0
+
+    def add(self, key: str):
+        counts, by_count = self.counts, self._by_count
+        count = counts.get(key)
+        if count is None:
+            if len(counts) < self.capacity:
+                count = 0
+                self._min = 0
+            else:
+                count = self._min
+                victim = next(iter(by_count[count]))
+                del counts[victim]
+                self._pop(by_count[count], victim, count)
+        else:
+            self._pop(by_count[count], key, count)
+
+        counts[key] = count + 1
+        by_count.setdefault(count + 1, {})[key] = None
+        if count == self._min and count not in by_count:
+            self._min = count + 1
+
+    def _pop(self, keys: Dict[str, None], key: str, count: int):
+        del keys[key]
+        if not keys:
+            del self._by_count[count]
+
+    def top(self, k: int) -> List[list]:
+        ranked = heapq.nlargest(k, self.counts.items(), key=lambda item: item[1])
+        return [[key, count] for key, count in ranked]
+
+
+class RingHistogram:
+    """
+    Alert counts per time bucket for the latest `slots` buckets of
+    `width` seconds, in a fixed ring. Counts older than the window are
+    ignored.
+    """
+
+    def __init__(self, width: int, slots: int):
+        self.width = width
+        self.slots = slots
+        self.counts = [0] * slots
+        self.buckets = [-1] * slots
+        self.latest = -1
+
+    def add(self, bucket: int, n: int = 1) -> bool:
+        """
+        Counts n alerts in bucket number `bucket` (time // width).
+        Returns False if the bucket lies before the window.
+        """
+        if bucket <= self.latest - self.slots:
+            return False
+        slot = bucket % self.slots
+        if self.buckets[slot] != bucket:
+            self.buckets[slot] = bucket
+            self.counts[slot] = 0
+        self.counts[slot] += n
+        self.latest = max(self.latest, bucket)
+        return True
+
+    def series(self) -> List[list]:
+        if self.latest < 0:
+            return []
+        return [
+            [bucket * self.width,
+             self.counts[bucket % self.slots] if self.buckets[bucket % self.slots] == bucket else 0]
+            for bucket in range(self.latest - self.slots + 1, self.latest + 1)
+        ]
+
+
+class AlertStats:
+    """
+    Running aggregates over ingested alerts: counts per COUNTED_FIELDS
+    value, top source / destination IPs, and alert histograms at
+    HISTOGRAMS resolutions (by alert timestamp).
+
+    add() costs O(1) per alert (batches are counted with Counter first)
+    and returns a delta that clients apply to their last snapshot() (see
+    merge_deltas). Aggregates cover every alert counted since startup;
+    store eviction does not subtract.
+    """
+
+    def __init__(self, ip_capacity: int = 100):
+        self.total = 0
+        self.counts: Dict[str, Dict[str, int]] = {field: {} for field in COUNTED_FIELDS}
+        self.sources = SpaceSaving(ip_capacity)
+        self.destinations = SpaceSaving(ip_capacity)
+        self.histograms = {
+            name: RingHistogram(width, slots) for name, (width, slots) in HISTOGRAMS.items()
+        }
+
+    def add(self, alerts: List[dict]) -> dict:
+        """
+        Counts the alerts and returns their delta.
+        """
+        delta = {"base": self.total, "counts": {}, "histograms": {}}
+
+        for field in COUNTED_FIELDS:
+            batch = Counter(alert.get(field) for alert in alerts)
+            batch.pop(None, None)
+            totals = self.counts[field]
+            for value, n in batch.items():
+                totals[value] = totals.get(value, 0) + n
+            delta["counts"][field] = dict(batch)
+
+        for alert in alerts:
+            self.sources.add((alert.get("source") or {}).get("ip") or "unknown")
+            self.destinations.add((alert.get("destination") or {}).get("ip") or "unknown")
+
+        times = [_alert_time(alert) for alert in alerts]
+        for name, histogram in self.histograms.items():
+            batch = Counter(int(t // histogram.width) for t in times)
+            delta["histograms"][name] = {
+                bucket * histogram.width: n
+                for bucket, n in sorted(batch.items()) if histogram.add(bucket, n)
+            }
+
+        self.total += len(alerts)
+        delta["total"] = self.total
+        delta["top_sources"] = self.sources.top(TOP_IPS)
+        delta["top_destinations"] = self.destinations.top(TOP_IPS)
+        return delta
+
+    def snapshot(self) -> dict:
+        return {
+            "total": self.total,
+            "counts": {field: dict(values) for field, values in self.counts.items()},
+            "top_sources": self.sources.top(TOP_IPS),
+            "top_destinations": self.destinations.top(TOP_IPS),
+            "histograms": {
+                name: {"width": histogram.width, "slots": histogram.slots,
+                       "buckets": histogram.series()}
+                for name, histogram in self.histograms.items()
+            }
+        }
+
+
+def merge_deltas(first: dict, second: dict) -> dict:
+    """
+    One delta equivalent to applying `first`, then `second`.
+    """
+    merged = {
+        "base": first["base"],
+        "total": second["total"],
+        "counts": {},
+        "histograms": {},
+        "top_sources": second["top_sources"],
+        "top_destinations": second["top_destinations"],
+    }
+    for key in ("counts", "histograms"):
+        for name in first[key].keys() | second[key].keys():
+            values = dict(first[key].get(name, {}))
+            for value, n in second[key].get(name, {}).items():
+                values[value] = values.get(value, 0) + n
+            merged[key][name] = values
+    return merged
+
+
+def _alert_time(alert: dict) -> float:
+    try:
+        moment = datetime.fromisoformat(alert["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        return time.time()
+    # The IDS stamps alerts with naive UTC (datetime.utcnow())
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
@@ -0,0 +1,410 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# Secondary indexes: name -> how to read the value from an alert
+INDEXED_FIELDS: Dict[str, Callable[[dict], object]] = {
+    "status": lambda alert: alert.get("status"),
+    "severity": lambda alert: alert.get("severity"),
+    "alert_type": lambda alert: alert.get("alert_type"),
+    "mitre_technique": lambda alert: alert.get("mitre_technique"),
+    "src_ip": lambda alert: (alert.get("source") or {}).get("ip"),
+    "dst_ip": lambda alert: (alert.get("destination") or {}).get("ip"),
+}
+
+
+def journal_key(alert: dict) -> Optional[tuple]:
+    """
+    (journal_id, journal_seq) identifying a journaled alert, or None.
+    """
+    seq = alert.get("journal_seq")
+    if seq is None:
+        return None
+    return alert.get("journal_id"), seq
+
+
+class _IdIndex:
+    """
+    Ids of the alerts with one index value, kept as an ascending list
+    so a page starts with a bisect to the cursor.
+
+    Removed ids are only dropped from `members` and skipped while
+    iterating; the list is compacted once most of it is stale. Ids
+    normally arrive in increasing order (append); a status change can
+    move an older id into another index (insort).
+    """
+    __slots__ = ("ids", "members")
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self.members = set()
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __contains__(self, alert_id: int) -> bool:
+        return alert_id in self.members
+
+    def __iter__(self) -> Iterator[int]:
+        return self.iter_from(None, False)
+
+    def add(self, alert_id: int):
+        self.members.add(alert_id)
+        ids = self.ids
+        if not ids or ids[-1] < alert_id:
+            ids.append(alert_id)
+            return
+        i = bisect_left(ids, alert_id)
+        if i == len(ids) or ids[i] != alert_id:
+            ids.insert(i, alert_id)
+
+    def remove(self, alert_id: int):
+        self.members.discard(alert_id)
+        if len(self.ids) > 2 * len(self.members) + 32:
+            members = self.members
+            self.ids = [i for i in self.ids if i in members]
+
+    def iter_from(self, cursor: Optional[int], descending: bool) -> Iterator[int]:
+        """
+        Ids after (or, descending, before) `cursor`, in that direction.
+        """
+        ids, members = self.ids, self.members
+        if descending:
+            top = len(ids) if cursor is None else bisect_left(ids, cursor)
+            return (ids[i] for i in range(top - 1, -1, -1) if ids[i] in members)
+        bottom = 0 if cursor is None else bisect_right(ids, cursor)
+        return (ids[i] for i in range(bottom, len(ids)) if ids[i] in members)
+
+
+_EMPTY_INDEX = _IdIndex()
+
+
+class AlertStore:
+    """
+    In-memory alert store with monotonic ids and secondary indexes.
+
+    - Every stored alert gets an "id" (1, 2, 3, ...), its position in
+      arrival order.
+    - Alerts are indexed by status, severity, type, MITRE technique,
+      source / destination IP, timestamp and (journal_id, journal_seq)
+      (replayed duplicates are ignored). journal_mark() remembers the
+      highest journal_seq ever stored per journal, evicted or not.
+    - Retention keeps at most `max_alerts` alerts and, if `max_age` is
+      set, none received more than `max_age` seconds ago; the oldest
+      are evicted first, so stored ids are always one contiguous range.
+    - Every add or status change takes the next change sequence number
+      (`seq`); changed_since() returns what changed after a given seq.
+
+    Lookups by id, status updates and index queries cost O(1) or
+    O(result), independent of the number of stored alerts; a page
+    costs a bisect plus O(page size).
+
+    Thread-safe: ingest runs on the event loop while sync endpoints
+    read from FastAPI's threadpool, so every public method holds the
+    store lock.
+    """
+
+    def __init__(self, max_alerts: int, max_age: Optional[float] = None,
+                 clock: Callable[[], float] = time.time):
+        self.max_alerts = max_alerts
+        self.max_age = max_age
+        self._clock = clock
+
+        self._alerts: "OrderedDict[int, dict]" = OrderedDict()
+        self._received: Dict[int, float] = {}
+        self._next_id = 1
+
+        # field -> value -> ids in ascending order
+        self._indexes: Dict[str, Dict[object, _IdIndex]] = {
+            name: {} for name in INDEXED_FIELDS
+        }
+        self._by_timestamp: Dict[str, _IdIndex] = {}
+        self._by_journal_key: Dict[tuple, int] = {}
+        self._journal_marks: Dict[Optional[str], int] = {}
+
+        # id -> seq of its last change, in change order
+        self._changes: "OrderedDict[int, int]" = OrderedDict()
+        self.seq = 0
+
+        self.evicted = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    # -----------------------------
+    # Writes
+    # -----------------------------
+    def add(self, alert: dict) -> Optional[int]:
+        """
+        Stores the alert and returns its id, or None if an alert with
+        the same journal_id / journal_seq is already stored.
+        """
+        key = journal_key(alert)
+        with self._lock:
+            if key is not None and key in self._by_journal_key:
+                return None
+
+            alert_id = self._next_id
+            self._next_id += 1
+            alert["id"] = alert_id
+            alert.setdefault("status", "new")
+
+            self._alerts[alert_id] = alert
+            self._received[alert_id] = self._clock()
+            for name, read in INDEXED_FIELDS.items():
+                self._index(self._indexes[name], read(alert), alert_id)
+            self._index(self._by_timestamp, alert.get("timestamp"), alert_id)
+            if key is not None:
+                self._by_journal_key[key] = alert_id
+                journal_id, seq = key
+                if seq > self._journal_marks.get(journal_id, 0):
+                    self._journal_marks[journal_id] = seq
+            self._record_change(alert_id)
+
+            self.evict()
+            return alert_id
+
+    def update_status(self, alert_id: int, status: str) -> Optional[dict]:
+        with self._lock:
+            alert = self._alerts.get(alert_id)
+            if alert is None:
+                return None
+            index = self._indexes["status"]
+            self._unindex(index, alert.get("status"), alert_id)
+            alert["status"] = status
+            self._index(index, status, alert_id)
+            self._record_change(alert_id)
+            return alert
+
+    def journal_mark(self, journal_id: Optional[str]) -> int:
+        """
+        Highest journal_seq of `journal_id` ever stored (0 if none), so
+        a journal replay can skip what was already ingested, including
+        alerts retention has removed since.
+        """
+        with self._lock:
+            return self._journal_marks.get(journal_id, 0)
+
+    def _record_change(self, alert_id: int):
+        self.seq += 1
+        self._changes[alert_id] = self.seq
+        self._changes.move_to_end(alert_id)
+
+    def evict(self):
+        """
+        Drops the oldest alerts beyond the count / age limits.
+        """
+        cutoff = None if self.max_age is None else self._clock() - self.max_age
+        with self._lock:
+            while self._alerts:
+                oldest = next(iter(self._alerts))
+                if (len(self._alerts) <= self.max_alerts
+                        and (cutoff is None or self._received[oldest] >= cutoff)):
+                    break
+                self._remove(oldest)
+                self.evicted += 1
+
+    def clear(self):
+        with self._lock:
+            for alert_id in list(self._alerts):
+                self._remove(alert_id)
+            self.seq += 1
+
+    def close(self):
+        pass
+
+    def _remove(self, alert_id: int):
+        alert = self._alerts.pop(alert_id)
+        del self._received[alert_id]
+        for name, read in INDEXED_FIELDS.items():
+            self._unindex(self._indexes[name], read(alert), alert_id)
+        self._unindex(self._by_timestamp, alert.get("timestamp"), alert_id)
+        key = journal_key(alert)
+        if key is not None:
+            self._by_journal_key.pop(key, None)
+        self._changes.pop(alert_id, None)
+
+    @staticmethod
+    def _index(index: dict, value, alert_id: int):
+        ids = index.get(value)
+        if ids is None:
+            ids = index[value] = _IdIndex()
+        ids.add(alert_id)
+
+    @staticmethod
+    def _unindex(index: dict, value, alert_id: int):
+        ids = index.get(value)
+        if ids is not None:
+            ids.remove(alert_id)
+            if not ids:
+                del index[value]
+
+    # -----------------------------
+    # Reads
+    # -----------------------------
+    def get(self, alert_id: int) -> Optional[dict]:
+        with self._lock:
+            return self._alerts.get(alert_id)
+
+    def ids_for_timestamp(self, timestamp: str) -> List[int]:
+        with self._lock:
+            return list(self._by_timestamp.get(timestamp, _EMPTY_INDEX))
+
+    def all(self) -> List[dict]:
+        with self._lock:
+            self.evict()
+            return list(self._alerts.values())
+
+    def find(self, **filters) -> List[dict]:
+        """
+        Alerts matching every given index filter (e.g. status="resolved",
+        src_ip="10.0.0.1"), oldest first. Cost is bounded by the smallest
+        matching index, not by the store size.
+        """
+        unknown = set(filters) - set(INDEXED_FIELDS)
+        if unknown:
+            raise ValueError(f"Not an indexed field: {', '.join(sorted(unknown))}")
+        with self._lock:
+            self.evict()
+            if not filters:
+                return list(self._alerts.values())
+
+            candidates = sorted(
+                (self._indexes[name].get(value, _EMPTY_INDEX) for name, value in filters.items()),
+                key=len
+            )
+            smallest, rest = candidates[0], candidates[1:]
+            return [
+                self._alerts[alert_id] for alert_id in smallest
+                if all(alert_id in ids for ids in rest)
+            ]
+
+    def page(self, filters: dict, start: Optional[str] = None, end: Optional[str] = None,
+             cursor: Optional[int] = None, limit: Optional[int] = None,
+             descending: bool = False) -> Tuple[List[dict], Optional[int]]:
+        """
+        One page of alerts in id order, after (or, descending, before)
+        the `cursor` id. `filters` holds index fields (plus "ip" for
+        source or destination); start / end bound the alert timestamp
+        (ISO 8601, inclusive). Returns (alerts, next_cursor), where
+        next_cursor is None on the last page.
+        """
+        match = self._matcher(filters, start, end)
+        alerts = []
+        with self._lock:
+            self.evict()
+            for alert_id in self._candidate_ids(filters, cursor, descending):
+                alert = self._alerts[alert_id]
+                if match(alert):
+                    if limit is not None and len(alerts) == limit:
+                        return alerts, alerts[-1]["id"]
+                    alerts.append(alert)
+        return alerts, None
+
+    def changed_since(self, since: int, filters: dict, limit: Optional[int] = None
+                      ) -> Tuple[List[dict], int]:
+        """
+        Alerts added or changed after change seq `since`, oldest change
+        first. Returns (alerts, seq to pass next time). Cost is
+        proportional to the number of changes, not the store size.
+        """
+        match = self._matcher(filters, None, None)
+        with self._lock:
+            self.evict()
+            changed = []
+            for alert_id, seq in reversed(self._changes.items()):
+                if seq <= since:
+                    break
+                changed.append((seq, alert_id))
+            changed.reverse()
+
+            alerts, last_seq = [], self.seq
+            for seq, alert_id in changed:
+                alert = self._alerts[alert_id]
+                if not match(alert):
+                    continue
+                if limit is not None and len(alerts) == limit:
+                    last_seq = seq - 1
+                    break
+                alerts.append(alert)
+        return alerts, last_seq
+
+    def _candidate_ids(self, filters: dict, cursor: Optional[int],
+                       descending: bool) -> Iterator[int]:
+        # Walk the smallest matching index from the cursor; the matcher
+        # checks the other filters
+        candidates = [
+            (len(ids), ids.iter_from(cursor, descending))
+            for ids in (self._indexes[name].get(value, _EMPTY_INDEX)
+                        for name, value in filters.items() if name in INDEXED_FIELDS)
+        ]
+        if "ip" in filters:
+            ip = filters["ip"]
+            src = self._indexes["src_ip"].get(ip, _EMPTY_INDEX)
+            dst = self._indexes["dst_ip"].get(ip, _EMPTY_INDEX)
+            candidates.append((len(src) + len(dst), _union(
+                src.iter_from(cursor, descending), dst.iter_from(cursor, descending), descending
+            )))
+
+        if candidates:
+            return min(candidates, key=lambda candidate: candidate[0])[1]
+
+        # Without an index, walk the contiguous id range directly
+        if not self._alerts:
+            return iter(())
+        first, last = next(iter(self._alerts)), self._next_id - 1
+        if descending:
+            top = last if cursor is None else min(last, cursor - 1)
+            return iter(range(top, first - 1, -1))
+        bottom = first if cursor is None else max(first, cursor + 1)
+        return iter(range(bottom, last + 1))
+
+    @staticmethod
+    def _matcher(filters: dict, start: Optional[str], end: Optional[str]):
+        unknown = set(filters) - set(INDEXED_FIELDS) - {"ip"}
+        if unknown:
+            raise ValueError(f"Not a filter field: {', '.join(sorted(unknown))}")
+
+        checks = [(INDEXED_FIELDS[name], value)
+                  for name, value in filters.items() if name in INDEXED_FIELDS]
+        ip = filters.get("ip")
+        read_src, read_dst = INDEXED_FIELDS["src_ip"], INDEXED_FIELDS["dst_ip"]
+
+        def match(alert: dict) -> bool:
+            for read, value in checks:
+                if read(alert) != value:
+                    return False
+            if ip is not None and ip not in (read_src(alert), read_dst(alert)):
+                return False
+            timestamp = alert.get("timestamp") or ""
+            if start is not None and timestamp < start:
+                return False
+            if end is not None and timestamp > end:
+                return False
+            return True
+
+        return match
+
+    def count(self, field: str, value) -> int:
+        with self._lock:
+            return len(self._indexes[field].get(value, ()))
+
+    def values(self, field: str) -> Iterable:
+        with self._lock:
+            return list(self._indexes[field])
+
+
+def _union(first: Iterator[int], second: Iterator[int], descending: bool) -> Iterator[int]:
+    """
+    Merges two sorted id streams, dropping ids present in both.
+    """
+    previous = None
+    for alert_id in heapq.merge(first, second, reverse=descending):
+        if alert_id != previous:
+            yield alert_id
+            previous = alert_id
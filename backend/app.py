@@ -1,12 +1,59 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import hashlib
+import json
+import os
+import sys
+from contextlib import asynccontextmanager
+from itertools import islice
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(BACKEND_DIR)
+# Works both as `uvicorn app:app` (cwd backend/) and `backend.app:app`
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, "src"))
+
+from alert_stats import AlertStats  # noqa: E402
+from alert_store import AlertStore  # noqa: E402
+from broadcast import BroadcastHub  # noqa: E402
+from sqlite_store import SqliteAlertStore  # noqa: E402
+from alerts.alert_journal import read_journal, read_journal_id  # noqa: E402
+
+# Alert journal written by the IDS engine (see src/alerts/alert_journal.py)
+JOURNAL_DIR = os.environ.get("IDS_JOURNAL_DIR", os.path.join(BASE_DIR, "data", "journal"))
+
+# Retention: newest IDS_MAX_ALERTS alerts, optionally none older than
+# IDS_ALERT_MAX_AGE seconds
+MAX_ALERTS = int(os.environ.get("IDS_MAX_ALERTS", "100000"))
+MAX_ALERT_AGE = float(os.environ["IDS_ALERT_MAX_AGE"]) if os.environ.get("IDS_ALERT_MAX_AGE") else None
+
+# Alert storage: "sqlite" (survives restarts) or "memory"
+STORAGE = os.environ.get("IDS_STORAGE", "sqlite")
+SQLITE_PATH = os.environ.get("IDS_SQLITE_PATH", os.path.join(BASE_DIR, "data", "ids_alerts.db"))
+
+# Live dashboards: alerts queued per connection, alerts per frame, and
+# what to do with a client whose queue is full ("drop_oldest" | "disconnect")
+WS_QUEUE_SIZE = int(os.environ.get("IDS_WS_QUEUE_SIZE", "1000"))
+WS_MAX_BATCH = int(os.environ.get("IDS_WS_MAX_BATCH", "500"))
+WS_SLOW_CLIENT_POLICY = os.environ.get("IDS_WS_SLOW_CLIENT_POLICY", "drop_oldest")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    STATS.add(ALERT_STORE.all())
+    rebuild_from_journal(JOURNAL_DIR)
+    yield
+    ALERT_STORE.close()
+
 
 app = FastAPI(
     title="Intrusion Detection System API",
     description="Backend API for IDS alerts and monitoring",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # ---------------- CORS ----------------
@@ -19,8 +66,53 @@ app.add_middleware(
 )
 
 # ---------------- STORAGE ----------------
-ALERT_STORE: List[dict] = []
-active_connections: List[WebSocket] = []
+def open_store(storage: str):
+    """Create the alert store selected by IDS_STORAGE."""
+    if storage == "sqlite":
+        return SqliteAlertStore(SQLITE_PATH, MAX_ALERTS, MAX_ALERT_AGE)
+    if storage == "memory":
+        return AlertStore(MAX_ALERTS, MAX_ALERT_AGE)
+    raise ValueError(f"Unknown IDS_STORAGE: {storage}")
+
+
+ALERT_STORE = open_store(STORAGE)
+ENGINE_STATUS: dict = {}
+STATS = AlertStats()
+HUB = BroadcastHub(WS_QUEUE_SIZE, WS_MAX_BATCH, WS_SLOW_CLIENT_POLICY)
+
+
+def store_alert(alert: dict) -> bool:
+    """Store an alert unless its journal_id / journal_seq was already stored."""
+    return ALERT_STORE.add(alert) is not None
+
+
+def ingest(alerts: List[dict]) -> List[dict]:
+    """Store alerts, count them and push them to dashboards.
+    Returns the alerts that were not duplicates."""
+    accepted = [alert for alert in alerts if store_alert(alert)]
+    if accepted:
+        HUB.publish(accepted, STATS.add(accepted))
+    return accepted
+
+
+# Journaled alerts read per ingest() call while rebuilding
+REBUILD_CHUNK = 1000
+
+
+def rebuild_from_journal(directory: str) -> int:
+    """Load journaled alerts missing from the store (backend startup).
+    Skips everything up to the store's high-water mark for the journal,
+    so alerts removed by retention are not brought back."""
+    if not os.path.isdir(directory):
+        return 0
+    after = ALERT_STORE.journal_mark(read_journal_id(directory))
+    records = read_journal(directory, after_seq=after)
+    restored = 0
+    while True:
+        chunk = list(islice(records, REBUILD_CHUNK))
+        if not chunk:
+            return restored
+        restored += len(ingest(chunk))
 
 
 # ---------------- MODELS ----------------
@@ -33,58 +125,207 @@ class StatusUpdate(BaseModel):
 def root():
     return {"status": "OK"}
 
+MAX_PAGE_SIZE = 10000
+
+
 @app.get("/alerts")
-def get_alerts():
-    return {
-        "count": len(ALERT_STORE),
-        "alerts": ALERT_STORE
+def get_alerts(
+    request: Request,
+    severity: Optional[str] = None,
+    alert_type: Optional[str] = None,
+    status: Optional[str] = None,
+    mitre_technique: Optional[str] = None,
+    src_ip: Optional[str] = None,
+    dst_ip: Optional[str] = None,
+    ip: Optional[str] = Query(None, description="Source or destination IP"),
+    start: Optional[str] = Query(None, description="Earliest timestamp (ISO 8601)"),
+    end: Optional[str] = Query(None, description="Latest timestamp (ISO 8601)"),
+    cursor: Optional[int] = Query(None, description="next_cursor of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    since: Optional[int] = Query(None, ge=0, description="seq of a previous response"),
+):
+    """
+    Fetch alerts, optionally filtered and paginated.
+
+    - Without parameters, returns every alert (oldest first).
+    - Filters combine with AND; start / end bound the timestamp.
+    - With `limit`, pass the returned next_cursor as `cursor` to get the
+      next page; next_cursor is null on the last page.
+    - With `since`, returns only alerts added or changed after that
+      `seq` (from an earlier response), in change order. Evicted
+      alerts are not reported; a `seq` lower than the one sent means
+      the backend restarted and the client should fetch everything.
+
+    Every response carries `seq` and an ETag; a poll with a matching
+    If-None-Match is answered 304 without touching the store.
+    """
+    etag = _alerts_etag(request.url.query)
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    filters = {
+        name: value for name, value in (
+            ("severity", severity), ("alert_type", alert_type), ("status", status),
+            ("mitre_technique", mitre_technique), ("src_ip", src_ip),
+            ("dst_ip", dst_ip), ("ip", ip)
+        ) if value is not None
+    }
+    if since is not None:
+        alerts, seq = ALERT_STORE.changed_since(since, filters, limit)
+        next_cursor = None
+    else:
+        alerts, next_cursor = ALERT_STORE.page(
+            filters, start, end, cursor, limit, descending=(order == "desc")
+        )
+        seq = ALERT_STORE.seq
+
+    body = {
+        "count": len(alerts),
+        "total": len(ALERT_STORE),
+        "seq": seq,
+        "next_cursor": next_cursor,
+        "alerts": alerts
     }
+    # Alerts are plain JSON already; skip FastAPI's per-field encoding
+    return Response(
+        json.dumps(body), media_type="application/json", headers={"ETag": etag}
+    )
+
+
+def _alerts_etag(query: str) -> str:
+    """Weak ETag: changes whenever the store or the query does."""
+    ALERT_STORE.evict()
+    state = f"{ALERT_STORE.seq}:{ALERT_STORE.evicted}:{query}"
+    return 'W/"' + hashlib.blake2b(state.encode(), digest_size=8).hexdigest() + '"'
 
 @app.post("/alerts")
 async def add_alert(alert: dict):
-    alert.setdefault("status", "new")
-    ALERT_STORE.append(alert)
+    if not ingest([alert]):
+        return {"message": "Duplicate alert ignored"}
+    return {"message": "Alert received"}
 
-    # PUSH ALERT TO WEBSOCKETS---------------
-    for ws in active_connections:
-        await ws.send_json(alert)
 
-    return {"message": "Alert received"}
+@app.post("/alerts/batch")
+async def add_alerts_batch(request: Request):
+    """
+    Ingest many alerts in one request: a JSON array, or NDJSON (one alert
+    per line) with Content-Type application/x-ndjson. Valid alerts are
+    stored; invalid ones are reported by index.
+    """
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    try:
+        if "ndjson" in content_type or "jsonl" in content_type:
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Malformed batch: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of alerts")
+
+    valid, rejected = validate_alerts(items)
+    accepted = ingest(valid)
+
+    return {
+        "message": "Alerts received",
+        "accepted": len(accepted),
+        "duplicates": len(valid) - len(accepted),
+        "rejected": rejected
+    }
+
+
+def validate_alerts(items: list) -> Tuple[List[dict], List[dict]]:
+    """Split a batch into valid alerts and {index, error} rejections."""
+    accepted, rejected = [], []
+    for index, alert in enumerate(items):
+        if not isinstance(alert, dict):
+            rejected.append({"index": index, "error": "alert must be an object"})
+        elif not isinstance(alert.get("timestamp"), str):
+            rejected.append({"index": index, "error": "missing timestamp"})
+        else:
+            accepted.append(alert)
+    return accepted, rejected
 
 
 # ---------------- STATUS MANAGEMENT ----------------
-@app.patch("/alerts/{timestamp}/status")
-def update_alert_status(timestamp: str, body: StatusUpdate):
-    """Update the lifecycle status of an alert identified by its timestamp."""
-    for alert in ALERT_STORE:
-        if alert.get("timestamp") == timestamp:
-            alert["status"] = body.status
-            return {"message": "Status updated", "alert": alert}
-    return {"message": "Alert not found"}
+@app.patch("/alerts/{alert_key}/status")
+def update_alert_status(alert_key: str, body: StatusUpdate):
+    """
+    Update the lifecycle status of an alert identified by its id, or
+    (older clients) by its timestamp, which updates every alert with
+    that timestamp.
+    """
+    if alert_key.isdigit():
+        ids = [int(alert_key)]
+    else:
+        ids = ALERT_STORE.ids_for_timestamp(alert_key)
+
+    updated = [ALERT_STORE.update_status(alert_id, body.status) for alert_id in ids]
+    updated = [alert for alert in updated if alert is not None]
+    if not updated:
+        return {"message": "Alert not found"}
+    return {"message": "Status updated", "alert": updated[0], "updated": len(updated)}
 
 
 @app.get("/alerts/investigating")
 def get_investigating_alerts():
     """Return all alerts currently under investigation."""
-    investigating = [a for a in ALERT_STORE if a.get("status") == "investigating"]
+    investigating = ALERT_STORE.find(status="investigating")
     return {"count": len(investigating), "alerts": investigating}
 
 
 @app.get("/alerts/resolved")
 def get_resolved_alerts():
     """Return all resolved alerts."""
-    resolved = [a for a in ALERT_STORE if a.get("status") == "resolved"]
+    resolved = ALERT_STORE.find(status="resolved")
     return {"count": len(resolved), "alerts": resolved}
 
 
+# ---------------- ANALYTICS ----------------
+@app.get("/stats")
+async def get_stats():
+    """
+    Running alert aggregates: counts by severity, type, attack and MITRE
+    technique, top source / destination IPs, and 1m / 1h / 1d
+    histograms. Kept up to date on ingest, so this never scans alerts;
+    WebSocket frames carry deltas against it.
+    """
+    return STATS.snapshot()
+
+
+# ---------------- ENGINE STATUS ----------------
+@app.post("/engine/status")
+def report_engine_status(status: dict):
+    """Record the rule set and model versions the IDS is running."""
+    ENGINE_STATUS.clear()
+    ENGINE_STATUS.update(status)
+    return {"message": "Status updated"}
+
+
+@app.get("/engine/status")
+def get_engine_status():
+    """Return the active rule set and model versions."""
+    return ENGINE_STATUS
+
+
+@app.get("/ws/stats")
+def get_websocket_stats():
+    """Return live dashboard connection and backpressure counters."""
+    return HUB.stats()
+
+
 # ---------------- WEBSOCKET ----------------
 @app.websocket("/ws/alerts")
 async def alerts_ws(websocket: WebSocket):
     await websocket.accept()
-    active_connections.append(websocket)
+    client = HUB.connect(websocket)
 
     try:
         while True:
             await websocket.receive_text()  # keep alive
     except WebSocketDisconnect:
-        active_connections.remove(websocket)
+        pass
+    finally:
+        HUB.disconnect(client)
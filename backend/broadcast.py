@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+from typing import List, Optional, Set
+
+from fastapi import WebSocket
+
+from alert_stats import merge_deltas
+
+
+logger = logging.getLogger(__name__)
+
+SLOW_CLIENT_POLICIES = ("drop_oldest", "disconnect")
+
+
+class _Client:
+    def __init__(self, websocket: WebSocket, max_queue: int):
+        self.websocket = websocket
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0   # since the last frame
+        self.stats = None  # stats delta not sent yet
+        self.task = None
+
+
+class BroadcastHub:
+    """
+    Pushes alerts to every connected dashboard without making the
+    publisher wait for any of them.
+
+    - Each connection has a bounded queue (`max_queue` alerts) and its
+      own sender task; publish() only encodes each alert once and
+      enqueues it, so ingest cost does not depend on client speed.
+    - The sender coalesces whatever is queued (up to `max_batch`
+      alerts) into one frame:
+      {"type": "alerts", "dropped": n, "alerts": [...], "stats": {...}}.
+      "stats" (when present) is the merged AlertStats delta of every
+      publish since the last frame; it is never dropped.
+    - A client whose queue is full is handled per `policy`:
+      "drop_oldest" discards its oldest queued alert (counted in the
+      next frame's "dropped", so it can resync over REST), and
+      "disconnect" closes it (code 1013, try again later).
+    - A send that takes longer than `send_timeout` seconds marks the
+      client as dead and closes it.
+    """
+
+    def __init__(self, max_queue: int, max_batch: int, policy: str = "drop_oldest",
+                 send_timeout: float = 10.0):
+        if policy not in SLOW_CLIENT_POLICIES:
+            raise ValueError(f"Unknown slow client policy: {policy}")
+
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.clients: Set[_Client] = set()
+
+        self.frames = 0
+        self.dropped = 0
+        self.disconnected = 0
+
+    def connect(self, websocket: WebSocket) -> _Client:
+        """
+        Registers an accepted websocket and starts its sender task.
+        """
+        client = _Client(websocket, self.max_queue)
+        client.task = asyncio.create_task(self._sender(client))
+        self.clients.add(client)
+        return client
+
+    def disconnect(self, client: _Client):
+        self.clients.discard(client)
+        if client.task is not None:
+            client.task.cancel()
+
+    def publish(self, alerts: List[dict], stats: Optional[dict] = None):
+        """
+        Queues alerts (and their stats delta) for every connected
+        client. Never waits.
+        """
+        if not self.clients or not alerts:
+            return
+        encoded = [json.dumps(alert) for alert in alerts]
+        for client in list(self.clients):
+            if stats is not None:
+                client.stats = stats if client.stats is None else merge_deltas(client.stats, stats)
+            self._enqueue(client, encoded)
+
+    def _enqueue(self, client: _Client, items: List[str]):
+        for item in items:
+            try:
+                client.queue.put_nowait(item)
+                continue
+            except asyncio.QueueFull:
+                pass
+
+            if self.policy == "disconnect":
+                logger.warning("Dashboard client too slow, disconnecting it")
+                self._close(client)
+                return
+            client.queue.get_nowait()
+            client.queue.put_nowait(item)
+            client.dropped += 1
+            self.dropped += 1
+
+    def _close(self, client: _Client):
+        self.disconnect(client)
+        self.disconnected += 1
+        asyncio.create_task(self._close_websocket(client.websocket))
+
+    async def _close_websocket(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=1013), self.send_timeout)
+        except Exception:
+            pass
+
+    async def _sender(self, client: _Client):
+        queue = client.queue
+        while True:
+            items = [await queue.get()]
+            while len(items) < self.max_batch and not queue.empty():
+                items.append(queue.get_nowait())
+            dropped, client.dropped = client.dropped, 0
+            stats, client.stats = client.stats, None
+
+            frame = '{"type":"alerts","dropped":%d,"alerts":[%s]' % (dropped, ",".join(items))
+            if stats is not None:
+                frame += ',"stats":' + json.dumps(stats)
+            frame += "}"
+            try:
+                await asyncio.wait_for(client.websocket.send_text(frame), self.send_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Gone, or stalled for send_timeout
+                if client in self.clients:
+                    self._close(client)
+                return
+            self.frames += 1
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self.clients),
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "disconnected": self.disconnected
+        }
@@ -0,0 +1,489 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from alert_store import INDEXED_FIELDS, journal_key
+
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    received REAL NOT NULL,
+    timestamp TEXT,
+    status TEXT,
+    severity TEXT,
+    alert_type TEXT,
+    mitre_technique TEXT,
+    src_ip TEXT,
+    dst_ip TEXT,
+    journal_id TEXT,
+    journal_seq INTEGER,
+    body TEXT NOT NULL,
+    UNIQUE (journal_id, journal_seq)
+);
+CREATE INDEX IF NOT EXISTS alerts_seq ON alerts (seq);
+CREATE INDEX IF NOT EXISTS alerts_received ON alerts (received);
+CREATE INDEX IF NOT EXISTS alerts_timestamp ON alerts (timestamp);
+CREATE INDEX IF NOT EXISTS alerts_status ON alerts (status, id);
+CREATE INDEX IF NOT EXISTS alerts_severity ON alerts (severity, id);
+CREATE INDEX IF NOT EXISTS alerts_alert_type ON alerts (alert_type, id);
+CREATE INDEX IF NOT EXISTS alerts_mitre_technique ON alerts (mitre_technique, id);
+CREATE INDEX IF NOT EXISTS alerts_src_ip ON alerts (src_ip, id);
+CREATE INDEX IF NOT EXISTS alerts_dst_ip ON alerts (dst_ip, id);
+CREATE TABLE IF NOT EXISTS journal_marks (
+    journal_id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL
+);
+"""
+
+# Columns between timestamp and journal_id are INDEXED_FIELDS, in order
+INSERT = """
+INSERT OR IGNORE INTO alerts (
+    id, seq, received, timestamp, status, severity, alert_type,
+    mitre_technique, src_ip, dst_ip, journal_id, journal_seq, body
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# journal_marks key for alerts journaled without a journal_id
+_NO_JOURNAL_ID = ""
+
+UPDATE_MARK = """
+INSERT INTO journal_marks (journal_id, seq) VALUES (?, ?)
+ON CONFLICT (journal_id) DO UPDATE SET seq = MAX(seq, excluded.seq)
+"""
+
+
+class SqliteAlertStore:
+    """
+    AlertStore backed by a SQLite database, so alerts and their
+    statuses survive backend restarts. Same interface and semantics as
+    the in-memory AlertStore (ids, change seq, retention, queries).
+
+    - The database runs in WAL mode: readers never wait for the writer.
+    - add() only assigns the id and queues the alert; one writer thread
+      inserts everything queued since its last commit in a single
+      transaction (group commit), so a burst of alerts costs one commit.
+    - Reads wait until earlier writes are committed, then run on one
+      of `readers` pooled connections. They block the calling thread,
+      so call them from sync endpoints (FastAPI's threadpool), not from
+      the event loop.
+    - Filter fields are indexed columns; the full alert is kept as JSON.
+    """
+
+    def __init__(self, path: str, max_alerts: int, max_age: Optional[float] = None,
+                 clock: Callable[[], float] = time.time, readers: int = 4):
+        self.path = path
+        self.max_alerts = max_alerts
+        self.max_age = max_age
+        self._clock = clock
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._writer = self._connect()
+        self._migrate()
+        self._writer.executescript(SCHEMA)
+        next_id, seq, count = self._writer.execute(
+            "SELECT COALESCE(MAX(id), 0) + 1, COALESCE(MAX(seq), 0), COUNT(*) FROM alerts"
+        ).fetchone()
+        self._next_id = next_id
+        self.seq = seq
+        self._write_seq = seq
+        self._count = count
+        self._journal_keys: Dict[tuple, int] = {
+            (journal_id, seq): alert_id for journal_id, seq, alert_id in self._writer.execute(
+                "SELECT journal_id, journal_seq, id FROM alerts WHERE journal_seq IS NOT NULL"
+            )
+        }
+        self._journal_marks: Dict[str, int] = dict(
+            self._writer.execute("SELECT journal_id, seq FROM journal_marks")
+        )
+
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(readers):
+            self._readers.put(self._connect())
+
+        # Writes queued for the writer thread, and how far it has got
+        self._lock = threading.Condition()
+        self._ops: List[tuple] = []
+        self._submitted = 0
+        self._committed = 0
+        self._closing = False
+
+        self.evicted = 0
+        self.commits = 0
+
+        self._thread = threading.Thread(
+            target=self._run, name="SqliteAlertStore", daemon=True
+        )
+        self._thread.start()
+
+    def _migrate(self):
+        # Databases from before journal_id: journal_seq alone was UNIQUE
+        columns = [row[1] for row in self._writer.execute("PRAGMA table_info(alerts)")]
+        if not columns or "journal_id" in columns:
+            return
+        logger.info("Adding journal_id to the alerts table")
+        conn = self._writer
+        conn.execute("BEGIN")
+        conn.execute("ALTER TABLE alerts RENAME TO alerts_old")
+        for name, in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'alerts_old' "
+                "AND sql IS NOT NULL").fetchall():
+            conn.execute(f"DROP INDEX {name}")
+        for statement in SCHEMA.split(";"):
+            if statement.strip():
+                conn.execute(statement)
+        conn.execute(
+            "INSERT INTO alerts (id, seq, received, timestamp, status, severity, alert_type, "
+            "mitre_technique, src_ip, dst_ip, journal_seq, body) "
+            "SELECT id, seq, received, timestamp, status, severity, alert_type, "
+            "mitre_technique, src_ip, dst_ip, journal_seq, body FROM alerts_old"
+        )
+        conn.execute("DROP TABLE alerts_old")
+        conn.execute("COMMIT")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def __len__(self) -> int:
+        self._sync()
+        return self._count
+
+    # -----------------------------
+    # Writes
+    # -----------------------------
+    def add(self, alert: dict) -> Optional[int]:
+        """
+        Queues the alert for storage and returns its id, or None if an
+        alert with the same journal_id / journal_seq is already stored.
+        """
+        key = journal_key(alert)
+        with self._lock:
+            if key is not None and key in self._journal_keys:
+                return None
+            alert_id = self._next_id
+            self._next_id += 1
+            if key is not None:
+                self._remember(key, alert_id)
+            alert["id"] = alert_id
+            alert.setdefault("status", "new")
+            self._submit(("insert", alert, self._clock()))
+        return alert_id
+
+    def _remember(self, key: tuple, alert_id: int):
+        # Caller holds self._lock
+        self._journal_keys[key] = alert_id
+        journal_id = key[0] or _NO_JOURNAL_ID
+        if key[1] > self._journal_marks.get(journal_id, 0):
+            self._journal_marks[journal_id] = key[1]
+
+    def journal_mark(self, journal_id: Optional[str]) -> int:
+        """
+        Highest journal_seq of `journal_id` ever stored (0 if none),
+        persisted with the alerts, so evicted alerts are not replayed.
+        """
+        with self._lock:
+            return self._journal_marks.get(journal_id or _NO_JOURNAL_ID, 0)
+
+    def update_status(self, alert_id: int, status: str) -> Optional[dict]:
+        with self._lock:
+            self._submit(("status", alert_id, status))
+        return self.get(alert_id)
+
+    def evict(self):
+        """
+        Applies the count / age limits and waits for pending writes.
+        """
+        if self.max_age is not None:
+            with self._lock:
+                self._submit(("evict",))
+        self._sync()
+
+    def clear(self):
+        with self._lock:
+            self._submit(("clear",))
+        self._sync()
+
+    def close(self):
+        with self._lock:
+            self._closing = True
+            self._lock.notify()
+        self._thread.join()
+        self._writer.close()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+
+    def _submit(self, op: tuple):
+        # Caller holds self._lock
+        self._ops.append(op)
+        self._submitted += 1
+        self._lock.notify_all()
+
+    def _sync(self):
+        """
+        Blocks until every write submitted so far is committed.
+        """
+        with self._lock:
+            target = self._submitted
+            while self._committed < target:
+                self._lock.wait()
+
+    # -----------------------------
+    # Writer thread
+    # -----------------------------
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._ops and not self._closing:
+                    # Wake up now and then to apply max_age
+                    self._lock.wait(timeout=1.0)
+                ops, self._ops = self._ops, []
+                done = self._submitted
+                closing = self._closing
+
+            if ops or self.max_age is not None:
+                try:
+                    self._apply(ops)
+                except Exception:
+                    logger.exception(f"Failed to write {len(ops)} alert operations")
+
+            with self._lock:
+                self.seq = self._write_seq
+                self._committed = done
+                self._lock.notify_all()
+            if closing and not ops:
+                return
+
+    def _apply(self, ops: List[tuple]):
+        conn = self._writer
+        saved = (self._write_seq, self._count)
+        conn.execute("BEGIN")
+        try:
+            rows = []
+            for op in ops:
+                if op[0] == "insert":
+                    rows.append(self._row(op[1], op[2]))
+                    continue
+                self._insert(rows)
+                rows = []
+                if op[0] == "status":
+                    _, alert_id, status = op
+                    updated = conn.execute(
+                        "UPDATE alerts SET status = ?, seq = ? WHERE id = ?",
+                        (status, self._write_seq + 1, alert_id)
+                    ).rowcount
+                    self._write_seq += updated
+                elif op[0] == "clear":
+                    self._delete("DELETE FROM alerts RETURNING journal_id, journal_seq", ())
+                    # Clients holding a seq must notice
+                    self._write_seq += 1
+            self._insert(rows)
+            self._apply_retention()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            self._write_seq, self._count = saved
+            self._reload_journal_state()
+            raise
+        self.commits += 1
+
+    def _reload_journal_state(self):
+        """
+        After a rollback: journal keys and marks go back to what is
+        stored plus the inserts still queued, so alerts lost with the
+        transaction are accepted again when their journal is replayed.
+        """
+        stored = self._writer.execute(
+            "SELECT journal_id, journal_seq, id FROM alerts WHERE journal_seq IS NOT NULL"
+        ).fetchall()
+        marks = self._writer.execute("SELECT journal_id, seq FROM journal_marks").fetchall()
+        with self._lock:
+            self._journal_keys = {(journal_id, seq): alert_id for journal_id, seq, alert_id in stored}
+            self._journal_marks = dict(marks)
+            for op in self._ops:
+                key = journal_key(op[1]) if op[0] == "insert" else None
+                if key is not None:
+                    self._remember(key, op[1]["id"])
+
+    def _row(self, alert: dict, received: float) -> tuple:
+        self._write_seq += 1
+        return (
+            alert["id"], self._write_seq, received, alert.get("timestamp"),
+            *(read(alert) for read in INDEXED_FIELDS.values()),
+            alert.get("journal_id"), alert.get("journal_seq"), json.dumps(alert)
+        )
+
+    def _insert(self, rows: List[tuple]):
+        if rows:
+            before = self._writer.total_changes
+            self._writer.executemany(INSERT, rows)
+            self._count += self._writer.total_changes - before
+
+            marks: Dict[str, int] = {}
+            for *_, journal_id, seq, _ in rows:
+                if seq is not None:
+                    journal_id = journal_id or _NO_JOURNAL_ID
+                    marks[journal_id] = max(seq, marks.get(journal_id, 0))
+            self._writer.executemany(UPDATE_MARK, marks.items())
+
+    def _apply_retention(self):
+        excess = self._count - self.max_alerts
+        if excess > 0:
+            self.evicted += self._delete(
+                "DELETE FROM alerts WHERE id IN "
+                "(SELECT id FROM alerts ORDER BY id LIMIT ?) RETURNING journal_id, journal_seq",
+                (excess,)
+            )
+        if self.max_age is not None:
+            self.evicted += self._delete(
+                "DELETE FROM alerts WHERE received < ? RETURNING journal_id, journal_seq",
+                (self._clock() - self.max_age,)
+            )
+
+    def _delete(self, sql: str, params: tuple) -> int:
+        deleted = self._writer.execute(sql, params).fetchall()
+        self._count -= len(deleted)
+        with self._lock:
+            for journal_id, seq in deleted:
+                if seq is not None:
+                    self._journal_keys.pop((journal_id, seq), None)
+        return len(deleted)
+
+    # -----------------------------
+    # Reads
+    # -----------------------------
+    @contextmanager
+    def _reader(self):
+        self._sync()
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def _select(self, sql: str, params: Iterable = ()) -> List[dict]:
+        with self._reader() as conn:
+            rows = conn.execute(sql, tuple(params)).fetchall()
+        alerts = []
+        for status, body in rows:
+            alert = json.loads(body)
+            alert["status"] = status
+            alerts.append(alert)
+        return alerts
+
+    def get(self, alert_id: int) -> Optional[dict]:
+        alerts = self._select("SELECT status, body FROM alerts WHERE id = ?", (alert_id,))
+        return alerts[0] if alerts else None
+
+    def ids_for_timestamp(self, timestamp: str) -> List[int]:
+        with self._reader() as conn:
+            return [alert_id for alert_id, in conn.execute(
+                "SELECT id FROM alerts WHERE timestamp = ? ORDER BY id", (timestamp,)
+            )]
+
+    def all(self) -> List[dict]:
+        return self.page({})[0]
+
+    def find(self, **filters) -> List[dict]:
+        unknown = set(filters) - set(INDEXED_FIELDS)
+        if unknown:
+            raise ValueError(f"Not an indexed field: {', '.join(sorted(unknown))}")
+        return self.page(filters)[0]
+
+    def page(self, filters: dict, start: Optional[str] = None, end: Optional[str] = None,
+             cursor: Optional[int] = None, limit: Optional[int] = None,
+             descending: bool = False) -> Tuple[List[dict], Optional[int]]:
+        where, params = self._where(filters)
+        if start is not None:
+            where.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            where.append("timestamp <= ?")
+            params.append(end)
+        if cursor is not None:
+            where.append("id < ?" if descending else "id > ?")
+            params.append(cursor)
+
+        sql = "SELECT status, body FROM alerts"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC" if descending else " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        alerts = self._select(sql, params)
+        if limit is not None and len(alerts) > limit:
+            alerts = alerts[:limit]
+            return alerts, alerts[-1]["id"]
+        return alerts, None
+
+    def changed_since(self, since: int, filters: dict, limit: Optional[int] = None
+                      ) -> Tuple[List[dict], int]:
+        self._sync()
+        current = self.seq
+        where, params = self._where(filters)
+        where.append("seq > ?")
+        params.append(since)
+
+        sql = "SELECT seq, status, body FROM alerts WHERE " + " AND ".join(where) + " ORDER BY seq"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+        with self._reader() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            current = rows[-1][0]
+        alerts = []
+        for _, status, body in rows:
+            alert = json.loads(body)
+            alert["status"] = status
+            alerts.append(alert)
+        return alerts, current
+
+    @staticmethod
+    def _where(filters: dict) -> Tuple[List[str], list]:
+        unknown = set(filters) - set(INDEXED_FIELDS) - {"ip"}
+        if unknown:
+            raise ValueError(f"Not a filter field: {', '.join(sorted(unknown))}")
+
+        where, params = [], []
+        for name, value in filters.items():
+            if name == "ip":
+                where.append("(src_ip = ? OR dst_ip = ?)")
+                params += [value, value]
+            else:
+                # Column names come from INDEXED_FIELDS, never from the query
+                where.append(f"{name} IS ?")
+                params.append(value)
+        return where, params
+
+    def count(self, field: str, value) -> int:
+        if field not in INDEXED_FIELDS:
+            raise ValueError(f"Not an indexed field: {field}")
+        with self._reader() as conn:
+            return conn.execute(
+                f"SELECT COUNT(*) FROM alerts WHERE {field} IS ?", (value,)
+            ).fetchone()[0]
+
+    def values(self, field: str) -> Iterable:
+        if field not in INDEXED_FIELDS:
+            raise ValueError(f"Not an indexed field: {field}")
+        with self._reader() as conn:
+            return [value for value, in conn.execute(f"SELECT DISTINCT {field} FROM alerts")]
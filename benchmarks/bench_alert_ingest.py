@@ -0,0 +1,118 @@
+"""
+Alert Ingest Benchmark
+======================
+Measures backend ingest capacity in alerts/sec: one POST /alerts per
+alert versus POST /alerts/batch with a JSON array or NDJSON.
+
+By default the FastAPI app runs in-process (TestClient), which measures
+the app itself without network overhead. Pass --url to measure a
+running backend over HTTP instead (e.g. --url http://127.0.0.1:8000).
+--storage picks the in-process store (a throwaway SQLite file for
+"sqlite").
+
+Usage (from the project root):
+    python benchmarks/bench_alert_ingest.py [--alerts N] [--batch N] [--url URL]
+                                            [--storage memory|sqlite]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "backend"))
+
+
+def make_alerts(n):
+    start = datetime(2024, 1, 1)
+    return [{
+        "timestamp": (start + timedelta(microseconds=i)).isoformat(),
+        "alert_type": "signature",
+        "attack_name": "syn_flood",
+        "severity": "high",
+        "mitre_technique": "T1499",
+        "anomaly_score": None,
+        "source": {"ip": f"10.0.{i // 256 % 256}.{i % 256}", "port": 40000 + i % 20000},
+        "destination": {"ip": "192.168.1.10", "port": 80},
+        "traffic": {
+            "packet_size": 60, "packet_rate": 1500.0, "byte_rate": 90000.0,
+            "tcp_flags": "S", "flow_duration": 0.5
+        }
+    } for i in range(n)]
+
+
+def make_client(url, storage):
+    if url:
+        import requests
+        session = requests.Session()
+
+        def post(path, content=None, **kwargs):
+            return session.post(url.rstrip("/") + path, data=content, **kwargs)
+        return post, None
+
+    os.environ["IDS_STORAGE"] = storage
+    os.environ["IDS_SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+    from fastapi.testclient import TestClient
+    import app as backend
+    client = TestClient(backend.app)
+    return client.post, backend.ALERT_STORE
+
+
+def run(label, post, store, alerts, send):
+    if store is not None:
+        store.clear()
+    start = time.perf_counter()
+    send(post, alerts)
+    if store is not None:
+        len(store)  # wait for the store to commit
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {len(alerts) / elapsed:>12,.0f} alerts/s")
+
+
+def single(post, alerts):
+    for alert in alerts:
+        post("/alerts", json=alert).raise_for_status()
+
+
+def batched_json(batch_size):
+    def send(post, alerts):
+        for i in range(0, len(alerts), batch_size):
+            body = json.dumps(alerts[i:i + batch_size])
+            post("/alerts/batch", content=body,
+                 headers={"Content-Type": "application/json"}).raise_for_status()
+    return send
+
+
+def batched_ndjson(batch_size):
+    def send(post, alerts):
+        for i in range(0, len(alerts), batch_size):
+            body = "\n".join(json.dumps(a) for a in alerts[i:i + batch_size])
+            post("/alerts/batch", content=body,
+                 headers={"Content-Type": "application/x-ndjson"}).raise_for_status()
+    return send
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--alerts", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--storage", choices=("memory", "sqlite"), default="memory")
+    args = parser.parse_args()
+
+    post, store = make_client(args.url, args.storage)
+    alerts = make_alerts(args.alerts)
+    print(f"Alerts: {len(alerts):,}  batch size: {args.batch}  "
+          f"target: {args.url or f'in-process app ({args.storage} store)'}")
+
+    run("POST /alerts", post, store, alerts[:max(1, len(alerts) // 10)], single)
+    run("POST /alerts/batch", post, store, alerts, batched_json(args.batch))
+    run("  (NDJSON)", post, store, alerts, batched_ndjson(args.batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Decoder Benchmark
+=================
+Compares packets/sec of the Scapy dissection path against the
+raw-bytes fast-path decoder on a PCAP file.
+
+Both paths run the same TrafficAnalyzer, so the numbers reflect
+the full per-packet cost up to feature extraction.
+
+Usage (from the project root):
+    python benchmarks/bench_decoder.py [pcap_file] [--rounds N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "src"))
+
+from scapy.layers.l2 import Ether  # type: ignore[import-untyped]  # noqa: E402
+from scapy.utils import RawPcapReader  # type: ignore[import-untyped]  # noqa: E402
+
+from analysis.traffic_analyzer import TrafficAnalyzer  # noqa: E402
+from capture.packet_decoder import decode_frame, header_from_scapy  # noqa: E402
+
+DEFAULT_PCAP = os.path.join(BASE_DIR, "data", "pcaps", "sample.pcap")
+
+
+def load_frames(pcap_file):
+    """Loads raw frames into memory so file I/O is not measured."""
+    with RawPcapReader(pcap_file) as reader:
+        linktype = reader.linktype
+        frames = [
+            (bytes(data), meta.sec + meta.usec / 1e6)
+            for data, meta in reader
+        ]
+    return linktype, frames
+
+
+def run_scapy(frames, rounds):
+    analyzer = TrafficAnalyzer()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for data, ts in frames:
+            packet = Ether(data)
+            packet.time = ts
+            header = header_from_scapy(packet)
+            if header is not None:
+                analyzer.analyze(header)
+    return time.perf_counter() - start
+
+
+def run_fast(frames, linktype, rounds):
+    analyzer = TrafficAnalyzer()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for data, ts in frames:
+            header = decode_frame(data, ts, linktype)
+            if header is not None:
+                analyzer.analyze(header)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("pcap", nargs="?", default=DEFAULT_PCAP)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    linktype, frames = load_frames(args.pcap)
+    total = len(frames) * args.rounds
+
+    # Both paths must agree on which packets are TCP/IP
+    fast_headers = [decode_frame(d, ts, linktype) for d, ts in frames]
+    scapy_headers = []
+    for data, ts in frames:
+        packet = Ether(data)
+        packet.time = ts
+        scapy_headers.append(header_from_scapy(packet))
+    mismatches = sum(1 for a, b in zip(fast_headers, scapy_headers) if a != b)
+
+    scapy_time = run_scapy(frames, args.rounds)
+    fast_time = run_fast(frames, linktype, args.rounds)
+
+    print(f"PCAP file      : {args.pcap}")
+    print(f"Frames         : {len(frames)} x {args.rounds} rounds")
+    print(f"Header mismatch: {mismatches}")
+    print(f"Scapy path     : {total / scapy_time:>12,.0f} packets/sec")
+    print(f"Fast path      : {total / fast_time:>12,.0f} packets/sec")
+    print(f"Speed-up       : {scapy_time / fast_time:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
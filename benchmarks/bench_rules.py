@@ -0,0 +1,90 @@
+"""
+Signature Rule Benchmark
+========================
+Measures signature evaluation cost per packet as the rule set grows.
+
+The shipped rules are extended with N synthetic rules keyed on a
+destination port, destination prefix or flag combination, the way a
+large site-specific rule set usually looks. With indexed dispatch the
+per-packet cost should stay roughly flat as N grows.
+
+Usage (from the project root):
+    python benchmarks/bench_rules.py [pcap_file] [--rules 0 100 1000 3000]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "src"))
+
+from analysis.traffic_analyzer import TrafficAnalyzer  # noqa: E402
+from capture.pcap_reader import PCAPReader  # noqa: E402
+from detection.rule_compiler import CompiledRuleSet  # noqa: E402
+
+DEFAULT_PCAP = os.path.join(BASE_DIR, "data", "pcaps", "sample.pcap")
+SIGNATURE_FILE = os.path.join(BASE_DIR, "data", "signatures", "signature_rules.json")
+
+
+def synthetic_rules(count, seed=7):
+    rng = random.Random(seed)
+    rules = {}
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            conditions = {
+                "dst_port": {"==": rng.randrange(1, 65536)},
+                "packet_rate": {">": rng.uniform(10, 1000)}
+            }
+        elif kind == 1:
+            prefix = f"10.{rng.randrange(256)}.{rng.randrange(256)}.0/24"
+            conditions = {
+                "dst_ip": {"cidr": prefix},
+                "byte_rate": {">": rng.uniform(1000, 100000)}
+            }
+        else:
+            conditions = {
+                "src_port": {"in": [rng.randrange(1, 65536) for _ in range(4)]},
+                "tcp_flags": {"flags_all": "S"}
+            }
+        rules[f"synthetic_{i}"] = {"severity": "low", "conditions": conditions}
+    return rules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("pcap", nargs="?", default=DEFAULT_PCAP)
+    parser.add_argument("--rules", type=int, nargs="+", default=[0, 100, 1000, 3000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    headers = list(PCAPReader(args.pcap).read_packets())
+    records = TrafficAnalyzer().analyze_batch(headers)
+    print(f"Packets: {len(records):,}")
+
+    with open(SIGNATURE_FILE, "r") as f:
+        shipped = json.load(f)
+
+    print(f"{'rules':>6}  {'vector':>6}  {'indexed':>7}  {'us/packet':>9}  {'matches':>7}")
+    for count in args.rules:
+        rule_set = CompiledRuleSet({**shipped, **synthetic_rules(count)})
+
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            mask = rule_set.match_records(records)
+            best = min(best, time.perf_counter() - start)
+
+        print(
+            f"{len(rule_set):>6}  {len(rule_set.vector_rules):>6}  "
+            f"{len(rule_set.indexed_rules):>7}  "
+            f"{best / max(len(records), 1) * 1e6:>9.2f}  {int(mask.sum()):>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
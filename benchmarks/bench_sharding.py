@@ -0,0 +1,76 @@
+"""
+Sharded Pipeline Benchmark
+==========================
+Measures packets/sec of the source-sharded multi-process pipeline
+for an increasing number of workers.
+
+Headers from the PCAP are replicated with shifted source addresses
+and ports so the load is spread over many sources and flows.
+
+Usage (from the project root):
+    python benchmarks/bench_sharding.py [pcap_file] [--copies N] [--workers 1 2 4]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "src"))
+
+from capture.pcap_reader import PCAPReader  # noqa: E402
+from pipeline.sharded import ShardedPipeline  # noqa: E402
+
+DEFAULT_PCAP = os.path.join(BASE_DIR, "data", "pcaps", "sample.pcap")
+SIGNATURE_FILE = os.path.join(BASE_DIR, "data", "signatures", "signature_rules.json")
+
+
+def build_headers(pcap_file, copies):
+    base = list(PCAPReader(pcap_file).read_packets())
+    headers = []
+    for copy in range(copies):
+        headers.extend(
+            h._replace(
+                src_ip=f"10.{copy // 256 % 256}.{copy % 256}.{h.src_ip.rsplit('.', 1)[1]}",
+                src_port=(h.src_port + copy) % 65536
+            )
+            for h in base
+        )
+    return headers
+
+
+def run(headers, workers):
+    pipeline = ShardedPipeline(SIGNATURE_FILE, workers, batch_size=512)
+    pipeline.start()
+
+    start = time.perf_counter()
+    for header in headers:
+        pipeline.submit(header)
+    pipeline.stop()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("pcap", nargs="?", default=DEFAULT_PCAP)
+    parser.add_argument("--copies", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    headers = build_headers(args.pcap, args.copies)
+    print(f"Packets: {len(headers):,}")
+
+    baseline = None
+    for workers in args.workers:
+        elapsed = run(headers, workers)
+        rate = len(headers) / elapsed
+        baseline = baseline or rate
+        print(
+            f"{workers:>2} worker(s): {rate:>12,.0f} packets/sec "
+            f"({rate / baseline:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
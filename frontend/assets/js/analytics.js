@@ -1,27 +1,20 @@
-const API_URL = "http://127.0.0.1:8000/alerts";
-
 const severityChart = echarts.init(document.getElementById("severityChart"));
 const timelineChart = echarts.init(document.getElementById("timelineChart"));
 const sourceChart = echarts.init(document.getElementById("sourceChart"));
 const attackTypeChart = echarts.init(document.getElementById("attackTypeChart"));
 
-async function loadAnalytics() {
-  const res = await fetch(API_URL);
-  const data = await res.json();
-  const alerts = data.alerts || [];
-
-  renderSeverity(alerts);
-  renderTimeline(alerts);
-  renderSources(alerts);
-  renderAttackTypes(alerts);
-  renderInsights(alerts);
+// Aggregates come from the backend (GET /stats + live deltas, see stats.js)
+function renderAnalytics(stats) {
+  renderSeverity(stats);
+  renderTimeline(stats);
+  renderSources(stats);
+  renderAttackTypes(stats);
+  renderInsights(stats);
 }
 
 /* ---------- Severity Distribution ---------- */
-function renderSeverity(alerts) {
-  const count = { high: 0, medium: 0, low: 0 };
-
-  alerts.forEach(a => count[a.severity]++);
+function renderSeverity(stats) {
+  const count = { high: 0, medium: 0, low: 0, ...stats.counts.severity };
 
   severityChart.setOption({
     tooltip: { trigger: "item" },
@@ -39,21 +32,20 @@ function renderSeverity(alerts) {
 }
 
 /* ---------- Timeline ---------- */
-function renderTimeline(alerts) {
-  const map = {};
-
-  alerts.forEach(a => {
-    const t = new Date(a.timestamp).toLocaleTimeString();
-    map[t] = (map[t] || 0) + 1;
-  });
+function renderTimeline(stats) {
+  // Alerts per minute over the last hour of activity
+  const series = histogramSeries(stats.histograms["1m"]);
+  const labels = series.map(([start]) =>
+    new Date(start * 1000).toLocaleTimeString([], { hour: "2-digit", minute: "2-digit" })
+  );
 
   timelineChart.setOption({
-    xAxis: { type: "category", data: Object.keys(map), axisLabel: { color: "#9ca3af" }},
+    xAxis: { type: "category", data: labels, axisLabel: { color: "#9ca3af" }},
     yAxis: { type: "value", axisLabel: { color: "#9ca3af" }},
     series: [{
       type: "line",
       smooth: true,
-      data: Object.values(map),
+      data: series.map(([, count]) => count),
       lineStyle: { color: "#38bdf8" },
       areaStyle: { color: "rgba(56,189,248,0.2)" }
     }]
@@ -61,15 +53,8 @@ function renderTimeline(alerts) {
 }
 
 /* ---------- Source IPs ---------- */
-function renderSources(alerts) {
-  const map = {};
-
-  alerts.forEach(a => {
-    const ip = a.source?.ip || "unknown";
-    map[ip] = (map[ip] || 0) + 1;
-  });
-
-  const entries = Object.entries(map).slice(0, 6);
+function renderSources(stats) {
+  const entries = stats.top_sources.slice(0, 6);
 
   sourceChart.setOption({
     xAxis: { type: "value", axisLabel: { color: "#9ca3af" }},
@@ -83,12 +68,8 @@ function renderSources(alerts) {
 }
 
 /* ---------- Attack Types ---------- */
-function renderAttackTypes(alerts) {
-  const map = {};
-
-  alerts.forEach(a => {
-    map[a.attack_name] = (map[a.attack_name] || 0) + 1;
-  });
+function renderAttackTypes(stats) {
+  const map = stats.counts.attack_name || {};
 
   attackTypeChart.setOption({
     tooltip: {},
@@ -103,16 +84,16 @@ function renderAttackTypes(alerts) {
 }
 
 /* ---------- Insights ---------- */
-function renderInsights(alerts) {
+function renderInsights(stats) {
   const container = document.getElementById("insights");
   container.innerHTML = "";
 
-  const high = alerts.filter(a => a.severity === "high").length;
+  const high = stats.counts.severity?.high || 0;
 
-  container.innerHTML += `<li>${alerts.length} total alerts detected.</li>`;
+  container.innerHTML += `<li>${stats.total} total alerts detected.</li>`;
   container.innerHTML += `<li>${high} high-severity alerts indicate potential active threats.</li>`;
   container.innerHTML += `<li>Repeated alerts from same IPs suggest coordinated attacks.</li>`;
   container.innerHTML += `<li>Timeline spikes may indicate attack bursts or scans.</li>`;
 }
 
-loadAnalytics();
+watchStats(renderAnalytics);
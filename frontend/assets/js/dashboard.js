@@ -114,22 +114,36 @@ function groupAlertsBySource(alerts) {
 
 
 /* ---------- Fetch and Render Alerts ---------- */
+// Alerts by id, kept in sync with GET /alerts?since=<seq> deltas
+const ALERTS_BY_KEY = new Map();
+let ALERTS_SEQ = null;
 
 async function loadAlerts() {
+  let alerts = CURRENT_ALERTS;
   try {
-    const res = await fetch(API_URL);
+    const url = ALERTS_SEQ === null ? API_URL : `${API_URL}?since=${ALERTS_SEQ}`;
+    const res = await fetch(url);
     const data = await res.json();
-    const alerts = data.alerts || [];
 
-    alerts.forEach(a => {
+    // seq went backwards: the backend restarted, start over
+    if (ALERTS_SEQ !== null && data.seq < ALERTS_SEQ) {
+      ALERTS_SEQ = null;
+      ALERTS_BY_KEY.clear();
+      return loadAlerts();
+    }
+
+    (data.alerts || []).forEach(a => {
       if (!a.status) a.status = "new";
+      ALERTS_BY_KEY.set(a.id ?? a.timestamp, a);
     });
+    ALERTS_SEQ = data.seq ?? null;
 
+    alerts = [...ALERTS_BY_KEY.values()];
     CURRENT_ALERTS = alerts;
 
     // Update dashboard metrics
 
-    document.getElementById("total").innerText = data.count;
+    document.getElementById("total").innerText = data.total ?? data.count;
     document.getElementById("lastUpdated").innerText =
       new Date().toLocaleTimeString();
 
@@ -676,13 +690,13 @@ function openModal(alert) {
             <div class="flex gap-3">
               <button
                 class="px-3 py-2 rounded bg-purple-500/20 text-purple-400 hover:bg-purple-500/30 transition"
-                onclick="setAlertStatus('${alert.timestamp}', 'investigating')">
+                onclick="setAlertStatus('${alert.id ?? alert.timestamp}', 'investigating')">
                 Mark Investigating
               </button>
 
               <button
                 class="px-3 py-2 rounded bg-green-500/20 text-green-400 hover:bg-green-500/30 transition"
-                onclick="setAlertStatus('${alert.timestamp}', 'resolved')">
+                onclick="setAlertStatus('${alert.id ?? alert.timestamp}', 'resolved')">
                 Mark Resolved
               </button>
             </div>
@@ -909,9 +923,10 @@ function closeModal() {
 }
 
 /* ---------- Set Alert Status ---------- */
-async function setAlertStatus(timestamp, status) {
+// key: the alert id (timestamp for alerts from older backends)
+async function setAlertStatus(key, status) {
   try {
-    await fetch(`http://127.0.0.1:8000/alerts/${encodeURIComponent(timestamp)}/status`, {
+    await fetch(`http://127.0.0.1:8000/alerts/${encodeURIComponent(key)}/status`, {
       method: 'PATCH',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({ status })
@@ -923,7 +938,7 @@ async function setAlertStatus(timestamp, status) {
   // Update local state
   const alerts = window.currentAlerts || [];
   alerts.forEach(a => {
-    if (a.timestamp === timestamp) {
+    if (String(a.id ?? a.timestamp) === String(key)) {
       a.status = status;
     }
   });
@@ -937,13 +952,42 @@ async function setAlertStatus(timestamp, status) {
 
 
 /* ---------- Live Alert Update ---------- */
-function updateFromLiveAlert(alert) {
-  // Update metrics
-  const total = document.getElementById("total");
-  total.innerText = parseInt(total.innerText) + 1;
+function updateFromLiveAlerts(alerts, dropped) {
+  // Frames may skip alerts (slow connection); re-sync those over REST
+  if (dropped) {
+    loadAlerts();
+    return;
+  }
+
+  alerts.forEach(a => {
+    if (!a.status) a.status = "new";
+    ALERTS_BY_KEY.set(a.id ?? a.timestamp, a);
+  });
+  scheduleRender();
+}
+
+// Re-render at most once per animation frame during alert bursts
+let renderPending = false;
+function scheduleRender() {
+  if (renderPending) return;
+  renderPending = true;
+  requestAnimationFrame(() => {
+    renderPending = false;
+    const alerts = [...ALERTS_BY_KEY.values()];
+    CURRENT_ALERTS = alerts;
+    window.currentAlerts = alerts;
 
-  // Add alert to charts + table
-  loadAlerts(); // safe re-sync
+    document.getElementById("total").innerText = alerts.length;
+    document.getElementById("lastUpdated").innerText =
+      new Date().toLocaleTimeString();
+
+    updateSeverityCounters(alerts);
+    updateSeverityChart(alerts);
+    updateTimelineChart(alerts);
+    updateSourceChart(alerts);
+    renderAlertsTable(alerts);
+    renderIncidents(alerts);
+  });
 }
 
 
@@ -957,10 +1001,14 @@ socket.onopen = () => {
 };
 
 socket.onmessage = (event) => {
-  const alert = JSON.parse(event.data);
+  const frame = JSON.parse(event.data);
 
-  // Append alert live
-  updateFromLiveAlert(alert);
+  // Batched frame {type, dropped, alerts}; older backends send one alert
+  if (frame.type === "alerts") {
+    updateFromLiveAlerts(frame.alerts, frame.dropped);
+  } else {
+    updateFromLiveAlerts([frame], 0);
+  }
 };
 
 socket.onclose = () => {
@@ -296,7 +296,7 @@ function renderInvestigatingCards() {
 
         <div class="flex flex-col gap-2 ml-4 flex-shrink-0">
           <button
-            onclick="event.stopPropagation(); markResolved('${alert.timestamp}')"
+            onclick="event.stopPropagation(); markResolved('${alert.id ?? alert.timestamp}')"
             class="px-4 py-2 rounded text-sm font-semibold
                    bg-green-500/20 text-green-400 hover:bg-green-500/30
                    transition whitespace-nowrap">
@@ -468,9 +468,9 @@ function renderResolvedCards() {
    ACTIONS
    ========================================================== */
 
-async function markResolved(timestamp) {
+async function markResolved(key) {
   try {
-    await fetch(`${API_BASE}/alerts/${encodeURIComponent(timestamp)}/status`, {
+    await fetch(`${API_BASE}/alerts/${encodeURIComponent(key)}/status`, {
       method: "PATCH",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({ status: "resolved" })
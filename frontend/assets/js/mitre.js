@@ -1,5 +1,3 @@
-const API_URL = "http://127.0.0.1:8000/alerts";
-
 /* ================= MITRE DATABASE ================= */
 const MITRE = {
   T1046: {
@@ -33,24 +31,23 @@ const techniqueChart = echarts.init(document.getElementById("techniqueChart"));
 const tacticSeverityChart = echarts.init(document.getElementById("tacticSeverityChart"));
 
 /* ================= LOAD ================= */
-async function loadMITRE() {
-  const res = await fetch(API_URL);
-  const data = await res.json();
-  const alerts = data.alerts || [];
-
-  renderKillChain(alerts);
-  renderTechniqueChart(alerts);
-  renderTacticSeverity(alerts);
-  renderTechniqueList(alerts);
+// Alert counts per technique from the backend (GET /stats + live deltas)
+function renderMITRE(stats) {
+  const techniques = stats.counts.mitre_technique || {};
+
+  renderKillChain(techniques);
+  renderTechniqueChart(techniques);
+  renderTacticSeverity(techniques);
+  renderTechniqueList(techniques);
 }
 
 /* ================= KILL CHAIN ================= */
-function renderKillChain(alerts) {
+function renderKillChain(techniques) {
   const container = document.getElementById("killChain");
   container.innerHTML = "";
 
   const activeTactics = new Set(
-    alerts.map(a => MITRE[a.mitre_technique]?.tactic).filter(Boolean)
+    Object.keys(techniques).map(id => MITRE[id]?.tactic).filter(Boolean)
   );
 
   KILL_CHAIN.forEach(stage => {
@@ -69,13 +66,8 @@ function renderKillChain(alerts) {
 }
 
 /* ================= CHARTS ================= */
-function renderTechniqueChart(alerts) {
-  const map = {};
-
-  alerts.forEach(a => {
-    if (a.mitre_technique)
-      map[a.mitre_technique] = (map[a.mitre_technique] || 0) + 1;
-  });
+function renderTechniqueChart(techniques) {
+  const map = techniques;
 
   techniqueChart.setOption({
     xAxis: { type: "category", data: Object.keys(map), axisLabel: { color: "#9ca3af" }},
@@ -88,13 +80,13 @@ function renderTechniqueChart(alerts) {
   });
 }
 
-function renderTacticSeverity(alerts) {
+function renderTacticSeverity(techniques) {
   const map = {};
 
-  alerts.forEach(a => {
-    const tactic = MITRE[a.mitre_technique]?.tactic;
+  Object.entries(techniques).forEach(([id, count]) => {
+    const tactic = MITRE[id]?.tactic;
     if (!tactic) return;
-    map[tactic] = (map[tactic] || 0) + 1;
+    map[tactic] = (map[tactic] || 0) + count;
   });
 
   tacticSeverityChart.setOption({
@@ -109,11 +101,11 @@ function renderTacticSeverity(alerts) {
 }
 
 /* ================= LIST ================= */
-function renderTechniqueList(alerts) {
+function renderTechniqueList(techniques) {
   const container = document.getElementById("techniqueList");
   container.innerHTML = "";
 
-  const used = new Set(alerts.map(a => a.mitre_technique).filter(Boolean));
+  const used = Object.keys(techniques);
 
   used.forEach(id => {
     const t = MITRE[id];
@@ -154,4 +146,4 @@ function closeModal() {
   document.getElementById("mitreModal").classList.add("hidden");
 }
 
-loadMITRE();
+watchStats(renderMITRE);
@@ -0,0 +1,100 @@
+/* ---------- Live Alert Statistics ---------- */
+// Server-side aggregates from GET /stats, kept current by the deltas in
+// WebSocket frames, so pages never download the full alert list.
+const STATS_URL = "http://127.0.0.1:8000/stats";
+const STATS_WS_URL = "ws://127.0.0.1:8000/ws/alerts";
+
+function watchStats(onChange) {
+  let stats = null;
+  let early = [];  // deltas that arrived before the snapshot
+
+  async function loadStats() {
+    try {
+      const res = await fetch(STATS_URL);
+      stats = toLocalStats(await res.json());
+      const pending = early;
+      early = [];
+      pending.forEach(applyDelta);
+      onChange(stats);
+    } catch (err) {
+      console.error("Failed to fetch stats", err);
+    }
+  }
+
+  function applyDelta(delta) {
+    if (delta.total <= stats.total) return;  // already in the snapshot
+    if (delta.base !== stats.total) {
+      // Missed part of the stream: start over from a snapshot
+      stats = null;
+      loadStats();
+      return;
+    }
+    applyStatsDelta(stats, delta);
+  }
+
+  const socket = new WebSocket(STATS_WS_URL);
+  socket.onmessage = (event) => {
+    const frame = JSON.parse(event.data);
+    if (!frame.stats) return;
+    if (!stats) {
+      early.push(frame.stats);
+      return;
+    }
+    applyDelta(frame.stats);
+    if (stats) onChange(stats);
+  };
+  socket.onclose = () => {
+    console.warn("WebSocket disconnected, fallback to polling");
+    setInterval(loadStats, 5000);
+  };
+
+  loadStats();
+}
+
+// Histogram buckets as {start: count} for merging deltas
+function toLocalStats(snapshot) {
+  Object.values(snapshot.histograms).forEach(h => {
+    h.buckets = Object.fromEntries(h.buckets);
+  });
+  return snapshot;
+}
+
+function applyStatsDelta(stats, delta) {
+  stats.total = delta.total;
+
+  Object.entries(delta.counts).forEach(([field, values]) => {
+    const counts = stats.counts[field] || (stats.counts[field] = {});
+    Object.entries(values).forEach(([value, n]) => {
+      counts[value] = (counts[value] || 0) + n;
+    });
+  });
+
+  Object.entries(delta.histograms).forEach(([name, buckets]) => {
+    const h = stats.histograms[name];
+    Object.entries(buckets).forEach(([start, n]) => {
+      h.buckets[start] = (h.buckets[start] || 0) + n;
+    });
+
+    // Keep only the window the server keeps
+    const last = Math.max(...Object.keys(h.buckets).map(Number));
+    Object.keys(h.buckets).forEach(start => {
+      if (Number(start) <= last - h.slots * h.width) delete h.buckets[start];
+    });
+  });
+
+  stats.top_sources = delta.top_sources;
+  stats.top_destinations = delta.top_destinations;
+}
+
+// Latest `slots` buckets of a histogram as [[start, count], ...]
+function histogramSeries(h) {
+  const starts = Object.keys(h.buckets).map(Number);
+  if (!starts.length) return [];
+  const last = Math.max(...starts);
+  const series = [];
+  for (let i = h.slots - 1; i >= 0; i--) {
+    const start = last - i * h.width;
+    series.push([start, h.buckets[start] || 0]);
+  }
+  return series;
+}
@@ -0,0 +1,404 @@
+import glob
+import json
+import os
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+SEGMENT_PREFIX = "alerts-"
+SEGMENT_SUFFIX = ".ndjson"
+CURSOR_FILE = "cursor.json"
+META_FILE = "journal.json"
+LOCK_FILE = "journal.lock"
+
+
+def _segment_name(first_seq: int) -> str:
+    return f"{SEGMENT_PREFIX}{first_seq:020d}{SEGMENT_SUFFIX}"
+
+
+def _segment_first_seq(path: str) -> int:
+    name = os.path.basename(path)
+    return int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+
+
+def list_segments(directory: str) -> List[str]:
+    """
+    Journal segment files, oldest first.
+    """
+    pattern = os.path.join(directory, f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")
+    return sorted(glob.glob(pattern), key=_segment_first_seq)
+
+
+def read_journal_id(directory: str) -> Optional[str]:
+    """
+    The journal's id (see AlertJournal), or None if it has none yet.
+    """
+    try:
+        with open(os.path.join(directory, META_FILE), "r") as f:
+            return json.load(f)["journal_id"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def read_journal(directory: str, after_seq: int = 0) -> Iterator[dict]:
+    """
+    Yields journaled alerts with journal_seq > after_seq, in order.
+    A torn last line (crash mid-write) is skipped.
+    """
+    segments = list_segments(directory)
+    # Skip segments that end before after_seq
+    start = 0
+    for i, path in enumerate(segments):
+        if _segment_first_seq(path) <= after_seq + 1:
+            start = i
+    for path in segments[start:]:
+        for _, alert in _read_segment(path):
+            if alert["journal_seq"] > after_seq:
+                yield alert
+
+
+def _read_segment(path: str, offset: int = 0) -> Iterator[tuple]:
+    """
+    Yields (end_offset, alert) for each complete line from `offset`.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                return
+            offset += len(line)
+            try:
+                alert = json.loads(line)
+            except ValueError:
+                continue
+            yield offset, alert
+
+
+def _json_default(obj):
+    # Decimal (and numpy scalars) from feature extraction
+    try:
+        return float(obj)
+    except (TypeError, ValueError):
+        raise TypeError(f"{type(obj).__name__} is not JSON serializable") from None
+
+
+class AlertJournal:
+    """
+    Append-only NDJSON journal of every alert, independent of the
+    backend being reachable.
+
+    - append() numbers the alert (journal_seq) and buffers it; the
+      caller never touches the disk.
+    - A commit thread writes buffered alerts and fsyncs them together
+      every `commit_interval_ms` (group commit), so an alert is durable
+      at most that long after it was raised.
+    - Segments (alerts-<first seq>.ndjson) rotate at `segment_bytes`.
+      Beyond `max_segments`, the oldest segment is deleted, but only
+      once all its alerts were delivered.
+    - The delivery cursor is the highest seq up to which every alert
+      has been acknowledged by the backend (see ack); it is persisted
+      in cursor.json and pending() returns what lies beyond it.
+    - Committed alerts stay in memory until acknowledged (the newest
+      `max_tail` of them), so pending() only reads segments for what
+      was undelivered at startup or pushed out of that tail.
+    - Seqs only count within one journal, so every journal gets a
+      random journal_id (kept in journal.json) that is stamped on its
+      alerts next to journal_seq. A wiped journal or another sensor
+      starts a new id, and the backend dedupes on the pair.
+
+    One process writes a journal directory (enforced with an exclusive
+    lock on journal.lock); readers (read_journal) may tail it
+    concurrently.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int,
+                 commit_interval_ms: float, max_segments: int,
+                 max_tail: int = 10000):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.commit_interval = commit_interval_ms / 1000
+        self.max_segments = max_segments
+        self.max_tail = max_tail
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = self._acquire_lock()
+        self.journal_id = read_journal_id(directory) or self._create_id()
+
+        self._lock = threading.Lock()
+        self._commit_lock = threading.Lock()
+        self._buffer: List[dict] = []
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.last_seq = self._recover()
+        self.acked_seq = min(self._load_cursor(), self.last_seq)
+        self._saved_cursor = self.acked_seq
+        self._acked_ahead = set()
+        self._file = open(self._current_segment, "ab")
+
+        # Unacknowledged committed alerts newer than _disk_until; older
+        # ones are only on disk. Where the last disk read stopped:
+        # (seq, segment, offset)
+        self._tail: "OrderedDict[int, dict]" = OrderedDict()
+        self._disk_until = self.last_seq
+        self._read_pos = None
+
+        self.appended = 0
+        self.commits = 0
+
+    # -----------------------------
+    # Ownership
+    # -----------------------------
+    def _acquire_lock(self):
+        lock_file = open(os.path.join(self.directory, LOCK_FILE), "a+b")
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(
+                f"Alert journal {self.directory} is in use by another process"
+            ) from None
+        return lock_file
+
+    def _create_id(self) -> str:
+        journal_id = uuid.uuid4().hex
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".journal-")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"journal_id": journal_id}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.directory, META_FILE))
+        return journal_id
+
+    # -----------------------------
+    # Recovery
+    # -----------------------------
+    def _recover(self) -> int:
+        """
+        Finds the last complete alert, truncating a torn tail.
+        Returns its seq (0 for an empty journal).
+        """
+        segments = list_segments(self.directory)
+        if not segments:
+            self._current_segment = os.path.join(self.directory, _segment_name(1))
+            return 0
+
+        last = segments[-1]
+        self._current_segment = last
+        last_seq = _segment_first_seq(last) - 1
+        good_offset = 0
+        for offset, alert in _read_segment(last):
+            last_seq = alert["journal_seq"]
+            good_offset = offset
+        if os.path.getsize(last) != good_offset:
+            with open(last, "r+b") as f:
+                f.truncate(good_offset)
+        return last_seq
+
+    def _load_cursor(self) -> int:
+        try:
+            with open(os.path.join(self.directory, CURSOR_FILE), "r") as f:
+                return int(json.load(f)["acked_seq"])
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    def _save_cursor(self, acked_seq: int):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".cursor-")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"acked_seq": acked_seq}, f)
+        os.replace(tmp_path, os.path.join(self.directory, CURSOR_FILE))
+        self._saved_cursor = acked_seq
+
+    # -----------------------------
+    # Writing
+    # -----------------------------
+    def append(self, alert: dict) -> int:
+        """
+        Assigns the alert its journal_id / journal_seq and queues it
+        for the next group commit.
+        """
+        with self._lock:
+            self.last_seq += 1
+            alert["journal_id"] = self.journal_id
+            alert["journal_seq"] = self.last_seq
+            self._buffer.append(alert)
+            self.appended += 1
+            return self.last_seq
+
+    def commit(self):
+        """
+        Writes and fsyncs everything appended so far, rotating the
+        segment when it is full, and persists the delivery cursor.
+        Safe to call from any thread.
+        """
+        with self._commit_lock:
+            self._commit()
+
+    def _commit(self):
+        with self._lock:
+            buffered, self._buffer = self._buffer, []
+            acked = self.acked_seq
+
+        if buffered:
+            for alert in buffered:
+                line = json.dumps(alert, default=_json_default).encode() + b"\n"
+                self._file.write(line)
+                if self._file.tell() >= self.segment_bytes:
+                    self._sync()
+                    self._rotate(alert["journal_seq"] + 1)
+            self._sync()
+            self.commits += 1
+            self._keep_unsent(buffered)
+
+        if acked != self._saved_cursor:
+            self._save_cursor(acked)
+            self._prune()
+
+    def _keep_unsent(self, alerts: List[dict]):
+        # Live delivery is often acknowledged before the commit
+        with self._lock:
+            tail = self._tail
+            for alert in alerts:
+                seq = alert["journal_seq"]
+                if seq > self.acked_seq and seq not in self._acked_ahead:
+                    tail[seq] = alert
+            while len(tail) > self.max_tail:
+                seq, _ = tail.popitem(last=False)
+                self._disk_until = max(self._disk_until, seq)
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _rotate(self, next_seq: int):
+        self._file.close()
+        self._current_segment = os.path.join(self.directory, _segment_name(next_seq))
+        self._file = open(self._current_segment, "ab")
+        self._prune()
+
+    def _prune(self):
+        segments = list_segments(self.directory)
+        while len(segments) > self.max_segments:
+            # A segment ends where the next one starts
+            if _segment_first_seq(segments[1]) - 1 > self.acked_seq:
+                break
+            os.remove(segments.pop(0))
+
+    # -----------------------------
+    # Delivery tracking
+    # -----------------------------
+    def ack(self, seqs: Iterable[int]):
+        """
+        Marks alerts as delivered (or rejected for good) and advances
+        the cursor over every contiguous delivered seq.
+        """
+        with self._lock:
+            ahead = self._acked_ahead
+            for seq in seqs:
+                if seq > self.acked_seq:
+                    ahead.add(seq)
+                    self._tail.pop(seq, None)
+            while self.acked_seq + 1 in ahead:
+                self.acked_seq += 1
+                ahead.discard(self.acked_seq)
+
+    def has_pending(self) -> bool:
+        return self.acked_seq < self.last_seq
+
+    def pending(self, limit: int) -> List[dict]:
+        """
+        Up to `limit` committed alerts beyond the cursor that have not
+        been acknowledged, oldest first.
+        """
+        with self._lock:
+            after = self.acked_seq
+            disk_until = self._disk_until
+
+        result = []
+        if after < disk_until:
+            result = self._pending_on_disk(after, disk_until, limit)
+        if len(result) < limit:
+            with self._lock:
+                result.extend(islice(self._tail.values(), limit - len(result)))
+        return result
+
+    def _pending_on_disk(self, after: int, until: int, limit: int) -> List[dict]:
+        with self._lock:
+            skip = set(self._acked_ahead)
+
+        result = []
+        segments = list_segments(self.directory)
+        position = self._read_pos
+        if position is not None and position[0] == after and position[1] in segments:
+            segments = segments[segments.index(position[1]):]
+            offsets = {position[1]: position[2]}
+        else:
+            start = 0
+            for i, path in enumerate(segments):
+                if _segment_first_seq(path) <= after + 1:
+                    start = i
+            segments = segments[start:]
+            offsets = {}
+
+        for path in segments:
+            for offset, alert in _read_segment(path, offsets.get(path, 0)):
+                seq = alert["journal_seq"]
+                if seq > until:
+                    self._read_pos = None
+                    return result
+                if seq <= after or seq in skip:
+                    continue
+                result.append(alert)
+                if len(result) >= limit:
+                    self._read_pos = (seq, path, offset)
+                    return result
+        self._read_pos = None
+        return result
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="AlertJournal", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.commit_interval):
+            self.commit()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.commit()
+        self._file.close()
+        self._lock_file.close()
+
+    def stats(self) -> dict:
+        return {
+            "journal_id": self.journal_id,
+            "last_seq": self.last_seq,
+            "acked_seq": self.acked_seq,
+            "pending": self.last_seq - self.acked_seq - len(self._acked_ahead),
+            "in_memory": len(self._tail),
+            "segments": len(list_segments(self.directory)),
+            "commits": self.commits
+        }
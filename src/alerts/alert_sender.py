@@ -0,0 +1,335 @@
+import json
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+import requests
+
+from alerts.alert_journal import AlertJournal
+from utils.logger import setup_logger
+
+
+logger = setup_logger(
+    name="AlertSender",
+    log_file="data/logs/ids_alerts.log"
+)
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class _RetryableError(Exception):
+    """
+    Backend unreachable or answering 5xx: the batch is kept and retried.
+    """
+
+
+class AlertSender:
+    """
+    Delivers alerts to the backend from a background thread.
+
+    submit() only puts the alert on a bounded queue, so the detection
+    loop never waits on the network. The sender thread
+    - takes up to `batch_size` alerts, waiting at most `max_latency_ms`
+      after the first one for the batch to fill,
+    - sends them over one pooled keep-alive requests.Session, as one
+      POST to `batch_url` (POST /alerts/batch) when given, else one
+      POST per alert to `url` (also the fallback for backends without
+      the batch endpoint),
+    - on connection errors or 5xx responses keeps the batch and retries
+      with exponential backoff (`backoff` doubling up to `backoff_max`);
+      alerts rejected with 4xx are dropped and logged.
+
+    When the queue is full (backend down for long), `overflow_policy`
+    decides: "drop_oldest" discards the oldest queued alert,
+    "drop_newest" discards the new one, "block" waits up to
+    `block_timeout` seconds for room before dropping it.
+
+    With an AlertJournal, delivered alerts are acknowledged in it, and
+    whenever the queue is idle the sender replays journaled alerts that
+    were never acknowledged (dropped, abandoned, or left over from a
+    previous run). Replays can repeat an alert; the backend drops
+    duplicates by journal_seq.
+    """
+
+    def __init__(self, url: str, max_queue: int, batch_size: int,
+                 max_latency_ms: float, overflow_policy: str = "drop_oldest",
+                 batch_url: Optional[str] = None,
+                 backoff: float = 0.5, backoff_max: float = 30.0,
+                 timeout: float = 2.0, block_timeout: float = 1.0,
+                 session: Optional[requests.Session] = None,
+                 journal: Optional[AlertJournal] = None):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+
+        self.url = url
+        self.batch_url = batch_url
+        self.batch_size = batch_size
+        self.max_latency = max_latency_ms / 1000
+        self.overflow_policy = overflow_policy
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.block_timeout = block_timeout
+        self.journal = journal
+
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=max_queue)
+        self._session = session or requests.Session()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Latest-value payloads (e.g. engine status), keyed by URL
+        self._latest: Dict[str, dict] = {}
+        self._latest_lock = threading.Lock()
+
+        self.sent = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.retries = 0
+        self.batches = 0
+        self.replayed = 0
+
+    # -----------------------------
+    # Producer side
+    # -----------------------------
+    def submit(self, alert: dict) -> bool:
+        """
+        Queues an alert for delivery. Returns False if it was dropped.
+        """
+        try:
+            self._queue.put_nowait(alert)
+            return True
+        except queue.Full:
+            pass
+
+        if self.overflow_policy == "drop_oldest":
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(alert)
+                return True
+            except queue.Full:
+                pass
+        elif self.overflow_policy == "block":
+            try:
+                self._queue.put(alert, timeout=self.block_timeout)
+                return True
+            except queue.Full:
+                pass
+
+        self.dropped += 1
+        if self.dropped == 1 or self.dropped % 1000 == 0:
+            logger.warning(
+                f"Alert queue full ({self._queue.maxsize}); "
+                f"{self.dropped} alerts dropped so far"
+                + (" (kept in the journal for replay)" if self.journal else "")
+            )
+        return False
+
+    def post_latest(self, url: str, payload: dict):
+        """
+        Sends `payload` to `url` in the background. Only the newest
+        payload per URL is kept, so state reports never pile up.
+        """
+        with self._latest_lock:
+            self._latest[url] = payload
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="AlertSender", daemon=True
+        )
+        self._thread.start()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Waits until everything queued so far has been delivered (or
+        given up on). Returns False if `timeout` ran out first.
+        """
+        deadline = time.monotonic() + timeout
+        while not self._idle():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """
+        Delivers what it can within `timeout`, then stops the thread.
+        """
+        if self._thread is None:
+            return
+        delivered = self.flush(timeout)
+        self._stop.set()
+        self._thread.join(timeout=self.timeout + 1)
+        self._thread = None
+        self._session.close()
+
+        pending = self._queue.unfinished_tasks
+        if not delivered and pending:
+            logger.warning(f"Alert sender closed with {pending} alerts undelivered")
+
+    def _idle(self) -> bool:
+        # Queued alerts count as unfinished until their batch is done
+        return self._queue.unfinished_tasks == 0 and not self._latest
+
+    # -----------------------------
+    # Sender thread
+    # -----------------------------
+    def _run(self):
+        while not self._stop.is_set():
+            self._send_latest()
+            batch = self._next_batch()
+            if batch:
+                self._deliver(batch)
+            elif self.journal is not None and self.journal.has_pending():
+                self._replay()
+
+    def _replay(self):
+        batch = self.journal.pending(self.batch_size)
+        if batch:
+            self.replayed += len(batch)
+            self._deliver(batch, queued=False)
+
+    def _next_batch(self) -> List[dict]:
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_latency
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _deliver(self, batch: List[dict], queued: bool = True):
+        size = len(batch)
+        delay = self.backoff
+        while batch:
+            try:
+                sent = self._post_batch(batch)
+            except _RetryableError as e:
+                if self._stop.is_set():
+                    break
+                self.retries += 1
+                logger.error(f"Failed to send alerts to API: {e}; retrying in {delay:g}s")
+                if self._stop.wait(delay):
+                    break
+                delay = min(delay * 2, self.backoff_max)
+                continue
+            if self.journal is not None:
+                self.journal.ack(
+                    alert["journal_seq"] for alert in batch[:sent]
+                    if "journal_seq" in alert
+                )
+            batch = batch[sent:]
+
+        self.batches += 1
+        # Alerts left in `batch` (abandoned on close) stay unfinished,
+        # so close() can report them
+        if queued:
+            for _ in range(size - len(batch)):
+                self._queue.task_done()
+
+    def _post_batch(self, batch: List[dict]) -> int:
+        """
+        Posts the alerts and returns how many are done with (delivered
+        or rejected). Raises _RetryableError if none are.
+        """
+        if self.batch_url:
+            try:
+                result = self._post(self.batch_url, batch)
+            except requests.exceptions.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status not in (404, 405):
+                    self.rejected += len(batch)
+                    logger.warning(f"Backend rejected alert batch: {e}")
+                    return len(batch)
+                logger.warning("Backend has no batch endpoint; sending alerts one by one")
+                self.batch_url = None
+            else:
+                rejected = result.get("rejected", [])
+                self.sent += result.get("accepted", len(batch) - len(rejected))
+                if rejected:
+                    self.rejected += len(rejected)
+                    logger.warning(f"Backend rejected alerts: {rejected[:5]}")
+                return len(batch)
+
+        done = 0
+        for alert in batch:
+            try:
+                self._post(self.url, alert)
+                self.sent += 1
+            except _RetryableError:
+                if done:
+                    return done
+                raise
+            except requests.exceptions.HTTPError as e:
+                self.rejected += 1
+                logger.warning(f"Backend rejected alert: {e}")
+            done += 1
+        return done
+
+    def _post(self, url: str, payload) -> dict:
+        try:
+            response = self._session.post(
+                url,
+                data=json.dumps(payload, default=_json_default),
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout
+            )
+        except requests.exceptions.RequestException as e:
+            raise _RetryableError(str(e)) from None
+
+        if response.status_code >= 500:
+            raise _RetryableError(f"status {response.status_code}")
+        response.raise_for_status()
+        try:
+            return response.json()
+        except ValueError:
+            return {}
+
+    def _send_latest(self):
+        with self._latest_lock:
+            latest, self._latest = self._latest, {}
+        for url, payload in latest.items():
+            try:
+                self._post(url, payload)
+            except (_RetryableError, requests.exceptions.HTTPError) as e:
+                logger.error(f"Failed to report to {url}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "sent": self.sent,
+            "batches": self.batches,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "replayed": self.replayed
+        }
+
+
+def _json_default(obj):
+    # Decimal (and numpy scalars) from feature extraction
+    try:
+        return float(obj)
+    except (TypeError, ValueError):
+        raise TypeError(f"{type(obj).__name__} is not JSON serializable") from None
@@ -1,7 +1,10 @@
 import json
-import requests
+import os
 from decimal import Decimal
 from datetime import datetime
+from typing import Optional
+
+import requests
 
 
 class DecimalEncoder(json.JSONEncoder):
@@ -11,11 +14,22 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super().default(obj)
 
+from alerts.alert_journal import AlertJournal
+from alerts.alert_sender import AlertSender
 from utils.logger import setup_logger
-from config.settings import LOG_FILE_PATH
+from config.settings import (
+    LOG_FILE_PATH, ALERT_QUEUE_SIZE, ALERT_SEND_BATCH, ALERT_SEND_LATENCY_MS,
+    ALERT_OVERFLOW_POLICY, ALERT_RETRY_BACKOFF, ALERT_RETRY_BACKOFF_MAX,
+    JOURNAL_ENABLED, JOURNAL_DIR, JOURNAL_SEGMENT_BYTES,
+    JOURNAL_COMMIT_INTERVAL_MS, JOURNAL_MAX_SEGMENTS, JOURNAL_MEMORY_TAIL
+)
 
-# Backend API endpoint
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_JOURNAL_DIR = os.path.join(BASE_DIR, JOURNAL_DIR)
+
+# Backend API endpoints
 DEFAULT_API_URL = "http://127.0.0.1:8000/alerts"
+DEFAULT_STATUS_URL = "http://127.0.0.1:8000/engine/status"
 
 logger = setup_logger(
     name="AlertSystem",
@@ -32,20 +46,69 @@ class AlertSystem:
     IDS core logic and the SIEM/dashboard layer.
     """
 
-    def __init__(self, api_url: str = DEFAULT_API_URL):
+    def __init__(self, api_url: str = DEFAULT_API_URL,
+                 status_url: str = DEFAULT_STATUS_URL,
+                 journal_dir: Optional[str] = DEFAULT_JOURNAL_DIR if JOURNAL_ENABLED else None,
+                 session: Optional[requests.Session] = None):
+        """
+        `journal_dir=None` disables the journal; `session` replaces the
+        HTTP session the sender posts with (e.g. a stub in tests).
+        """
         self.api_url = api_url
+        self.status_url = status_url
+
+        # Durable copy of every alert, replayed if delivery fails
+        self.journal = None
+        if journal_dir:
+            self.journal = AlertJournal(
+                journal_dir,
+                JOURNAL_SEGMENT_BYTES,
+                JOURNAL_COMMIT_INTERVAL_MS,
+                JOURNAL_MAX_SEGMENTS,
+                JOURNAL_MEMORY_TAIL
+            )
+            self.journal.start()
+            if self.journal.has_pending():
+                logger.info(
+                    f"Alert journal has {self.journal.stats()['pending']} "
+                    f"undelivered alerts; replaying them to the backend"
+                )
+
+        # Delivery happens on the sender's thread (see AlertSender)
+        self.sender = AlertSender(
+            api_url,
+            ALERT_QUEUE_SIZE,
+            ALERT_SEND_BATCH,
+            ALERT_SEND_LATENCY_MS,
+            ALERT_OVERFLOW_POLICY,
+            batch_url=f"{api_url.rstrip('/')}/batch",
+            backoff=ALERT_RETRY_BACKOFF,
+            backoff_max=ALERT_RETRY_BACKOFF_MAX,
+            session=session,
+            journal=self.journal
+        )
+        self.sender.start()
         logger.info("Alert system initialized")
 
-    def generate_alert(self, threat: dict, features: dict) -> dict:
+    def generate_alert(self, threat: dict, features: dict,
+                       timestamp: Optional[float] = None) -> dict:
         """
         Generates a structured alert and:
         1. Logs it locally
         2. Sends it to FastAPI backend
         3. Returns alert object (future use)
+
+        `timestamp` (epoch seconds) overrides the alert time,
+        e.g. with the packet time during offline analysis.
         """
 
+        if timestamp is None:
+            alert_time = datetime.utcnow()
+        else:
+            alert_time = datetime.utcfromtimestamp(timestamp)
+
         alert = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": alert_time.isoformat(),
 
             # Detection metadata
             "alert_type": threat.get("type"),            # signature / anomaly
@@ -74,14 +137,53 @@ class AlertSystem:
             }
         }
 
-        # 1️⃣ Log locally
+        # Summary of detections collapsed by AlertSuppressor
+        if "hit_count" in threat:
+            alert["hit_count"] = threat["hit_count"]
+            alert["summary"] = threat.get("summary")
+
+        # 1️⃣ Journal (numbers the alert) and log locally
+        if self.journal is not None:
+            self.journal.append(alert)
         self._log_alert(alert)
 
-        # 2️⃣ Send to API
+        # 2️⃣ Queue for the API (sent in the background)
         self._send_to_api(alert)
 
         return alert
 
+    def report_engine_status(self, status: dict):
+        """
+        Publishes the active rule set / model versions
+        (DetectionEngine.active_versions) to the backend.
+        """
+        self.sender.post_latest(self.status_url, status)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Waits (up to `timeout`) for queued alerts to be delivered.
+        """
+        delivered = self.sender.flush(timeout)
+        if self.journal is not None:
+            self.journal.commit()
+        logger.info(f"Alert delivery: {self._delivery_stats()}")
+        return delivered
+
+    def close(self, timeout: float = 5.0):
+        """
+        Delivers queued alerts (up to `timeout`) and stops the sender.
+        """
+        self.sender.close(timeout)
+        if self.journal is not None:
+            self.journal.close()
+        logger.info(f"Alert delivery: {self._delivery_stats()}")
+
+    def _delivery_stats(self) -> dict:
+        stats = self.sender.stats()
+        if self.journal is not None:
+            stats["journal"] = self.journal.stats()
+        return stats
+
     # -------------------------------------------------
     # Internal helpers
     # -------------------------------------------------
@@ -102,23 +204,7 @@ class AlertSystem:
 
     def _send_to_api(self, alert: dict):
         """
-        Sends alert to FastAPI backend.
-        Fails gracefully if API is unreachable.
+        Hands the alert to the background sender; never blocks on
+        the network. Delivery failures are retried and logged there.
         """
-        try:
-            response = requests.post(
-                self.api_url,
-                data=json.dumps(alert, cls=DecimalEncoder),
-                headers={"Content-Type": "application/json"},
-                timeout=2
-            )
-
-            if response.status_code == 200:
-                logger.info("Alert successfully sent to backend API")
-            else:
-                logger.warning(
-                    f"Backend API responded with status {response.status_code}"
-                )
-
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to send alert to API: {e}")
+        self.sender.submit(alert)
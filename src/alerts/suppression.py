@@ -0,0 +1,164 @@
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+
+# Which endpoint fields identify the "same" attack for each key mode
+SUPPRESSION_KEYS = {
+    "flow": ("src_ip", "dst_ip", "src_port", "dst_port"),
+    "source": ("src_ip",),
+    "destination": ("dst_ip",),
+}
+
+
+class _Window:
+    __slots__ = ("end", "hits", "threat", "features", "timestamp")
+
+    def __init__(self, end: float, threat: dict, features: dict,
+                 timestamp: Optional[float]):
+        self.end = end
+        self.hits = 0
+        self.threat = threat
+        self.features = features
+        self.timestamp = timestamp
+
+
+class AlertSuppressor:
+    """
+    Collapses repeated detections into one alert per cooldown window.
+
+    Detections are keyed on the rule name plus the flow, source or
+    destination (per rule "suppress_by", else `default_key`):
+
+    - the first hit for a key is alerted immediately;
+    - later hits within `cooldown` seconds are only counted;
+    - when a window closes with counted hits, one summary alert is
+      emitted carrying hit_count and a summary such as
+      "syn_flood ×4,312 in 10s", and the next window starts;
+    - a window that closes with no hits forgets the key, so the next
+      hit is alerted immediately again.
+
+    At most `max_keys` keys are tracked; the oldest window is dropped
+    first (its summary is emitted early rather than lost).
+
+    Time comes from the detection timestamp when one is given
+    (offline analysis), else from `clock`.
+    """
+
+    def __init__(self, cooldown: float, max_keys: int, default_key: str = "flow",
+                 clock: Callable[[], float] = time.time):
+        if default_key not in SUPPRESSION_KEYS:
+            raise ValueError(f"Unknown suppression key: {default_key}")
+
+        self.cooldown = cooldown
+        self.max_keys = max_keys
+        self.default_key = default_key
+        self._clock = clock
+
+        # Ordered by window start, which is also window end order
+        self._windows: "OrderedDict[tuple, _Window]" = OrderedDict()
+
+        self.passed = 0
+        self.suppressed = 0
+        self.summaries = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def key_for(self, threat: dict, features: dict) -> tuple:
+        fields = SUPPRESSION_KEYS.get(threat.get("suppress_by"), None)
+        if fields is None:
+            fields = SUPPRESSION_KEYS[self.default_key]
+        rule = threat.get("name") or threat.get("type")
+        return (rule,) + tuple(features.get(field) for field in fields)
+
+    # -----------------------------
+    # Filtering
+    # -----------------------------
+    def filter(self, threat: dict, features: dict,
+               timestamp: Optional[float] = None) -> List[Tuple[dict, dict, Optional[float]]]:
+        """
+        Returns the (threat, features, timestamp) alerts to send now:
+        this detection if it is the first of its window, plus any
+        summaries of windows that have closed.
+        """
+        if self.cooldown <= 0:
+            self.passed += 1
+            return [(threat, features, timestamp)]
+
+        now = self._clock() if timestamp is None else timestamp
+        ready = self.flush_due(now)
+
+        key = self.key_for(threat, features)
+        window = self._windows.get(key)
+        if window is not None:
+            window.hits += 1
+            window.threat = threat
+            window.features = features
+            window.timestamp = timestamp
+            self.suppressed += 1
+            return ready
+
+        if len(self._windows) >= self.max_keys:
+            _, oldest = self._windows.popitem(last=False)
+            self.evicted += 1
+            ready.extend(self._summary(oldest))
+
+        self._windows[key] = _Window(now + self.cooldown, threat, features, timestamp)
+        self.passed += 1
+        ready.append((threat, features, timestamp))
+        return ready
+
+    def flush_due(self, now: Optional[float] = None) -> List[Tuple[dict, dict, Optional[float]]]:
+        """
+        Closes windows that ended by `now` and returns their summaries.
+        """
+        if now is None:
+            now = self._clock()
+
+        ready = []
+        windows = self._windows
+        while windows:
+            key, window = next(iter(windows.items()))
+            if window.end > now:
+                break
+            del windows[key]
+            if window.hits:
+                ready.extend(self._summary(window))
+                # Still active: keep counting in a fresh window
+                window.end = now + self.cooldown
+                window.hits = 0
+                windows[key] = window
+        return ready
+
+    def flush_all(self) -> List[Tuple[dict, dict, Optional[float]]]:
+        """
+        Emits summaries for every open window and forgets all keys
+        (e.g. at the end of a capture).
+        """
+        ready = []
+        for window in self._windows.values():
+            ready.extend(self._summary(window))
+        self._windows.clear()
+        return ready
+
+    def _summary(self, window: _Window) -> List[Tuple[dict, dict, Optional[float]]]:
+        if not window.hits:
+            return []
+        self.summaries += 1
+
+        threat = dict(window.threat)
+        rule = threat.get("name") or threat.get("type")
+        threat["hit_count"] = window.hits
+        threat["summary"] = f"{rule} ×{window.hits:,} in {self.cooldown:g}s"
+        return [(threat, window.features, window.timestamp)]
+
+    def stats(self) -> dict:
+        return {
+            "tracked_keys": len(self._windows),
+            "passed": self.passed,
+            "suppressed": self.suppressed,
+            "summaries": self.summaries,
+            "evicted": self.evicted
+        }
@@ -0,0 +1,179 @@
+import sys
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+
+# Approximate per-entry cost of an OrderedDict slot (hash table entry
+# plus the linked-list node that tracks ordering)
+_ODICT_ENTRY_OVERHEAD = 104
+
+
+class FlowRecord:
+    """
+    Per-flow counters. Uses __slots__ so each flow costs a small
+    fixed-size object instead of a dict with string keys.
+
+    The anomaly_* / score_* fields hold the cached anomaly verdict
+    used by per-flow scoring (see detection.flow_scoring).
+    """
+    __slots__ = (
+        "key", "packet_count", "byte_count", "start_time", "last_time",
+        "rates", "anomaly_vector", "anomaly_score", "score_key", "scored_at"
+    )
+
+    def __init__(self, key, start_time: float):
+        self.key = key
+        self.packet_count = 0
+        self.byte_count = 0
+        self.start_time = start_time
+        self.last_time = start_time
+        self.rates = None
+        self.anomaly_vector = None
+        self.anomaly_score = None
+        self.score_key = None
+        self.scored_at = 0
+
+
+class FlowTable:
+    """
+    Bounded flow table with idle and active timeouts.
+
+    Flows are kept in least-recently-seen order. Each lookup moves
+    the flow to the back and checks a few flows at the front for
+    idle expiry, so expiry costs amortized O(1) per packet without a
+    separate sweeper thread. When the table is full the least
+    recently seen flow is evicted.
+
+    - idle timeout   : flow removed after this many seconds without packets
+    - active timeout : long-lived flow is expired and restarted, so its
+                       counters describe at most this many seconds
+    """
+
+    def __init__(self, max_entries: int, idle_timeout: float,
+                 active_timeout: float, sweep_batch: int = 8):
+        self.max_entries = max_entries
+        self.idle_timeout = idle_timeout
+        self.active_timeout = active_timeout
+        self.sweep_batch = sweep_batch
+
+        self._flows: "OrderedDict[tuple, FlowRecord]" = OrderedDict()
+        self._listeners: List[Callable[[FlowRecord, str], None]] = []
+        self.evicted = {"idle": 0, "active": 0, "capacity": 0, "flush": 0}
+        self._entry_size: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._flows)
+
+    def __contains__(self, key) -> bool:
+        return key in self._flows
+
+    def get(self, key) -> Optional[FlowRecord]:
+        return self._flows.get(key)
+
+    def add_expiry_listener(self, listener: Callable[[FlowRecord, str], None]):
+        """
+        Registers a callback invoked as listener(record, reason)
+        whenever a flow leaves the table.
+        """
+        self._listeners.append(listener)
+
+    # -----------------------------
+    # Lookup / update
+    # -----------------------------
+    def touch(self, key, now: float) -> FlowRecord:
+        """
+        Returns the record for `key`, creating it if needed,
+        and marks it as most recently seen.
+        """
+        flows = self._flows
+        self._sweep(now)
+        flow = flows.get(key)
+
+        if flow is not None:
+            if now - flow.last_time > self.idle_timeout:
+                self._expire(key, "idle")
+                flow = None
+            elif now - flow.start_time > self.active_timeout:
+                self._expire(key, "active")
+                flow = None
+
+        if flow is None:
+            if len(flows) >= self.max_entries:
+                oldest_key = next(iter(flows))
+                self._expire(oldest_key, "capacity")
+            flow = FlowRecord(key, now)
+            flows[key] = flow
+        else:
+            flows.move_to_end(key)
+            flow.last_time = now
+
+        return flow
+
+    def expire_all(self):
+        """
+        Expires every flow (e.g. at shutdown or end of a PCAP).
+        """
+        for key in list(self._flows):
+            self._expire(key, "flush")
+
+    def _sweep(self, now: float):
+        flows = self._flows
+        deadline = now - self.idle_timeout
+
+        for _ in range(self.sweep_batch):
+            if not flows:
+                return
+            key, flow = next(iter(flows.items()))
+            if flow.last_time >= deadline:
+                return
+            self._expire(key, "idle")
+
+    def _expire(self, key, reason: str):
+        flow = self._flows.pop(key)
+        self.evicted[reason] += 1
+        for listener in self._listeners:
+            listener(flow, reason)
+
+    # -----------------------------
+    # Reporting
+    # -----------------------------
+    def _estimate_entry_size(self, flow: FlowRecord) -> int:
+        size = sys.getsizeof(flow) + sys.getsizeof(flow.key) + _ODICT_ENTRY_OVERHEAD
+        size += sum(sys.getsizeof(part) for part in flow.key)
+        if flow.rates is not None:
+            size += _slotted_size(flow.rates)
+        return size
+
+    def approx_memory_bytes(self) -> int:
+        # Measured on the newest flow once the analyzer has attached its
+        # rate windows (they are added after touch() returns)
+        if self._entry_size is None and self._flows:
+            flow = next(reversed(self._flows.values()))
+            if flow.rates is None:
+                return len(self._flows) * self._estimate_entry_size(flow)
+            self._entry_size = self._estimate_entry_size(flow)
+        return len(self._flows) * (self._entry_size or 0)
+
+    def stats(self) -> dict:
+        return {
+            "live_flows": len(self._flows),
+            "evicted_idle": self.evicted["idle"],
+            "evicted_active": self.evicted["active"],
+            "evicted_capacity": self.evicted["capacity"],
+            "flushed": self.evicted["flush"],
+            "approx_memory_bytes": self.approx_memory_bytes()
+        }
+
+
+def _slotted_size(obj) -> int:
+    """
+    Size of a __slots__ object and its attribute containers
+    (including the items of list attributes).
+    """
+    size = sys.getsizeof(obj)
+    for name in obj.__slots__:
+        value = getattr(obj, name)
+        size += sys.getsizeof(value)
+        if isinstance(value, list):
+            size += sum(sys.getsizeof(item) for item in value)
+    return size
@@ -0,0 +1,240 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from analysis.sketches import CountMinSketch, HyperLogLog, hash64
+
+
+_TCP_SYN = 0x02
+_TCP_ACK = 0x10
+
+
+class _SourceState:
+    __slots__ = ("epoch", "dst_ports", "dst_hosts")
+
+    def __init__(self, epoch: int, precision: int):
+        self.epoch = epoch
+        self.dst_ports = HyperLogLog(precision)
+        self.dst_hosts = HyperLogLog(precision)
+
+
+class _DestinationState:
+    __slots__ = ("epoch", "src_hosts")
+
+    def __init__(self, epoch: int, precision: int):
+        self.epoch = epoch
+        self.src_hosts = HyperLogLog(precision)
+
+
+class HostAggregates:
+    """
+    Per-source and per-destination aggregates over tumbling windows,
+    for detecting scans and fan-out that are invisible per flow.
+
+    - Distinct counts (ports, hosts) use one HyperLogLog per host,
+      so a scan of millions of ports costs the same fixed registers.
+    - SYN counts use shared count-min sketches (one for sources,
+      one for destinations), plus a small candidate set of the
+      heaviest SYN sources.
+    - The number of tracked hosts is capped; the least recently
+      seen host is dropped first.
+    - Windows only move forward: a late packet from an earlier
+      window is counted in the current one.
+
+    Several instances that each see the traffic of disjoint sources
+    (sharded mode) can share destination counts: destination_changes()
+    reports this instance's counts and add_remote_destinations() adds
+    the others', which are then included in the dst_* features.
+
+    Features added per packet: see FEATURES.
+    """
+
+    FEATURES = (
+        "src_distinct_dst_ports",
+        "src_distinct_dst_hosts",
+        "src_syn_count",
+        "dst_distinct_src_hosts",
+        "dst_syn_count"
+    )
+
+    def __init__(self, window: float, max_hosts: int, precision: int,
+                 cms_width: int, cms_depth: int, heavy_hitters: int = 32):
+        self.window = window
+        self.max_hosts = max_hosts
+        self.precision = precision
+        self.heavy_hitter_capacity = heavy_hitters
+
+        self._sources: "OrderedDict[str, _SourceState]" = OrderedDict()
+        self._destinations: "OrderedDict[str, _DestinationState]" = OrderedDict()
+        self._src_syn = CountMinSketch(cms_width, cms_depth)
+        self._dst_syn = CountMinSketch(cms_width, cms_depth)
+        self._top_syn_sources: Dict[str, int] = {}
+        self._epoch = None
+
+        # Destination sharing (see track_destination_changes)
+        self._changed: Optional[Set[str]] = None
+        self._remote: Dict[str, list] = {}
+        self._remote_epoch = None
+
+    # -----------------------------
+    # Update
+    # -----------------------------
+    def update(self, header) -> Tuple[int, ...]:
+        """
+        Folds one packet into the aggregates and returns the current
+        aggregate features for its source and destination, in the
+        order of FEATURES.
+        """
+        epoch = int(header.timestamp // self.window)
+        if self._epoch is None or epoch > self._epoch:
+            self._start_epoch(epoch)
+        else:
+            epoch = self._epoch
+
+        src = self._source(header.src_ip, epoch)
+        dst = self._destination(header.dst_ip, epoch)
+
+        src_hash = hash64(header.src_ip)
+        dst_hash = hash64(header.dst_ip)
+
+        src.dst_ports.add_hash(hash64(header.dst_port))
+        src.dst_hosts.add_hash(dst_hash)
+        dst.src_hosts.add_hash(src_hash)
+
+        if header.tcp_flags & (_TCP_SYN | _TCP_ACK) == _TCP_SYN:
+            src_syn = self._src_syn.add_hash(src_hash)
+            dst_syn = self._dst_syn.add_hash(dst_hash)
+            self._track_heavy_hitter(header.src_ip, src_syn)
+        else:
+            src_syn = self._src_syn.estimate_hash(src_hash)
+            dst_syn = self._dst_syn.estimate_hash(dst_hash)
+
+        dst_hosts = dst.src_hosts.count()
+        if self._changed is not None:
+            self._changed.add(header.dst_ip)
+            if self._remote_epoch == epoch:
+                remote = self._remote.get(header.dst_ip)
+                if remote is not None:
+                    dst_hosts += remote[0]
+                    dst_syn += remote[1]
+
+        return (
+            src.dst_ports.count(),
+            src.dst_hosts.count(),
+            src_syn,
+            dst_hosts,
+            dst_syn
+        )
+
+    def _start_epoch(self, epoch: int):
+        # Per-host sketches are reset lazily when next touched
+        self._epoch = epoch
+        self._src_syn.clear()
+        self._dst_syn.clear()
+        self._top_syn_sources.clear()
+        if self._changed is not None:
+            self._changed = set()
+
+    def _source(self, ip: str, epoch: int) -> _SourceState:
+        state = self._sources.get(ip)
+        if state is None:
+            if len(self._sources) >= self.max_hosts:
+                self._sources.popitem(last=False)
+            state = _SourceState(epoch, self.precision)
+            self._sources[ip] = state
+        else:
+            self._sources.move_to_end(ip)
+            if state.epoch != epoch:
+                state.epoch = epoch
+                state.dst_ports.clear()
+                state.dst_hosts.clear()
+        return state
+
+    def _destination(self, ip: str, epoch: int) -> _DestinationState:
+        state = self._destinations.get(ip)
+        if state is None:
+            if len(self._destinations) >= self.max_hosts:
+                self._destinations.popitem(last=False)
+            state = _DestinationState(epoch, self.precision)
+            self._destinations[ip] = state
+        else:
+            self._destinations.move_to_end(ip)
+            if state.epoch != epoch:
+                state.epoch = epoch
+                state.src_hosts.clear()
+        return state
+
+    def _track_heavy_hitter(self, ip: str, estimate: int):
+        top = self._top_syn_sources
+        if ip in top or len(top) < self.heavy_hitter_capacity:
+            top[ip] = estimate
+            return
+
+        smallest = min(top, key=top.get)
+        if estimate > top[smallest]:
+            del top[smallest]
+            top[ip] = estimate
+
+    # -----------------------------
+    # Destination sharing
+    # -----------------------------
+    def track_destination_changes(self):
+        """
+        Starts recording which destinations each packet touched,
+        for destination_changes().
+        """
+        if self._changed is None:
+            self._changed = set()
+
+    def destination_changes(self) -> Tuple[Optional[int], Dict[str, Tuple[int, int]]]:
+        """
+        Returns (window, {destination: (distinct sources, SYN count)})
+        for the destinations touched since the last call, counting
+        only this instance's own packets.
+        """
+        changed, self._changed = self._changed or set(), set()
+        counts = {}
+        for ip in changed:
+            state = self._destinations.get(ip)
+            if state is not None and state.epoch == self._epoch:
+                counts[ip] = (state.src_hosts.count(), self._dst_syn.estimate(ip))
+        return self._epoch, counts
+
+    def add_remote_destinations(self, epoch: int, deltas: Dict[str, Tuple[int, int]]):
+        """
+        Adds changes in other instances' destination counts for window
+        `epoch`. Counts of an older window are dropped.
+        """
+        if self._remote_epoch is None or epoch > self._remote_epoch:
+            self._remote_epoch = epoch
+            self._remote = {}
+        elif epoch < self._remote_epoch:
+            return
+
+        remote = self._remote
+        for ip, (hosts, syn) in deltas.items():
+            counts = remote.get(ip)
+            if counts is None:
+                remote[ip] = [hosts, syn]
+            else:
+                counts[0] += hosts
+                counts[1] += syn
+
+    # -----------------------------
+    # Reporting
+    # -----------------------------
+    def top_syn_sources(self, k: int = 10) -> List[Tuple[str, int]]:
+        """
+        Returns the heaviest SYN senders of the current window.
+        """
+        return sorted(
+            self._top_syn_sources.items(), key=lambda item: item[1], reverse=True
+        )[:k]
+
+    def approx_memory_bytes(self) -> int:
+        hll = 1 << self.precision
+        return (
+            len(self._sources) * 2 * hll
+            + len(self._destinations) * hll
+            + self._src_syn.memory_bytes()
+            + self._dst_syn.memory_bytes()
+        )
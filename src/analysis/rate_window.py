@@ -0,0 +1,85 @@
+from array import array
+from operator import truediv
+from typing import Sequence, Tuple
+
+
+class RateWindowSpec:
+    """
+    Shared configuration for per-flow sliding-window counters.
+
+    Each window of W seconds is split into B buckets of W/B seconds.
+    Feature names are derived from the window length, e.g.
+    `packet_rate_10s` / `byte_rate_10s`.
+    """
+
+    def __init__(self, windows: Sequence[float], buckets: int):
+        if buckets < 1:
+            raise ValueError("Rate windows need at least one bucket")
+
+        self.windows = tuple(float(w) for w in windows)
+        self.buckets = buckets
+        self.widths = tuple(w / buckets for w in self.windows)
+        self.feature_names = tuple(
+            (f"packet_rate_{w:g}s", f"byte_rate_{w:g}s") for w in self.windows
+        )
+        # Flat order matching RateWindows.values()
+        self.flat_feature_names = tuple(
+            name for pair in self.feature_names for name in pair
+        )
+        self.divisors = tuple(w for w in self.windows for _ in range(2))
+
+
+class RateWindows:
+    """
+    Time-bucketed ring counters of packets and bytes for one flow.
+
+    Updating costs O(windows × buckets) in the worst case (a long
+    gap clears every bucket) and O(windows) otherwise; nothing grows
+    with the number of packets. Running sums make reads O(1).
+    """
+    __slots__ = ("_heads", "_buckets", "_sums")
+
+    def __init__(self, spec: RateWindowSpec):
+        n = len(spec.windows)
+        self._heads = [-1] * n
+        # Layout: [window][bucket][packets, bytes]
+        self._buckets = array("d", bytes(8 * n * spec.buckets * 2))
+        self._sums = [0.0] * (2 * n)
+
+    def add(self, spec: RateWindowSpec, now: float, length: int):
+        buckets = self._buckets
+        sums = self._sums
+        heads = self._heads
+        size = spec.buckets
+
+        for w, width in enumerate(spec.widths):
+            slot = int(now // width)
+            head = heads[w]
+            base = w * size * 2
+
+            if slot > head:
+                if head >= 0:
+                    # Clear buckets that slid out of the window
+                    for step in range(1, min(slot - head, size) + 1):
+                        i = base + ((head + step) % size) * 2
+                        sums[2 * w] -= buckets[i]
+                        sums[2 * w + 1] -= buckets[i + 1]
+                        buckets[i] = 0.0
+                        buckets[i + 1] = 0.0
+                heads[w] = slot
+            elif slot <= head - size:
+                # Out-of-order packet older than the whole window
+                continue
+
+            i = base + (slot % size) * 2
+            buckets[i] += 1
+            buckets[i + 1] += length
+            sums[2 * w] += 1
+            sums[2 * w + 1] += length
+
+    def values(self, spec: RateWindowSpec) -> Tuple[float, ...]:
+        """
+        Returns (packets/sec, bytes/sec) for each window, flattened
+        in the order of spec.flat_feature_names.
+        """
+        return tuple(map(truediv, self._sums, spec.divisors))
@@ -0,0 +1,120 @@
+import math
+from array import array
+from hashlib import blake2b
+
+
+def hash64(value) -> int:
+    """
+    Stable 64-bit hash (unlike hash(), identical across processes
+    and well mixed for small integers such as port numbers).
+    """
+    return int.from_bytes(
+        blake2b(str(value).encode(), digest_size=8).digest(), "little"
+    )
+
+
+class HyperLogLog:
+    """
+    Distinct-count estimator using 2^precision one-byte registers.
+
+    The harmonic sum of the registers is maintained incrementally,
+    so both add() and count() are O(1).
+    Relative error is about 1.04 / sqrt(2^precision).
+    """
+    __slots__ = ("precision", "_registers", "_inverse_sum", "_zeros")
+
+    def __init__(self, precision: int = 10):
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16")
+
+        m = 1 << precision
+        self.precision = precision
+        self._registers = bytearray(m)
+        self._inverse_sum = float(m)
+        self._zeros = m
+
+    def add_hash(self, h: int):
+        p = self.precision
+        index = h & ((1 << p) - 1)
+        rank = (64 - p) - (h >> p).bit_length() + 1
+
+        old = self._registers[index]
+        if rank > old:
+            self._registers[index] = rank
+            self._inverse_sum += 2.0 ** -rank - 2.0 ** -old
+            if old == 0:
+                self._zeros -= 1
+
+    def add(self, value):
+        self.add_hash(hash64(value))
+
+    def count(self) -> int:
+        m = len(self._registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / self._inverse_sum
+
+        # Linear counting is more accurate for small cardinalities
+        if estimate <= 2.5 * m and self._zeros:
+            estimate = m * math.log(m / self._zeros)
+        return int(round(estimate))
+
+    def clear(self):
+        m = len(self._registers)
+        self._registers = bytearray(m)
+        self._inverse_sum = float(m)
+        self._zeros = m
+
+    def memory_bytes(self) -> int:
+        return len(self._registers)
+
+
+class CountMinSketch:
+    """
+    Frequency estimator with fixed memory (depth × width counters).
+
+    Estimates never undercount; overcounting is bounded by
+    about 2/width of the total count with high probability.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self._table = array("q", bytes(8 * width * depth))
+
+    def _indexes(self, h: int):
+        # Double hashing: derive `depth` indexes from one 64-bit hash
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        width = self.width
+        return [
+            row * width + (h1 + row * h2) % width
+            for row in range(self.depth)
+        ]
+
+    def add_hash(self, h: int, count: int = 1) -> int:
+        """
+        Adds `count` and returns the updated estimate.
+        """
+        table = self._table
+        estimate = None
+        for i in self._indexes(h):
+            table[i] += count
+            if estimate is None or table[i] < estimate:
+                estimate = table[i]
+        return estimate or 0
+
+    def add(self, key, count: int = 1) -> int:
+        return self.add_hash(hash64(key), count)
+
+    def estimate_hash(self, h: int) -> int:
+        table = self._table
+        return min(table[i] for i in self._indexes(h))
+
+    def estimate(self, key) -> int:
+        return self.estimate_hash(hash64(key))
+
+    def clear(self):
+        self._table = array("q", bytes(8 * self.width * self.depth))
+
+    def memory_bytes(self) -> int:
+        return self._table.itemsize * len(self._table)
@@ -1,5 +1,19 @@
-from collections import defaultdict
-from config.settings import MIN_FLOW_DURATION
+import logging
+from typing import Iterable
+
+import numpy as np
+
+from analysis.flow_table import FlowTable
+from analysis.host_aggregates import HostAggregates
+from analysis.rate_window import RateWindowSpec, RateWindows
+from capture.packet_decoder import PacketHeader, header_from_scapy, tcp_flags_to_str
+from config.settings import (
+    MIN_FLOW_DURATION, FLOW_TABLE_MAX_ENTRIES,
+    FLOW_IDLE_TIMEOUT, FLOW_ACTIVE_TIMEOUT,
+    RATE_WINDOWS, RATE_WINDOW_BUCKETS,
+    AGGREGATE_WINDOW, AGGREGATE_MAX_HOSTS, HLL_PRECISION,
+    CMS_WIDTH, CMS_DEPTH
+)
 from utils.logger import setup_logger
 
 
@@ -9,60 +23,146 @@ logger = setup_logger(
 )
 
 
+# Per-packet fields that precede the window and aggregate features
+BASE_FEATURE_FIELDS = [
+    ("timestamp", "f8"),
+    ("src_ip", "U15"),
+    ("dst_ip", "U15"),
+    ("src_port", "u2"),
+    ("dst_port", "u2"),
+    ("packet_size", "u4"),
+    ("packet_rate", "f8"),
+    ("byte_rate", "f8"),
+    ("tcp_flags", "u2"),
+    ("flow_packets", "u8"),     # packets of the flow so far, this one included
+]
+
+
 class TrafficAnalyzer:
     """
     Analyzes packets and extracts flow-based features
     used by detection engines.
+
+    Besides the since-flow-start averages (packet_rate, byte_rate),
+    each flow keeps sliding-window counters that are exposed as
+    packet_rate_<W>s / byte_rate_<W>s for every window in RATE_WINDOWS.
+    Per-host scan / fan-out aggregates come from HostAggregates.
+
+    analyze_batch() returns a NumPy structured array (one row per
+    packet, tcp_flags as an integer bitmask); analyze() is the
+    per-packet dict wrapper around the same extraction.
+
+    The FlowRecord of the last analyzed packet is available as
+    current_flow, and analyze_batch() leaves the record of every row
+    in batch_flows (used for per-flow anomaly scoring).
     """
 
     def __init__(self):
-        self.flows = defaultdict(lambda: {
-            "packet_count": 0,
-            "byte_count": 0,
-            "start_time": None,
-            "last_time": None
-        })
+        self.flows = FlowTable(
+            max_entries=FLOW_TABLE_MAX_ENTRIES,
+            idle_timeout=FLOW_IDLE_TIMEOUT,
+            active_timeout=FLOW_ACTIVE_TIMEOUT
+        )
+        self.rate_spec = RateWindowSpec(RATE_WINDOWS, RATE_WINDOW_BUCKETS)
+        self.host_aggregates = HostAggregates(
+            window=AGGREGATE_WINDOW,
+            max_hosts=AGGREGATE_MAX_HOSTS,
+            precision=HLL_PRECISION,
+            cms_width=CMS_WIDTH,
+            cms_depth=CMS_DEPTH
+        )
+
+        self.feature_dtype = np.dtype(
+            BASE_FEATURE_FIELDS
+            + [(name, "f8") for name in self.rate_spec.flat_feature_names]
+            + [(name, "i8") for name in HostAggregates.FEATURES]
+        )
+        # Dict keys exclude the leading timestamp
+        self._dict_keys = self.feature_dtype.names[1:]
+
+        self.current_flow = None
+        self.batch_flows = []
 
     def analyze(self, packet):
         """
         Processes a packet and returns extracted features.
+
+        Accepts either a decoded PacketHeader (fast path)
+        or a dissected Scapy packet.
         """
 
-        ip = packet["IP"]
-        tcp = packet["TCP"]
+        header = packet if isinstance(packet, PacketHeader) else header_from_scapy(packet)
+        row = self._extract(header)
 
+        features = dict(zip(self._dict_keys, row[1:]))
+        features["tcp_flags"] = tcp_flags_to_str(header.tcp_flags)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Extracted features: %s", features)
+        return features
+
+    def analyze_batch(self, headers: Iterable[PacketHeader]) -> np.ndarray:
+        """
+        Processes a batch of decoded headers and returns their
+        features as a structured array with dtype `feature_dtype`.
+        Columns are available as result["packet_rate"] etc.
+        """
+        extract = self._extract
+        rows = []
+        flows = []
+        for h in headers:
+            rows.append(extract(h if isinstance(h, PacketHeader) else header_from_scapy(h)))
+            flows.append(self.current_flow)
+
+        self.batch_flows = flows
+        return np.array(rows, dtype=self.feature_dtype)
+
+    def features_from_row(self, row) -> dict:
+        """
+        Converts one analyze_batch() row into the analyze() dict form
+        (e.g. for alerting on the few rows that matched).
+        """
+        features = dict(zip(self._dict_keys, row.item()[1:]))
+        features["tcp_flags"] = tcp_flags_to_str(int(row["tcp_flags"]))
+        return features
+
+    def _extract(self, header: PacketHeader) -> tuple:
+        """
+        Updates flow and host state for one packet and returns
+        its feature row in `feature_dtype` order.
+        """
         flow_key = (
-            ip.src,
-            ip.dst,
-            tcp.sport,
-            tcp.dport
+            header.src_ip,
+            header.dst_ip,
+            header.src_port,
+            header.dst_port
         )
 
-        flow = self.flows[flow_key]
-        current_time = packet.time
+        current_time = header.timestamp
+        flow = self.flows.touch(flow_key, current_time)
+        self.current_flow = flow
 
-        if flow["start_time"] is None:
-            flow["start_time"] = current_time
+        flow.packet_count += 1
+        flow.byte_count += header.length
 
-        flow["packet_count"] += 1
-        flow["byte_count"] += len(packet)
-        flow["last_time"] = current_time
+        if flow.rates is None:
+            flow.rates = RateWindows(self.rate_spec)
+        flow.rates.add(self.rate_spec, current_time, header.length)
 
         duration = max(
-            flow["last_time"] - flow["start_time"],
+            flow.last_time - flow.start_time,
             MIN_FLOW_DURATION
         )
 
-        features = {
-            "src_ip": ip.src,
-            "dst_ip": ip.dst,
-            "src_port": tcp.sport,
-            "dst_port": tcp.dport,
-            "packet_size": len(packet),
-            "packet_rate": flow["packet_count"] / duration,
-            "byte_rate": flow["byte_count"] / duration,
-            "tcp_flags": str(tcp.flags)
-        }
-
-        logger.debug(f"Extracted features: {features}")
-        return features
+        return (
+            current_time,
+            header.src_ip,
+            header.dst_ip,
+            header.src_port,
+            header.dst_port,
+            header.length,
+            flow.packet_count / duration,
+            flow.byte_count / duration,
+            header.tcp_flags,
+            flow.packet_count,
+        ) + flow.rates.values(self.rate_spec) + self.host_aggregates.update(header)
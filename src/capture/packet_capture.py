@@ -1,10 +1,17 @@
-from scapy.all import sniff, IP, TCP  # type: ignore[import-untyped]
+from scapy.all import sniff, conf, Ether  # type: ignore[import-untyped]
 import threading
-import queue
 import platform
+import time
 from typing import Optional
 
-from config.settings import PACKET_QUEUE_SIZE, MAX_CAPTURE_PACKETS, check_capture_backend
+from capture.packet_decoder import (
+    LINKTYPE_ETHERNET, decode_frame, header_from_scapy
+)
+from capture.ring_buffer import PacketRingBuffer
+from config.settings import (
+    RING_BUFFER_SIZE, MAX_CAPTURE_PACKETS, DROP_REPORT_INTERVAL,
+    USE_FAST_DECODER, check_capture_backend
+)
 from utils.logger import setup_logger
 
 
@@ -17,7 +24,12 @@ logger = setup_logger(
 class PacketCapture:
     """
     Responsible for capturing live network packets
-    and placing them into a thread-safe queue.
+    and placing them into a bounded ring buffer that the
+    analysis loop drains in batches.
+
+    Packets are queued as PacketHeader records. With the fast
+    decoder enabled, frames are read raw from the capture socket
+    and never dissected by Scapy (except for odd link types).
 
     Works on both Linux and Windows.
     Requires:
@@ -25,12 +37,15 @@ class PacketCapture:
     - Windows: Npcap (https://npcap.com/) + run as Administrator
     """
 
-    def __init__(self):
-        self.packet_queue: queue.Queue = queue.Queue(maxsize=PACKET_QUEUE_SIZE)
+    def __init__(self, fast_path: bool = USE_FAST_DECODER):
+        self.packet_buffer = PacketRingBuffer(RING_BUFFER_SIZE)
+        self.fast_path = fast_path
         self.stop_event = threading.Event()
         self.capture_thread: Optional[threading.Thread] = None
         self._packet_count = 0
         self._max_packets = MAX_CAPTURE_PACKETS
+        self._drops_reported = 0
+        self._last_drop_report = time.monotonic()
 
     @property
     def packet_count(self) -> int:
@@ -43,31 +58,84 @@ class PacketCapture:
         """
         Called by Scapy for every captured packet.
         Filters and enqueues valid packets.
+        """
+        self._enqueue(header_from_scapy(packet))
+
+    def _enqueue(self, header):
+        """
+        Enqueues a decoded TCP/IP header (None is ignored).
         Auto-stops capture when MAX_CAPTURE_PACKETS is reached.
         """
         if self.has_reached_limit():
             self.stop_event.set()
             return
 
-        try:
-            if IP in packet and TCP in packet:
-                self._packet_count += 1
-                self.packet_queue.put_nowait(packet)
+        if header is None:
+            return
 
-                if self._packet_count % 1000 == 0:
-                    logger.info(
-                        f"Captured {self._packet_count}/{self._max_packets} packets"
-                    )
+        self._packet_count += 1
+        if not self.packet_buffer.append(header):
+            # Drops are reported periodically, never per packet
+            self.report_drops()
 
-                if self.has_reached_limit():
-                    logger.info(
-                        f"Capture limit reached ({self._max_packets} packets). "
-                        "Stopping capture automatically."
-                    )
-                    self.stop_event.set()
+        if self._packet_count % 1000 == 0:
+            logger.info(
+                f"Captured {self._packet_count}/{self._max_packets} packets"
+            )
 
-        except queue.Full:
-            logger.warning("Packet queue full. Dropping packet.")
+        if self.has_reached_limit():
+            logger.info(
+                f"Capture limit reached ({self._max_packets} packets). "
+                "Stopping capture automatically."
+            )
+            self.stop_event.set()
+
+    def report_drops(self, force: bool = False):
+        """
+        Logs the number of packets dropped since the last report,
+        at most once every DROP_REPORT_INTERVAL seconds.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_drop_report < DROP_REPORT_INTERVAL:
+            return
+
+        total = self.packet_buffer.dropped
+        new_drops = total - self._drops_reported
+        if new_drops:
+            logger.warning(
+                f"Packet buffer full: dropped {new_drops} packets in the last "
+                f"{now - self._last_drop_report:.1f}s ({total} total)"
+            )
+        self._drops_reported = total
+        self._last_drop_report = now
+
+    def _capture_raw(self, interface):
+        """
+        Reads raw frames from a Scapy L2 listen socket and
+        decodes them without building Scapy packet objects.
+        """
+        sock = conf.L2listen(iface=interface)
+
+        try:
+            while not self.stop_event.is_set():
+                if not sock.select([sock], 0.5):
+                    continue
+
+                cls, data, ts = sock.recv_raw()
+                if data is None:
+                    continue
+                if ts is None:
+                    ts = time.time()
+
+                if cls is Ether:
+                    self._enqueue(decode_frame(data, ts, LINKTYPE_ETHERNET))
+                else:
+                    # Scapy fallback for non-Ethernet link layers
+                    packet = cls(data)
+                    packet.time = ts
+                    self._enqueue(header_from_scapy(packet))
+        finally:
+            sock.close()
 
     def start(self, interface):
         """
@@ -102,12 +170,15 @@ class PacketCapture:
                 logger.info(
                     f"Starting packet capture on interface: {interface}"
                 )
-                sniff(
-                    iface=interface,
-                    prn=self._packet_callback,
-                    store=False,
-                    stop_filter=lambda _: self.stop_event.is_set()
-                )
+                if self.fast_path:
+                    self._capture_raw(interface)
+                else:
+                    sniff(
+                        iface=interface,
+                        prn=self._packet_callback,
+                        store=False,
+                        stop_filter=lambda _: self.stop_event.is_set()
+                    )
             except PermissionError:
                 logger.error(
                     "Permission denied. "
@@ -136,3 +207,4 @@ class PacketCapture:
         self.stop_event.set()
         if self.capture_thread:
             self.capture_thread.join()
+        self.report_drops(force=True)
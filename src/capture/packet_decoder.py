@@ -0,0 +1,197 @@
+import socket
+import struct
+from typing import NamedTuple, Optional
+
+from utils.logger import setup_logger
+
+
+logger = setup_logger(
+    name="PacketDecoder",
+    log_file="data/logs/ids_alerts.log"
+)
+
+
+# -----------------------------
+# Link types (pcap LINKTYPE_* values)
+# -----------------------------
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_LINUX_SLL2 = 276
+
+# DLT_RAW has a platform-dependent value in older captures
+_RAW_IP_LINKTYPES = (LINKTYPE_RAW, 12, 14)
+
+_ETHERTYPE_IPV4 = 0x0800
+_VLAN_ETHERTYPES = (0x8100, 0x88A8, 0x9100)
+_IPPROTO_TCP = 6
+
+_unpack_ethertype = struct.Struct("!H").unpack_from
+_unpack_ports_flags = struct.Struct("!HH8xH").unpack_from
+
+
+# Scapy renders TCP flags as letters in bit order ("S", "SA", "FPA", ...)
+_TCP_FLAG_LETTERS = "FSRPAUECN"
+TCP_FLAG_STRINGS = tuple(
+    "".join(
+        letter for bit, letter in enumerate(_TCP_FLAG_LETTERS)
+        if value & (1 << bit)
+    )
+    for value in range(1 << len(_TCP_FLAG_LETTERS))
+)
+TCP_FLAG_VALUES = {letters: value for value, letters in enumerate(TCP_FLAG_STRINGS)}
+
+
+class PacketHeader(NamedTuple):
+    """
+    Compact header record for a single TCP/IPv4 packet.
+
+    Holds exactly what TrafficAnalyzer needs, so the analysis
+    path never has to touch a dissected Scapy packet.
+    """
+    timestamp: float
+    src_ip: str
+    dst_ip: str
+    src_port: int
+    dst_port: int
+    length: int
+    tcp_flags: int
+
+
+def tcp_flags_to_str(flags: int) -> str:
+    """
+    Converts a TCP flag bitmask to Scapy's letter notation.
+    """
+    return TCP_FLAG_STRINGS[flags & 0x1FF]
+
+
+def tcp_flags_from_str(flags: str) -> int:
+    """
+    Converts Scapy's letter notation (in any order) to a bitmask.
+    """
+    value = TCP_FLAG_VALUES.get(flags)
+    if value is not None:
+        return value
+
+    value = 0
+    for letter in flags.upper():
+        bit = _TCP_FLAG_LETTERS.find(letter)
+        if bit < 0:
+            raise ValueError(f"Unknown TCP flag: {letter!r}")
+        value |= 1 << bit
+    return value
+
+
+def decode_frame(frame, timestamp: float,
+                 linktype: int = LINKTYPE_ETHERNET) -> Optional[PacketHeader]:
+    """
+    Parses Ethernet / IPv4 / TCP headers directly from raw frame bytes.
+
+    Returns None for anything that is not a TCP/IPv4 packet.
+    Unsupported link types are handed to the Scapy fallback.
+    """
+    if linktype == LINKTYPE_ETHERNET:
+        offset = 12
+        ethertype = _unpack_ethertype(frame, offset)[0] if len(frame) >= 14 else 0
+        offset = 14
+        while ethertype in _VLAN_ETHERTYPES and len(frame) >= offset + 4:
+            ethertype = _unpack_ethertype(frame, offset + 2)[0]
+            offset += 4
+        if ethertype != _ETHERTYPE_IPV4:
+            return None
+    elif linktype in _RAW_IP_LINKTYPES:
+        offset = 0
+    elif linktype == LINKTYPE_LINUX_SLL:
+        if len(frame) < 16 or _unpack_ethertype(frame, 14)[0] != _ETHERTYPE_IPV4:
+            return None
+        offset = 16
+    elif linktype == LINKTYPE_LINUX_SLL2:
+        if len(frame) < 20 or _unpack_ethertype(frame, 0)[0] != _ETHERTYPE_IPV4:
+            return None
+        offset = 20
+    else:
+        return decode_with_scapy(frame, timestamp, linktype)
+
+    return _decode_ipv4_tcp(frame, offset, timestamp)
+
+
+def _decode_ipv4_tcp(frame, offset: int, timestamp: float) -> Optional[PacketHeader]:
+    """
+    Decodes the IPv4 and TCP headers starting at `offset`.
+    """
+    if len(frame) < offset + 20:
+        return None
+
+    version_ihl = frame[offset]
+    if version_ihl >> 4 != 4:
+        return None
+
+    # Scapy only dissects TCP on the first fragment
+    if frame[offset + 9] != _IPPROTO_TCP:
+        return None
+    if (frame[offset + 6] & 0x1F) or frame[offset + 7]:
+        return None
+
+    tcp_offset = offset + (version_ihl & 0x0F) * 4
+    if len(frame) < tcp_offset + 14:
+        return None
+
+    src_port, dst_port, flags = _unpack_ports_flags(frame, tcp_offset)
+
+    return PacketHeader(
+        float(timestamp),
+        socket.inet_ntoa(bytes(frame[offset + 12:offset + 16])),
+        socket.inet_ntoa(bytes(frame[offset + 16:offset + 20])),
+        src_port,
+        dst_port,
+        len(frame),
+        flags & 0x1FF
+    )
+
+
+# -----------------------------
+# Scapy fallback
+# -----------------------------
+def header_from_scapy(packet) -> Optional[PacketHeader]:
+    """
+    Builds a PacketHeader from an already dissected Scapy packet.
+    """
+    from scapy.all import IP, TCP  # type: ignore[import-untyped]
+
+    if IP not in packet or TCP not in packet:
+        return None
+
+    ip = packet[IP]
+    tcp = packet[TCP]
+
+    return PacketHeader(
+        float(packet.time),
+        ip.src,
+        ip.dst,
+        tcp.sport,
+        tcp.dport,
+        len(packet),
+        int(tcp.flags)
+    )
+
+
+def decode_with_scapy(frame, timestamp: float, linktype: int) -> Optional[PacketHeader]:
+    """
+    Dissects a frame with Scapy for link types the fast path
+    does not understand.
+    """
+    from scapy.all import conf  # type: ignore[import-untyped]
+
+    layer = conf.l2types.get(linktype)
+    if layer is None:
+        logger.debug("No Scapy dissector for link type %s", linktype)
+        return None
+
+    try:
+        packet = layer(bytes(frame))
+    except Exception as e:
+        logger.debug("Scapy failed to dissect frame: %s", e)
+        return None
+
+    packet.time = timestamp
+    return header_from_scapy(packet)
@@ -1,4 +1,10 @@
-from scapy.all import rdpcap, IP, TCP  # type: ignore[import-untyped]
+from typing import Optional
+
+from scapy.all import PcapReader, PcapNgReader, IP, TCP  # type: ignore[import-untyped]
+
+from capture.packet_decoder import decode_frame
+from capture.pcap_stream import PcapStream
+from config.settings import USE_FAST_DECODER
 from utils.logger import setup_logger
 
 
@@ -12,16 +18,55 @@ class PCAPReader:
     """
     Reads packets from a PCAP file
     and yields TCP/IP packets for analysis.
+
+    Packets are streamed (pcap or pcapng) rather than loaded up
+    front, so analysis starts immediately and memory use stays
+    flat for multi-GB captures. With the fast decoder enabled,
+    packets are yielded as PacketHeader records.
+
+    start_offset must be a record boundary (see PcapStream). The Scapy
+    path supports it for classic pcap files only.
     """
 
-    def __init__(self, pcap_file_path: str):
+    def __init__(self, pcap_file_path: str, fast_path: bool = USE_FAST_DECODER,
+                 start_offset: int = 0, start_time: Optional[float] = None):
         self.pcap_file_path = pcap_file_path
+        self.fast_path = fast_path
+        self.start_offset = start_offset
+        self.start_time = start_time
 
     def read_packets(self):
         logger.info(f"Reading PCAP file: {self.pcap_file_path}")
 
-        packets = rdpcap(self.pcap_file_path)
+        if self.fast_path:
+            yield from self._read_stream()
+            return
+
+        with PcapReader(self.pcap_file_path) as packets:
+            if self.start_offset:
+                if isinstance(packets, PcapNgReader):
+                    raise ValueError(
+                        "start_offset needs the fast decoder for pcapng files"
+                    )
+                # Past the global header, records follow back to back
+                packets.f.seek(max(self.start_offset, packets.f.tell()))
+            for packet in packets:
+                if self.start_time is not None and packet.time < self.start_time:
+                    continue
+                if IP in packet and TCP in packet:
+                    yield packet
+
+    def _read_stream(self):
+        """
+        Yields decoded headers from the memory-mapped stream.
+        """
+        stream = PcapStream(
+            self.pcap_file_path,
+            start_offset=self.start_offset,
+            start_time=self.start_time
+        )
 
-        for packet in packets:
-            if IP in packet and TCP in packet:
-                yield packet
+        for record in stream:
+            header = decode_frame(record.data, record.timestamp, record.linktype)
+            if header is not None:
+                yield header
@@ -0,0 +1,321 @@
+import mmap
+import os
+import struct
+from typing import Iterator, List, NamedTuple, Optional
+
+from utils.logger import setup_logger
+
+
+logger = setup_logger(
+    name="PcapStream",
+    log_file="data/logs/ids_alerts.log"
+)
+
+
+# -----------------------------
+# Format constants
+# -----------------------------
+PCAP_MAGIC_USEC = 0xA1B2C3D4
+PCAP_MAGIC_NSEC = 0xA1B23C4D
+
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_IDB = 0x00000001
+PCAPNG_OPB = 0x00000002
+PCAPNG_SPB = 0x00000003
+PCAPNG_EPB = 0x00000006
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+
+_PCAP_GLOBAL_HEADER_LEN = 24
+_PCAP_RECORD_HEADER_LEN = 16
+
+_OPT_IF_TSRESOL = 9
+_OPT_IF_TSOFFSET = 14
+
+# Consumed pages are released from the mapping every window so the
+# resident set stays flat while streaming very large files.
+_RELEASE_WINDOW = 64 * 1024 * 1024
+
+
+class PcapRecord(NamedTuple):
+    """
+    A single captured frame.
+
+    `offset` is the byte position of the record (or pcapng block)
+    in the file and can be passed back as `start_offset` to resume.
+    """
+    offset: int
+    timestamp: float
+    linktype: int
+    data: bytes
+    wire_length: int
+
+
+class _Interface(NamedTuple):
+    linktype: int
+    snaplen: int
+    ts_divisor: float
+    ts_offset: int
+
+
+class PcapStream:
+    """
+    Streams records from a classic pcap or pcapng file
+    through a read-only memory map.
+
+    Only one record is materialised at a time, so memory use
+    does not depend on the size of the capture.
+
+    - Classic pcap: either byte order, micro- or nanosecond timestamps
+    - pcapng: multiple sections and interfaces, if_tsresol/if_tsoffset
+    """
+
+    def __init__(self, file_path: str, start_offset: int = 0,
+                 start_time: Optional[float] = None):
+        self.file_path = file_path
+        self.start_offset = start_offset
+        self.start_time = start_time
+
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._released = 0
+
+    # -----------------------------
+    # Context management
+    # -----------------------------
+    def open(self):
+        self._file = open(self.file_path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            self._file.close()
+            raise ValueError(f"Empty capture file: {self.file_path}")
+
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+        self._released = 0
+        return self
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def __iter__(self) -> Iterator[PcapRecord]:
+        return self.records()
+
+    def records(self) -> Iterator[PcapRecord]:
+        """
+        Yields records one at a time, honouring start_offset
+        and start_time.
+
+        start_offset must be a record (or block) boundary, e.g. the
+        `offset` of a previously yielded record.
+        """
+        owns_map = self._mmap is None
+        if owns_map:
+            self.open()
+
+        try:
+            magic = self._mmap[:4]
+            if len(magic) < 4:
+                raise ValueError(f"Truncated capture file: {self.file_path}")
+
+            if struct.unpack("<I", magic)[0] == PCAPNG_SHB:
+                yield from self._pcapng_records()
+            else:
+                yield from self._pcap_records()
+        finally:
+            if owns_map:
+                self.close()
+
+    def read_chunks(self, chunk_size: int = 1024) -> Iterator[List[PcapRecord]]:
+        """
+        Yields lists of up to `chunk_size` records.
+        """
+        chunk: List[PcapRecord] = []
+        for record in self.records():
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    # -----------------------------
+    # Classic pcap
+    # -----------------------------
+    def _pcap_records(self) -> Iterator[PcapRecord]:
+        mm = self._mmap
+        size = len(mm)
+
+        if size < _PCAP_GLOBAL_HEADER_LEN:
+            raise ValueError(f"Truncated pcap header: {self.file_path}")
+
+        for endian in ("<", ">"):
+            magic = struct.unpack_from(endian + "I", mm, 0)[0]
+            if magic in (PCAP_MAGIC_USEC, PCAP_MAGIC_NSEC):
+                break
+        else:
+            raise ValueError(f"Not a pcap/pcapng file: {self.file_path}")
+
+        divisor = 1e9 if magic == PCAP_MAGIC_NSEC else 1e6
+        # Upper bits of the link type field may carry FCS information
+        linktype = struct.unpack_from(endian + "I", mm, 20)[0] & 0x0FFFFFFF
+        record_header = struct.Struct(endian + "IIII")
+
+        offset = max(self.start_offset, _PCAP_GLOBAL_HEADER_LEN)
+
+        while offset + _PCAP_RECORD_HEADER_LEN <= size:
+            ts_sec, ts_frac, incl_len, orig_len = record_header.unpack_from(mm, offset)
+            data_start = offset + _PCAP_RECORD_HEADER_LEN
+            data_end = data_start + incl_len
+
+            if data_end > size:
+                logger.warning(
+                    f"Truncated record at offset {offset} in {self.file_path}"
+                )
+                return
+
+            timestamp = ts_sec + ts_frac / divisor
+            if self.start_time is None or timestamp >= self.start_time:
+                yield PcapRecord(offset, timestamp, linktype, mm[data_start:data_end], orig_len)
+
+            offset = data_end
+            self._release(offset)
+
+    # -----------------------------
+    # pcapng
+    # -----------------------------
+    def _pcapng_records(self) -> Iterator[PcapRecord]:
+        mm = self._mmap
+        size = len(mm)
+        endian = "<"
+        interfaces: List[_Interface] = []
+        offset = 0
+
+        while offset + 12 <= size:
+            block_type = struct.unpack_from(endian + "I", mm, offset)[0]
+
+            if block_type == PCAPNG_SHB:
+                # Byte order is only known after reading the SHB body
+                bom = struct.unpack_from("<I", mm, offset + 8)[0]
+                endian = "<" if bom == PCAPNG_BYTE_ORDER_MAGIC else ">"
+                interfaces = []
+
+            block_len = struct.unpack_from(endian + "I", mm, offset + 4)[0]
+            if block_len < 12 or offset + block_len > size:
+                logger.warning(
+                    f"Truncated pcapng block at offset {offset} in {self.file_path}"
+                )
+                return
+
+            body = offset + 8
+            body_end = offset + block_len - 4
+
+            if block_type == PCAPNG_IDB:
+                interfaces.append(self._parse_idb(endian, body, body_end))
+
+            elif offset >= self.start_offset:
+                record = self._parse_packet_block(
+                    block_type, endian, offset, body, interfaces
+                )
+                if record is not None and (
+                    self.start_time is None or record.timestamp >= self.start_time
+                ):
+                    yield record
+
+            offset += block_len
+            self._release(offset)
+
+    def _parse_idb(self, endian: str, body: int, body_end: int) -> _Interface:
+        mm = self._mmap
+        linktype, _, snaplen = struct.unpack_from(endian + "HHI", mm, body)
+        divisor = 1e6
+        ts_offset = 0
+
+        opt = body + 8
+        while opt + 4 <= body_end:
+            code, length = struct.unpack_from(endian + "HH", mm, opt)
+            if code == 0:
+                break
+            value = opt + 4
+            if code == _OPT_IF_TSRESOL and length >= 1:
+                resol = mm[value]
+                if resol & 0x80:
+                    divisor = float(2 ** (resol & 0x7F))
+                else:
+                    divisor = float(10 ** resol)
+            elif code == _OPT_IF_TSOFFSET and length >= 8:
+                ts_offset = struct.unpack_from(endian + "q", mm, value)[0]
+            opt = value + ((length + 3) & ~3)
+
+        return _Interface(linktype, snaplen, divisor, ts_offset)
+
+    def _parse_packet_block(self, block_type, endian, offset, body,
+                            interfaces) -> Optional[PcapRecord]:
+        mm = self._mmap
+
+        if block_type == PCAPNG_EPB:
+            if_id, ts_high, ts_low, cap_len, orig_len = struct.unpack_from(
+                endian + "IIIII", mm, body
+            )
+            data_start = body + 20
+        elif block_type == PCAPNG_OPB:
+            if_id, _, ts_high, ts_low, cap_len, orig_len = struct.unpack_from(
+                endian + "HHIIII", mm, body
+            )
+            data_start = body + 20
+        elif block_type == PCAPNG_SPB:
+            if not interfaces:
+                return None
+            if_id = 0
+            orig_len = struct.unpack_from(endian + "I", mm, body)[0]
+            snaplen = interfaces[0].snaplen or orig_len
+            cap_len = min(orig_len, snaplen)
+            ts_high = ts_low = 0
+            data_start = body + 4
+        else:
+            return None
+
+        if if_id >= len(interfaces):
+            logger.warning(f"Packet block references unknown interface {if_id}")
+            return None
+
+        iface = interfaces[if_id]
+        timestamp = iface.ts_offset + ((ts_high << 32) | ts_low) / iface.ts_divisor
+
+        return PcapRecord(
+            offset,
+            timestamp,
+            iface.linktype,
+            mm[data_start:data_start + cap_len],
+            orig_len
+        )
+
+    # -----------------------------
+    # Memory management
+    # -----------------------------
+    def _release(self, offset: int):
+        """
+        Drops already consumed pages from the mapping.
+        """
+        if offset - self._released < _RELEASE_WINDOW:
+            return
+        if hasattr(mmap, "MADV_DONTNEED"):
+            end = offset - (offset % mmap.PAGESIZE)
+            start = self._released - (self._released % mmap.PAGESIZE)
+            if end > start:
+                self._mmap.madvise(mmap.MADV_DONTNEED, start, end - start)
+        self._released = offset
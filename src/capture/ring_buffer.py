@@ -0,0 +1,73 @@
+import threading
+from collections import deque
+from typing import List
+
+
+class PacketRingBuffer:
+    """
+    Bounded single-producer / single-consumer buffer between
+    the capture thread and the analysis loop.
+
+    The producer appends without taking a lock (deque appends
+    are atomic) and only signals the consumer when it is actually
+    waiting. The consumer drains packets in batches instead of
+    paying a lock and wake-up per packet.
+
+    When the buffer is full, new packets are dropped and counted;
+    reporting is left to the caller.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive")
+
+        self.capacity = capacity
+        self._items: deque = deque()
+        self._not_empty = threading.Event()
+        self._consumer_waiting = False
+
+        self.appended = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def append(self, item) -> bool:
+        """
+        Adds an item. Returns False (and counts a drop)
+        if the buffer is full.
+        """
+        if len(self._items) >= self.capacity:
+            self.dropped += 1
+            return False
+
+        self._items.append(item)
+        self.appended += 1
+
+        if self._consumer_waiting:
+            self._not_empty.set()
+        return True
+
+    def drain(self, max_items: int, timeout: float) -> List:
+        """
+        Removes and returns up to `max_items` items.
+
+        Returns immediately if anything is buffered, otherwise
+        waits up to `timeout` seconds for the producer.
+        """
+        items = self._items
+
+        if not items:
+            self._consumer_waiting = True
+            self._not_empty.clear()
+            # Re-check after announcing ourselves to avoid a lost wake-up
+            if not items:
+                self._not_empty.wait(timeout)
+            self._consumer_waiting = False
+
+        count = min(max_items, len(items))
+        popleft = items.popleft
+        return [popleft() for _ in range(count)]
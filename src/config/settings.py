@@ -2,6 +2,7 @@
 # IDS Global Configuration
 # ==============================
 
+import os
 import platform
 import logging
 
@@ -91,12 +92,111 @@ NETWORK_INTERFACE = detect_network_interface()
 ANOMALY_SCORE_THRESHOLD = -0.5
 SIGNATURE_PACKET_RATE_THRESHOLD = 100
 
-# Queue & performance
-PACKET_QUEUE_SIZE = 1000
+# Anomaly detector:
+# - "isolation_forest" uses the trained model artifact below
+# - "ewma" learns per-feature EWMA baselines from live traffic and
+#   flags rows whose z-score exceeds ONLINE_Z_THRESHOLD (no training)
+ANOMALY_ENGINE = "isolation_forest"
+ONLINE_ALPHA = 0.001             # EWMA weight per sample (~700-sample half-life)
+ONLINE_Z_THRESHOLD = 6.0
+ONLINE_WARMUP = 1000             # samples learned before anything is flagged
+
+# Anomaly model artifact (python -m detection.train_model)
+ANOMALY_MODEL_PATH = "data/models/anomaly_model"
+ANOMALY_CONTAMINATION = 0.01     # share of baseline rows the threshold flags
+
+# Anomaly scoring granularity:
+# - "packet" scores every packet
+# - "flow" scores a flow on its first packets, every N packets, when its
+#   quantized features change and on expiry; other packets reuse the
+#   verdict cached on the flow
+ANOMALY_SCORING_MODE = "flow"
+FLOW_SCORE_FIRST_PACKETS = 3
+FLOW_SCORE_EVERY_PACKETS = 1000
+FLOW_SCORE_RESOLUTION = 2        # quantization buckets per doubling of a feature
+
+# Streaming anomaly scoring: rows are scored together once the batch
+# is full or its oldest row has waited this long
+ANOMALY_BATCH_SIZE = 256
+ANOMALY_MAX_LATENCY_MS = 50
+
+# Hot reload: the rule file and model directory are polled for changes;
+# a new version is validated and compiled in the background and takes
+# over between two batches (a bad file keeps the active version)
+HOT_RELOAD = True
+RELOAD_POLL_INTERVAL = 2.0       # seconds between change checks
+
+# Capture buffer & performance
+RING_BUFFER_SIZE = 65536         # packets held between capture and analysis
+BATCH_SIZE = 256                 # max packets drained per analysis batch
+BATCH_TIMEOUT_MS = 50            # max wait for a batch when the buffer is empty
+DROP_REPORT_INTERVAL = 5.0       # seconds between dropped-packet reports
 MAX_CAPTURE_PACKETS = 10000
 
+# Sharded (multi-process) live mode
+SHARD_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+SHARD_BATCH_SIZE = 512           # headers per pipe message to a worker
+
+# Batch (directory-scale) PCAP ingestion
+BATCH_INGEST_WORKERS = os.cpu_count() or 1
+BATCH_CHECKPOINT_DIR = "data/checkpoints"
+# Rotations of one capture are processed in parallel; each replays this
+# much of the previous rotation first to rebuild flows, rate windows and
+# host aggregates that cross the boundary
+BATCH_WARM_UP_SECONDS = 60.0
+
+# Decode Ethernet/IPv4/TCP headers from raw bytes instead of
+# dissecting every packet with Scapy (Scapy remains the fallback
+# for link types the fast decoder does not understand)
+USE_FAST_DECODER = True
+
+# Alert suppression: repeated hits of a rule on the same flow (or
+# source / destination, see "suppress_by" in signature_rules.json)
+# within the cooldown are folded into one periodic summary alert
+ALERT_COOLDOWN = 10.0            # seconds; 0 disables suppression
+ALERT_SUPPRESSION_KEY = "flow"   # default key: flow / source / destination
+ALERT_SUPPRESSION_MAX_KEYS = 10000
+
+# Alert delivery: a background thread ships alerts to the backend in
+# batches over a keep-alive connection, retrying with exponential
+# backoff while it is unreachable. When the queue is full:
+# "drop_oldest", "drop_newest" or "block" (wait briefly for room)
+ALERT_QUEUE_SIZE = 10000
+ALERT_SEND_BATCH = 100           # alerts per send
+ALERT_SEND_LATENCY_MS = 200      # max wait for a batch to fill
+ALERT_OVERFLOW_POLICY = "drop_oldest"
+ALERT_RETRY_BACKOFF = 0.5        # seconds, doubled per failed attempt
+ALERT_RETRY_BACKOFF_MAX = 30.0
+
+# Alert journal: every alert is appended to segmented NDJSON files
+# (group-committed with fsync) before delivery; alerts the backend never
+# acknowledged are replayed to it, and the backend rebuilds from it
+JOURNAL_ENABLED = True
+JOURNAL_DIR = "data/journal"
+JOURNAL_SEGMENT_BYTES = 16 * 1024 * 1024
+JOURNAL_COMMIT_INTERVAL_MS = 50  # max time an alert waits for fsync
+JOURNAL_MAX_SEGMENTS = 64        # delivered segments beyond this are deleted
+JOURNAL_MEMORY_TAIL = 10000      # undelivered alerts replayed from memory, not disk
+
 # Logging
 LOG_FILE_PATH = "data/logs/ids_alerts.log"
 
 # Feature safety
 MIN_FLOW_DURATION = 0.0001
+
+# Flow table
+FLOW_TABLE_MAX_ENTRIES = 100000  # least recently seen flow evicted beyond this
+FLOW_IDLE_TIMEOUT = 60.0         # seconds without packets before a flow expires
+FLOW_ACTIVE_TIMEOUT = 1800.0     # long-lived flows are restarted after this
+
+# Sliding-window rate features (packet_rate_<W>s / byte_rate_<W>s)
+RATE_WINDOWS = (1, 10, 60)       # window lengths in seconds
+RATE_WINDOW_BUCKETS = 5          # ring buckets per window
+
+# Per-host scan / fan-out aggregates (HyperLogLog + count-min sketch)
+AGGREGATE_WINDOW = 60.0          # tumbling window length in seconds
+AGGREGATE_MAX_HOSTS = 10000      # tracked sources (and destinations)
+HLL_PRECISION = 8                # 2^8 registers per host, ~6.5% error
+CMS_WIDTH = 2048
+CMS_DEPTH = 4
+AGGREGATE_SYNC_INTERVAL = 0.5    # sharded mode: seconds between destination count exchanges
@@ -1,9 +1,31 @@
+import hashlib
 import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple
+
 import numpy as np
 from sklearn.ensemble import IsolationForest
 
+from detection.flow_scoring import FlowScoringPolicy
+from detection.hot_reload import ReloadWatcher, file_fingerprint
+from detection.micro_batcher import AnomalyMicroBatcher
+from detection.online_detector import EwmaAnomalyDetector
+from detection.model_artifact import (
+    META_FILE, ModelArtifactError, PersistedIsolationForest, resolve_version_dir
+)
+from detection.rule_compiler import CompiledRuleSet, RuleError
 from utils.logger import setup_logger
-from config.settings import ANOMALY_SCORE_THRESHOLD
+from config.settings import (
+    ANOMALY_SCORE_THRESHOLD, ANOMALY_BATCH_SIZE, ANOMALY_MAX_LATENCY_MS,
+    ANOMALY_ENGINE, ONLINE_ALPHA, ONLINE_Z_THRESHOLD, ONLINE_WARMUP,
+    ANOMALY_MODEL_PATH, ANOMALY_SCORING_MODE, FLOW_SCORE_FIRST_PACKETS,
+    FLOW_SCORE_EVERY_PACKETS, FLOW_SCORE_RESOLUTION, RELOAD_POLL_INTERVAL
+)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_MODEL_PATH = os.path.join(BASE_DIR, ANOMALY_MODEL_PATH)
 
 logger = setup_logger(
     name="DetectionEngine",
@@ -19,8 +41,22 @@ class DetectionEngine:
     on extracted traffic features.
     """
 
-    def __init__(self, signature_file_path: str):
-        self.signature_rules = self._load_signature_rules(signature_file_path)
+    ANOMALY_FEATURES = ("packet_size", "packet_rate", "byte_rate")
+
+    def __init__(self, signature_file_path: str,
+                 model_path: Optional[str] = DEFAULT_MODEL_PATH,
+                 anomaly_engine: str = ANOMALY_ENGINE):
+        if anomaly_engine not in ("isolation_forest", "ewma"):
+            raise ValueError(f"Unknown anomaly engine: {anomaly_engine}")
+
+        self.signature_file_path = signature_file_path
+        self.anomaly_engine = anomaly_engine
+        # The online detector needs no model file
+        self.model_path = model_path if anomaly_engine == "isolation_forest" else None
+
+        self.rule_set_version = {}
+        self._rule_set_serial = 0
+        self._install_rule_set(*self._initial_rule_set(signature_file_path))
 
         # Isolation Forest for anomaly detection
         self.anomaly_detector = IsolationForest(
@@ -30,22 +66,97 @@ class DetectionEngine:
         )
 
         self.is_trained = False
+        self.anomaly_threshold = ANOMALY_SCORE_THRESHOLD
+        self.anomaly_model_version = None
+        self.anomaly_model_loaded_at = None
+
+        # Streaming anomaly scoring (see detect_stream)
+        self.anomaly_batcher = AnomalyMicroBatcher(
+            self._score_anomalies,
+            ANOMALY_BATCH_SIZE,
+            ANOMALY_MAX_LATENCY_MS
+        )
+
+        # Per-flow verdict caching (ANOMALY_SCORING_MODE = "flow")
+        self.flow_scoring = None
+        if ANOMALY_SCORING_MODE == "flow":
+            self.flow_scoring = FlowScoringPolicy(
+                FLOW_SCORE_FIRST_PACKETS,
+                FLOW_SCORE_EVERY_PACKETS,
+                FLOW_SCORE_RESOLUTION
+            )
+        self._expired_flows = []
+
+        if anomaly_engine == "ewma":
+            self.anomaly_detector = EwmaAnomalyDetector(
+                len(self.ANOMALY_FEATURES),
+                ONLINE_ALPHA,
+                ONLINE_Z_THRESHOLD,
+                ONLINE_WARMUP
+            )
+            self.anomaly_threshold = self.anomaly_detector.score_threshold
+            self.is_trained = True
+            logger.info(
+                f"Online EWMA anomaly detection enabled "
+                f"(z > {ONLINE_Z_THRESHOLD:g} after {ONLINE_WARMUP} samples)"
+            )
+        elif self.model_path:
+            self.load_anomaly_model(self.model_path)
+
+        # Hot reload (see start_watching)
+        self._watcher: Optional[ReloadWatcher] = None
+        self._reload_listeners: List[Callable[[dict], None]] = []
 
     # -----------------------------
     # Signature Rule Handling
     # -----------------------------
-    def _load_signature_rules(self, file_path):
+    def _load_rule_set(self, file_path):
+        """
+        Loads and compiles a rule file, raising on any problem
+        (unreadable file, invalid JSON, malformed rule).
+        Returns (rules, compiled, digest).
+        """
+        with open(file_path, "rb") as f:
+            content = f.read()
+        rules = json.loads(content)
+        if not isinstance(rules, dict):
+            raise RuleError("Rule file must contain a JSON object of rules")
+        compiled = CompiledRuleSet(rules)
+        return rules, compiled, hashlib.sha256(content).hexdigest()
+
+    def _initial_rule_set(self, file_path):
         """
-        Loads signature rules from a JSON file.
+        Startup load: falls back to an empty rule set if the file
+        cannot be used, so the IDS still runs anomaly detection.
         """
         try:
-            with open(file_path, "r") as f:
-                rules = json.load(f)
-                logger.info("Signature rules loaded successfully.")
-                return rules
+            rules, compiled, digest = self._load_rule_set(file_path)
         except Exception as e:
             logger.error(f"Failed to load signature rules: {e}")
-            return {}
+            return {}, CompiledRuleSet({}), None
+
+        logger.info("Signature rules loaded successfully.")
+        return rules, compiled, digest
+
+    def _install_rule_set(self, rules, compiled, digest):
+        self.signature_rules = rules
+        self.compiled_rules = compiled
+        self._rule_set_serial += 1
+        self.rule_set_version = {
+            "version": self._rule_set_serial,
+            "sha256": digest,
+            "rules": len(compiled),
+            "path": self.signature_file_path,
+            "loaded_at": datetime.now(timezone.utc).isoformat()
+        }
+
+        logger.info(
+            f"Compiled {len(compiled)} signature rules "
+            f"({len(compiled.vector_rules)} vectorized, "
+            f"{len(compiled.indexed_rules)} indexed, "
+            f"{len(compiled.unindexed_rules)} unindexed), "
+            f"rule set version {self._rule_set_serial}"
+        )
 
     # -----------------------------
     # Anomaly Model Training
@@ -55,10 +166,183 @@ class DetectionEngine:
         Trains the anomaly detection model
         using normal traffic feature vectors.
         """
+        self.anomaly_detector = IsolationForest(
+            n_estimators=100,
+            contamination=0.1,
+            random_state=42
+        )
         self.anomaly_detector.fit(normal_feature_vectors)
+        self.anomaly_threshold = ANOMALY_SCORE_THRESHOLD
+        self.anomaly_model_version = None
         self.is_trained = True
         logger.info("Anomaly detection model trained.")
 
+    def load_anomaly_model(self, path: str) -> bool:
+        """
+        Loads a model artifact written by detection.train_model,
+        together with its calibrated score threshold. Artifacts built
+        for a different feature schema are rejected.
+        """
+        if not os.path.exists(path):
+            logger.info(
+                f"No anomaly model at {path}; anomaly detection disabled "
+                f"(train one with: python -m detection.train_model --pcap <baseline>)"
+            )
+            return False
+
+        start = time.perf_counter()
+        try:
+            model = PersistedIsolationForest.load(path, self.ANOMALY_FEATURES)
+        except ModelArtifactError as e:
+            logger.error(f"Rejected anomaly model: {e}")
+            return False
+
+        self._install_model(model)
+        logger.info(
+            f"Anomaly model {model.version} loaded in "
+            f"{(time.perf_counter() - start) * 1000:.1f}ms "
+            f"(threshold={model.score_threshold:.4f})"
+        )
+        return True
+
+    def _install_model(self, model):
+        self.anomaly_detector = model
+        self.anomaly_threshold = model.score_threshold
+        self.anomaly_model_version = model.version
+        self.anomaly_model_loaded_at = datetime.now(timezone.utc).isoformat()
+        self.is_trained = True
+
+        # Verdicts cached on flows came from the previous model
+        if self.flow_scoring is not None:
+            self.flow_scoring.invalidate()
+
+    # -----------------------------
+    # Hot Reload
+    # -----------------------------
+    def start_watching(self, interval: float = RELOAD_POLL_INTERVAL):
+        """
+        Starts a background thread that watches the rule file and the
+        model directory. Changed files are loaded, validated and
+        compiled on that thread; the detection thread switches to the
+        new version at its next detect*() call, so a batch is always
+        evaluated against a single rule set and model. Files that fail
+        to load are logged and the active version stays in place.
+        """
+        if self._watcher is not None:
+            return
+
+        watcher = ReloadWatcher(interval)
+        watcher.watch(
+            "rules",
+            lambda: file_fingerprint(self.signature_file_path),
+            self._reload_rule_set
+        )
+        if self.model_path:
+            watcher.watch("model", self._model_fingerprint, self._reload_model)
+
+        self._watcher = watcher
+        watcher.start()
+        logger.info(f"Watching rules and model for changes every {interval:g}s")
+
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def add_reload_listener(self, listener: Callable[[dict], None]):
+        """
+        Calls listener(active_versions()) after each switch.
+        """
+        self._reload_listeners.append(listener)
+
+    def apply_reloads(self) -> bool:
+        """
+        Switches to rule sets / models validated since the last call.
+        Runs on the detection thread, between batches.
+        """
+        watcher = self._watcher
+        if watcher is None or not watcher.has_pending:
+            return False
+
+        pending = watcher.take_pending()
+        if "rules" in pending:
+            self._install_rule_set(*pending["rules"])
+        if "model" in pending:
+            model = pending["model"]
+            self._install_model(model)
+            logger.info(
+                f"Switched to anomaly model {model.version} "
+                f"(threshold={model.score_threshold:.4f})"
+            )
+
+        versions = self.active_versions()
+        for listener in self._reload_listeners:
+            listener(versions)
+        return True
+
+    def active_versions(self) -> dict:
+        """
+        Rule set and model currently used for detection.
+        """
+        return {
+            "rules": dict(self.rule_set_version),
+            "model": {
+                "engine": self.anomaly_engine,
+                "version": self.anomaly_model_version,
+                "threshold": self.anomaly_threshold if self.is_trained else None,
+                "path": self.model_path,
+                "loaded_at": self.anomaly_model_loaded_at
+            },
+            "reload_failures": self._watcher.failures if self._watcher else 0
+        }
+
+    def active_definitions(self) -> tuple:
+        """
+        (rules, rules sha256, model version directory) in use, for
+        switch_to() on another engine.
+        """
+        return (
+            self.signature_rules,
+            self.rule_set_version.get("sha256"),
+            getattr(self.anomaly_detector, "path", None)
+        )
+
+    def switch_to(self, rules: dict, digest: Optional[str], model_dir: Optional[str]):
+        """
+        Switches to a rule set and model version chosen by another
+        engine's watcher (sharded mode: the parent's), keeping parts
+        that are already active. A model that fails to load is logged
+        and the active one stays in place.
+        """
+        if digest != self.rule_set_version.get("sha256"):
+            self._install_rule_set(rules, CompiledRuleSet(rules), digest)
+        if model_dir is None or model_dir == getattr(self.anomaly_detector, "path", None):
+            return
+        try:
+            model = PersistedIsolationForest.load(model_dir, self.ANOMALY_FEATURES)
+        except ModelArtifactError as e:
+            logger.error(f"Rejected anomaly model: {e}")
+            return
+        self._install_model(model)
+        logger.info(f"Switched to anomaly model {model.version}")
+
+    def _reload_rule_set(self):
+        loaded = self._load_rule_set(self.signature_file_path)
+        if loaded[2] == self.rule_set_version.get("sha256"):
+            return None  # touched, content unchanged
+        return loaded
+
+    def _model_fingerprint(self):
+        version_dir = resolve_version_dir(self.model_path)
+        fingerprint = file_fingerprint(os.path.join(version_dir, META_FILE))
+        return None if fingerprint is None else (version_dir, fingerprint)
+
+    def _reload_model(self):
+        model = PersistedIsolationForest.load(self.model_path, self.ANOMALY_FEATURES)
+        if model.version == self.anomaly_model_version:
+            return None
+        return model
+
     # -----------------------------
     # Detection Logic
     # -----------------------------
@@ -67,6 +351,7 @@ class DetectionEngine:
         Applies both detection techniques
         and returns a list of detected threats.
         """
+        self.apply_reloads()
         detected_threats = []
 
         # 1️⃣ Signature-based detection
@@ -82,64 +367,196 @@ class DetectionEngine:
 
         return detected_threats
 
+    def detect_stream(self, features: dict, flow=None) -> List[Tuple[dict, dict]]:
+        """
+        Streaming counterpart of detect() for per-packet callers.
+
+        Signature matches for this packet are returned at once. Its
+        anomaly score is queued and scored together with other packets,
+        so anomaly verdicts arrive from a later detect_stream() or
+        poll_anomalies() call, at most ANOMALY_MAX_LATENCY_MS later.
+        Returns (threat, features) pairs so each verdict stays attached
+        to the packet it was computed for.
+
+        With per-flow scoring, pass the packet's FlowRecord
+        (TrafficAnalyzer.current_flow) so packets that would not change
+        the flow's verdict are not scored again.
+        """
+        self.apply_reloads()
+        ready = [
+            (threat, features)
+            for threat in self._signature_based_detection(features)
+        ]
+
+        if self.is_trained:
+            vector = self._anomaly_vector(features)
+            if (flow is None or self.flow_scoring is None
+                    or self.flow_scoring.should_score(flow, vector)):
+                ready.extend(self._anomaly_verdicts(
+                    self.anomaly_batcher.add(vector, (features, flow))
+                ))
+
+        return ready
+
+    def poll_anomalies(self) -> List[Tuple[dict, dict]]:
+        """
+        Returns anomaly verdicts whose batch deadline has passed.
+        """
+        return self._anomaly_verdicts(self.anomaly_batcher.poll())
+
+    def flush_anomalies(self) -> List[Tuple[dict, dict]]:
+        """
+        Scores every queued packet now (e.g. at the end of a capture).
+        """
+        return self._anomaly_verdicts(self.anomaly_batcher.flush())
+
+    def detect_batch(self, records: np.ndarray, flows=None) -> List[list]:
+        """
+        Applies both detection techniques to a structured array of
+        feature rows (see TrafficAnalyzer.analyze_batch) and returns
+        one list of threats per row.
+
+        `flows` (TrafficAnalyzer.batch_flows) enables per-flow
+        scoring: only rows whose flow needs a fresh verdict are scored.
+        """
+        self.apply_reloads()
+        if len(records) == 0:
+            return []
+
+        mask = self.compiled_rules.match_records(records)
+        results = [self._threats_from_mask(row) for row in mask]
+
+        if self.is_trained:
+            feature_matrix = np.column_stack(
+                [records[name] for name in self.ANOMALY_FEATURES]
+            ).astype(float)
+            if flows is None or self.flow_scoring is None:
+                scores = self._score_anomalies(feature_matrix)
+                for i in np.flatnonzero(scores < self.anomaly_threshold):
+                    results[i].append(self._anomaly_threat(scores[i]))
+                return results
+
+            # Milestones use each row's own packet count, not the
+            # flow's count at the end of the batch
+            should_score = self.flow_scoring.should_score
+            rows = [
+                i for i, (flow, vector, count) in enumerate(zip(
+                    flows, feature_matrix.tolist(), records["flow_packets"].tolist()
+                ))
+                if should_score(flow, vector, count)
+            ]
+            if rows:
+                scores = self._score_anomalies(feature_matrix[rows])
+                for i, score in zip(rows, scores.tolist()):
+                    flows[i].anomaly_score = score
+                    if score < self.anomaly_threshold:
+                        results[i].append(self._anomaly_threat(score))
+
+        return results
+
     # -----------------------------
-    # Signature-based Detection
+    # Per-flow scoring
     # -----------------------------
-    def _signature_based_detection(self, features):
-        threats = []
-
-        for rule_name, rule in self.signature_rules.items():
-            conditions = rule.get("conditions", {})
-
-            if self._match_conditions(features, conditions):
-                threat = {
-                    "type": "signature",
-                    "name": rule_name,
-                    "description": rule.get("description"),
-                    "severity": rule.get("severity"),
-                    "mitre_technique": rule.get("mitre")
-                }
-                threats.append(threat)
-                logger.warning(f"Signature match detected: {rule_name}")
+    def track_flows(self, flow_table):
+        """
+        Scores flows one last time when they leave `flow_table`
+        (see expired_flow_verdicts). No-op in per-packet mode.
+        """
+        if self.flow_scoring is not None:
+            flow_table.add_expiry_listener(self._flow_expired)
 
-        return threats
+    def _flow_expired(self, flow, reason):
+        if self.is_trained and self.flow_scoring.should_score_expired(flow):
+            self._expired_flows.append(flow)
 
-    def _match_conditions(self, features, conditions):
+    def expired_flow_verdicts(self) -> List[Tuple[dict, dict]]:
         """
-        Checks whether traffic features match rule conditions.
+        Scores flows that expired since the last call and returns
+        (threat, features) pairs for the anomalous ones. Features
+        describe the flow's final state.
         """
-        for key, threshold in conditions.items():
-            if key not in features:
-                return False
+        flows, self._expired_flows = self._expired_flows, []
+        if not flows:
+            return []
 
-            if features[key] > threshold:
-                continue
-            else:
-                return False
+        scores = self._score_anomalies(
+            np.array([flow.anomaly_vector for flow in flows], dtype=float)
+        )
+        verdicts = []
+        for flow, score in zip(flows, scores.tolist()):
+            flow.anomaly_score = score
+            if score < self.anomaly_threshold:
+                verdicts.append((self._anomaly_threat(score), self._flow_features(flow)))
+        return verdicts
 
-        return True
+    def _flow_features(self, flow):
+        src_ip, dst_ip, src_port, dst_port = flow.key
+        features = {
+            "src_ip": src_ip,
+            "dst_ip": dst_ip,
+            "src_port": src_port,
+            "dst_port": dst_port,
+            "flow_duration": flow.last_time - flow.start_time
+        }
+        features.update(zip(self.ANOMALY_FEATURES, flow.anomaly_vector))
+        return features
+
+    def anomaly_scoring_stats(self) -> dict:
+        """
+        Model invocations made and avoided by per-flow scoring.
+        """
+        if self.flow_scoring is None:
+            return {"mode": "packet"}
+        return {"mode": "flow", **self.flow_scoring.stats()}
+
+    # -----------------------------
+    # Signature-based Detection
+    # -----------------------------
+    def _signature_based_detection(self, features):
+        mask = self.compiled_rules.match_features(features)
+        return self._threats_from_mask(mask[0])
+
+    def _threats_from_mask(self, mask_row):
+        threats = self.compiled_rules.threats(mask_row)
+        for threat in threats:
+            logger.warning(f"Signature match detected: {threat['name']}")
+        return threats
 
     # -----------------------------
     # Anomaly-based Detection
     # -----------------------------
     def _anomaly_based_detection(self, features):
         """
-        Detects anomalies using Isolation Forest.
+        Scores one packet with the configured anomaly detector.
         """
-        feature_vector = np.array([[
-            features["packet_size"],
-            features["packet_rate"],
-            features["byte_rate"]
-        ]])
+        feature_vector = np.array([self._anomaly_vector(features)])
 
-        score = self.anomaly_detector.score_samples(feature_vector)[0]
+        score = self._score_anomalies(feature_vector)[0]
 
-        if score < ANOMALY_SCORE_THRESHOLD:
-            logger.warning(f"Anomaly detected (score={score})")
-            return {
-                "type": "anomaly",
-                "score": score,
-                "severity": "medium"
-            }
+        if score < self.anomaly_threshold:
+            return self._anomaly_threat(score)
 
         return None
+
+    def _anomaly_vector(self, features):
+        return [features[name] for name in self.ANOMALY_FEATURES]
+
+    def _anomaly_verdicts(self, scored):
+        verdicts = []
+        for (features, flow), score in scored:
+            if flow is not None:
+                flow.anomaly_score = score
+            if score < self.anomaly_threshold:
+                verdicts.append((self._anomaly_threat(score), features))
+        return verdicts
+
+    def _score_anomalies(self, feature_matrix):
+        return self.anomaly_detector.score_samples(feature_matrix)
+
+    def _anomaly_threat(self, score):
+        logger.warning(f"Anomaly detected (score={score})")
+        return {
+            "type": "anomaly",
+            "score": score,
+            "severity": "medium"
+        }
@@ -0,0 +1,88 @@
+import math
+from typing import Optional, Sequence
+
+
+class FlowScoringPolicy:
+    """
+    Decides when a flow needs a fresh anomaly score.
+
+    A flow is scored
+    - on each of its first `first_packets` packets,
+    - every `every_packets` packets after its last score,
+    - whenever a feature moves to a different quantization bucket
+      (`resolution` buckets per doubling of the value),
+    - once more on expiry if packets arrived since its last score.
+
+    Otherwise the verdict cached on the flow record stands, so model
+    invocations grow with the number of flows and their feature
+    changes rather than with the number of packets.
+    """
+
+    def __init__(self, first_packets: int, every_packets: int, resolution: float):
+        self.first_packets = first_packets
+        self.every_packets = every_packets
+        self.resolution = resolution
+
+        # Bumped when the model changes, so every flow's cached
+        # verdict is considered stale
+        self.generation = 0
+
+        self.scored = 0
+        self.skipped = 0
+        self.expiry_scored = 0
+
+    def quantize(self, vector: Sequence[float]) -> tuple:
+        resolution = self.resolution
+        return tuple(
+            int(math.log2(1.0 + abs(value)) * resolution) if value == value else -1
+            for value in vector
+        )
+
+    def should_score(self, flow, vector: Sequence[float],
+                     count: Optional[int] = None) -> bool:
+        """
+        Records the flow's latest features and returns True if they
+        must be scored. Marks the flow as scored in that case, so
+        later packets of the same batch hit the cache.
+
+        `count` is the flow's packet count as of this packet; batch
+        callers pass the row's flow_packets, because flow.packet_count
+        already includes the rest of the batch.
+        """
+        flow.anomaly_vector = vector
+        key = (self.generation,) + self.quantize(vector)
+        if count is None:
+            count = flow.packet_count
+
+        if (count <= self.first_packets
+                or key != flow.score_key
+                or count - flow.scored_at >= self.every_packets):
+            flow.score_key = key
+            flow.scored_at = count
+            self.scored += 1
+            return True
+
+        self.skipped += 1
+        return False
+
+    def invalidate(self):
+        """
+        Forces a fresh score for every flow on its next packet.
+        """
+        self.generation += 1
+
+    def should_score_expired(self, flow) -> bool:
+        if flow.anomaly_vector is None or flow.scored_at == flow.packet_count:
+            return False
+        flow.scored_at = flow.packet_count
+        self.expiry_scored += 1
+        return True
+
+    def stats(self) -> dict:
+        decisions = self.scored + self.skipped
+        return {
+            "scored": self.scored,
+            "expiry_scored": self.expiry_scored,
+            "skipped": self.skipped,
+            "skip_ratio": round(self.skipped / decisions, 4) if decisions else 0.0
+        }
@@ -0,0 +1,109 @@
+import os
+import threading
+from typing import Callable, Dict, Hashable, Optional
+
+from utils.logger import setup_logger
+
+
+logger = setup_logger(
+    name="HotReload",
+    log_file="data/logs/ids_alerts.log"
+)
+
+
+def file_fingerprint(path: str) -> Optional[tuple]:
+    """
+    Cheap change marker for a file: (mtime_ns, size), or None
+    if the file does not exist.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ReloadWatcher:
+    """
+    Background thread that polls watched sources for changes and
+    builds their replacements off the packet path.
+
+    Each source has a fingerprint function (cheap, e.g. mtime) and a
+    loader that fully loads and validates the new version, raising
+    on any problem. Only successfully built objects are published;
+    the detection thread collects them with take_pending() between
+    batches, so a bad file never replaces a working one.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._sources: Dict[str, tuple] = {}
+        self._fingerprints: Dict[str, Hashable] = {}
+        self._pending: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.failures = 0
+
+    def watch(self, name: str, fingerprint: Callable[[], Hashable],
+              loader: Callable[[], object]):
+        """
+        Registers a source. Its current state counts as loaded.
+        """
+        self._sources[name] = (fingerprint, loader)
+        self._fingerprints[name] = fingerprint()
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def take_pending(self) -> Dict[str, object]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    # -----------------------------
+    # Thread
+    # -----------------------------
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="ReloadWatcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def check(self):
+        """
+        Polls every source once (also usable without the thread).
+        """
+        for name, (fingerprint, loader) in self._sources.items():
+            current = fingerprint()
+            if current == self._fingerprints.get(name):
+                continue
+            self._fingerprints[name] = current
+
+            try:
+                loaded = loader()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Rejected new {name}, keeping the active one: {e}")
+                continue
+
+            if loaded is None:
+                continue
+            with self._lock:
+                self._pending[name] = loaded
+            logger.info(f"New {name} validated; switching at the next batch")
@@ -0,0 +1,88 @@
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+
+class AnomalyMicroBatcher:
+    """
+    Collects anomaly feature vectors and scores them in micro-batches.
+
+    A batch is scored in a single call when it reaches `max_batch`
+    rows or when its oldest row has waited `max_latency_ms`. There is
+    no timer thread: the deadline is checked on add() and poll(), so
+    callers that may sit idle should poll at least every
+    time_until_deadline() seconds.
+
+    Every score is returned together with the payload it was queued
+    with, in submission order.
+    """
+
+    def __init__(self, score_fn: Callable[[np.ndarray], np.ndarray],
+                 max_batch: int, max_latency_ms: float,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+
+        self.score_fn = score_fn
+        self.max_batch = max_batch
+        self.max_latency = max_latency_ms / 1000
+        self._clock = clock
+
+        self._vectors = []
+        self._payloads = []
+        self._deadline = None
+
+        self.batches = 0
+        self.scored = 0
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def add(self, vector, payload) -> List[Tuple[object, float]]:
+        """
+        Queues one feature vector. Returns the scored batch if this
+        row filled it or the deadline has passed, otherwise [].
+        """
+        now = self._clock()
+        if not self._vectors:
+            self._deadline = now + self.max_latency
+
+        self._vectors.append(vector)
+        self._payloads.append(payload)
+
+        if len(self._vectors) >= self.max_batch or now >= self._deadline:
+            return self.flush()
+        return []
+
+    def poll(self) -> List[Tuple[object, float]]:
+        """
+        Scores the pending rows if the oldest one is due.
+        """
+        if self._vectors and self._clock() >= self._deadline:
+            return self.flush()
+        return []
+
+    def time_until_deadline(self) -> Optional[float]:
+        """
+        Seconds until the pending batch is due, or None when empty.
+        """
+        if not self._vectors:
+            return None
+        return max(0.0, self._deadline - self._clock())
+
+    def flush(self) -> List[Tuple[object, float]]:
+        """
+        Scores all pending rows regardless of the deadline.
+        """
+        if not self._vectors:
+            return []
+
+        vectors, payloads = self._vectors, self._payloads
+        self._vectors, self._payloads = [], []
+        self._deadline = None
+
+        scores = self.score_fn(np.asarray(vectors, dtype=float))
+        self.batches += 1
+        self.scored += len(payloads)
+        return list(zip(payloads, scores.tolist()))
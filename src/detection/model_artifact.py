@@ -0,0 +1,229 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+ARTIFACT_FORMAT = 1
+CURRENT_FILE = "CURRENT"
+META_FILE = "meta.json"
+
+# Flattened forest, one .npy per array (see export_isolation_forest)
+_ARRAYS = (
+    "roots", "feature", "threshold",
+    "children_left", "children_right", "leaf_path_length"
+)
+
+
+class ModelArtifactError(ValueError):
+    """
+    Raised for a missing, corrupt or incompatible model artifact.
+    """
+
+
+def average_path_length(n_samples):
+    """
+    Expected path length of an unsuccessful BST search over n samples
+    (c(n) in the Isolation Forest paper), elementwise.
+    """
+    n = np.asarray(n_samples, dtype=float)
+    result = np.zeros_like(n)
+    result[n == 2] = 1.0
+    large = n > 2
+    result[large] = (
+        2.0 * (np.log(n[large] - 1.0) + np.euler_gamma)
+        - 2.0 * (n[large] - 1.0) / n[large]
+    )
+    return result
+
+
+# -----------------------------
+# Export
+# -----------------------------
+def export_isolation_forest(model, out_dir: str, feature_schema: Sequence[str],
+                            score_threshold: float, extra: Optional[dict] = None) -> str:
+    """
+    Writes a fitted sklearn IsolationForest as a new version under
+    `out_dir` and points out_dir/CURRENT at it.
+
+    All trees are flattened into shared node arrays with global
+    indices. Leaves point to themselves, so every sample can be
+    walked a fixed number of steps without branching, and each leaf
+    stores its full path length (depth + c(samples in leaf)).
+
+    Returns the path of the version directory.
+    """
+    roots, features, thresholds, lefts, rights, leaf_lengths = [], [], [], [], [], []
+    offset = 0
+
+    for estimator, estimator_features in zip(model.estimators_, model.estimators_features_):
+        tree = estimator.tree_
+        n = tree.node_count
+        left = tree.children_left.astype(np.int64)
+        right = tree.children_right.astype(np.int64)
+        is_leaf = left == -1
+        node_ids = np.arange(n)
+
+        depth = np.zeros(n)
+        for node in range(n):
+            if not is_leaf[node]:
+                depth[left[node]] = depth[node] + 1
+                depth[right[node]] = depth[node] + 1
+
+        # Tree features index the estimator's feature subset
+        feature = np.where(
+            is_leaf, 0, np.asarray(estimator_features)[np.maximum(tree.feature, 0)]
+        )
+
+        roots.append(offset)
+        features.append(feature)
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        lefts.append(np.where(is_leaf, node_ids, left) + offset)
+        rights.append(np.where(is_leaf, node_ids, right) + offset)
+        leaf_lengths.append(np.where(
+            is_leaf, depth + average_path_length(tree.n_node_samples), 0.0
+        ))
+        offset += n
+
+    arrays = {
+        "roots": np.asarray(roots, dtype=np.int32),
+        "feature": np.concatenate(features).astype(np.int32),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "children_left": np.concatenate(lefts).astype(np.int32),
+        "children_right": np.concatenate(rights).astype(np.int32),
+        "leaf_path_length": np.concatenate(leaf_lengths).astype(np.float64)
+    }
+
+    created = datetime.now(timezone.utc)
+    version = created.strftime("%Y%m%dT%H%M%S%fZ")
+    meta = {
+        "format": ARTIFACT_FORMAT,
+        "version": version,
+        "created": created.isoformat(),
+        "model": "isolation_forest",
+        "feature_schema": list(feature_schema),
+        "score_threshold": float(score_threshold),
+        "n_estimators": len(model.estimators_),
+        "max_samples": int(model.max_samples_),
+        "max_depth": int(max(e.tree_.max_depth for e in model.estimators_)),
+        **(extra or {})
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    version_dir = os.path.join(out_dir, version)
+    os.makedirs(version_dir)
+    for name, array in arrays.items():
+        np.save(os.path.join(version_dir, f"{name}.npy"), array)
+    with open(os.path.join(version_dir, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    # Switch CURRENT only once the version is complete
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix=".current-")
+    with os.fdopen(fd, "w") as f:
+        f.write(version + "\n")
+    os.replace(tmp_path, os.path.join(out_dir, CURRENT_FILE))
+
+    return version_dir
+
+
+# -----------------------------
+# Load + score
+# -----------------------------
+def resolve_version_dir(path: str) -> str:
+    """
+    Accepts either a version directory or a model directory with a
+    CURRENT pointer and returns the version directory.
+    """
+    current = os.path.join(path, CURRENT_FILE)
+    if os.path.isfile(current):
+        with open(current, "r") as f:
+            return os.path.join(path, f.read().strip())
+    return path
+
+
+class PersistedIsolationForest:
+    """
+    Isolation Forest scorer backed by a memory-mapped artifact.
+
+    Loading only maps the node arrays and reads meta.json, so it takes
+    milliseconds regardless of forest size. score_samples() walks all
+    trees at once with NumPy and returns the same values as sklearn's
+    IsolationForest.score_samples.
+    """
+
+    def __init__(self, version_dir: str, meta: dict, arrays: dict):
+        self.path = version_dir
+        self.meta = meta
+        self.version = meta["version"]
+        self.feature_schema = tuple(meta["feature_schema"])
+        self.score_threshold = float(meta["score_threshold"])
+
+        # Plain ndarray views of the maps (memmap subclass indexing is slower)
+        self._roots = np.asarray(arrays["roots"])
+        self._feature = np.asarray(arrays["feature"])
+        self._threshold = np.asarray(arrays["threshold"])
+        self._left = np.asarray(arrays["children_left"])
+        self._right = np.asarray(arrays["children_right"])
+        self._leaf_path_length = np.asarray(arrays["leaf_path_length"])
+        self._max_depth = int(meta["max_depth"])
+        self._denominator = (
+            len(self._roots) * float(average_path_length([meta["max_samples"]])[0])
+        )
+
+    @classmethod
+    def load(cls, path: str, expected_schema: Optional[Sequence[str]] = None):
+        version_dir = resolve_version_dir(path)
+        try:
+            with open(os.path.join(version_dir, META_FILE), "r") as f:
+                meta = json.load(f)
+            if meta.get("format") != ARTIFACT_FORMAT:
+                raise ModelArtifactError(
+                    f"Unsupported model artifact format {meta.get('format')!r}"
+                )
+            schema = list(meta["feature_schema"])
+            arrays = {
+                name: np.load(os.path.join(version_dir, f"{name}.npy"), mmap_mode="r")
+                for name in _ARRAYS
+            }
+        except (OSError, ValueError, KeyError) as e:
+            if isinstance(e, ModelArtifactError):
+                raise
+            raise ModelArtifactError(
+                f"Cannot load model artifact {version_dir}: {e}"
+            ) from None
+
+        if expected_schema is not None and schema != list(expected_schema):
+            raise ModelArtifactError(
+                f"Model feature schema {schema} does not match "
+                f"{list(expected_schema)}"
+            )
+
+        return cls(version_dir, meta, arrays)
+
+    def score_samples(self, X) -> np.ndarray:
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != len(self.feature_schema):
+            raise ValueError(
+                f"Expected {len(self.feature_schema)} features per row, got {X.shape}"
+            )
+        if X.shape[0] == 0:
+            return np.empty(0)
+
+        # (samples × trees) current node; leaves loop onto themselves
+        nodes = np.broadcast_to(self._roots, (X.shape[0], len(self._roots)))
+        for _ in range(self._max_depth):
+            values = np.take_along_axis(X, self._feature[nodes], axis=1)
+            nodes = np.where(
+                values <= self._threshold[nodes],
+                self._left[nodes],
+                self._right[nodes]
+            )
+
+        depths = self._leaf_path_length[nodes].sum(axis=1)
+        if self._denominator == 0:
+            return -np.ones(X.shape[0])
+        return -(2.0 ** (-depths / self._denominator))
@@ -0,0 +1,96 @@
+import numpy as np
+
+
+class EwmaAnomalyDetector:
+    """
+    Online anomaly detector: per-feature exponentially weighted mean
+    and variance, scored by z-score. No training step; the baseline
+    is learned from the traffic being scored and keeps adapting.
+
+    Features are compared on a log1p scale, since rates and sizes are
+    heavy-tailed. score_samples() follows the IsolationForest
+    convention (lower is more anomalous): the score of a row is
+    -max(|z|) over its features, so `score_threshold` is -z_threshold.
+
+    Each batch is scored against the state at the start of the batch
+    and then folded into it with one closed-form update, so the cost
+    per sample is constant and the state is two floats per feature.
+    Flagged rows are clipped to mean ± z_threshold · std and learned at
+    `outlier_weight` times the normal rate: a flood does not become the
+    baseline within seconds, but a lasting shift in normal traffic is
+    still absorbed eventually (after some 10^5 samples by default).
+    """
+
+    def __init__(self, n_features: int, alpha: float, z_threshold: float,
+                 warmup: int, min_std: float = 0.05, outlier_weight: float = 0.001):
+        if not 0 < alpha < 1:
+            raise ValueError("alpha must be between 0 and 1")
+
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.score_threshold = -z_threshold
+        self.warmup = warmup
+        self.min_std = min_std
+        self.outlier_weight = outlier_weight
+
+        self.mean = np.zeros(n_features)
+        self.var = np.zeros(n_features)
+        self.samples = 0
+
+    def score_samples(self, X) -> np.ndarray:
+        """
+        Scores the rows, then learns from them.
+        """
+        X = np.log1p(np.abs(np.asarray(X, dtype=float)))
+        if X.ndim != 2 or X.shape[1] != len(self.mean):
+            raise ValueError(f"Expected {len(self.mean)} features per row, got {X.shape}")
+        if X.shape[0] == 0:
+            return np.empty(0)
+
+        alphas = np.full(X.shape[0], self.alpha)
+        if self.samples >= self.warmup:
+            std = np.maximum(np.sqrt(self.var), self.min_std)
+            scores = -np.max(np.abs(X - self.mean) / std, axis=1)
+            outliers = scores < self.score_threshold
+            if outliers.any():
+                alphas[outliers] *= self.outlier_weight
+                bound = self.z_threshold * std
+                X = np.where(
+                    outliers[:, None],
+                    np.clip(X, self.mean - bound, self.mean + bound),
+                    X
+                )
+        else:
+            scores = np.zeros(X.shape[0])
+
+        self._update(X, alphas)
+        return scores
+
+    def _update(self, X, alphas):
+        if self.samples == 0:
+            # Seed the baseline with the first rows
+            self.mean = X.mean(axis=0)
+            self.var = X.var(axis=0)
+            self.samples = X.shape[0]
+            return
+
+        # n sequential EWMA steps at once: row i keeps weight
+        # alpha_i·∏(1-alpha_j) over the later rows j, the old state ∏(1-alpha_j)
+        log_keep = np.log1p(-alphas)
+        later = np.cumsum(log_keep[::-1])[::-1] - log_keep
+        decay = np.exp(later[0] + log_keep[0])
+        weights = alphas * np.exp(later)
+
+        second_moment = self.var + self.mean ** 2
+        self.mean = decay * self.mean + weights @ X
+        second_moment = decay * second_moment + weights @ (X ** 2)
+        self.var = np.maximum(second_moment - self.mean ** 2, 0.0)
+        self.samples += X.shape[0]
+
+    def stats(self) -> dict:
+        return {
+            "samples": self.samples,
+            "warming_up": self.samples < self.warmup,
+            "mean": np.expm1(self.mean).round(3).tolist(),
+            "std_log": np.sqrt(self.var).round(4).tolist()
+        }
@@ -0,0 +1,476 @@
+import ipaddress
+import numbers
+import socket
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from capture.packet_decoder import tcp_flags_from_str
+
+
+# -----------------------------
+# Condition language
+# -----------------------------
+# Each entry in a rule's "conditions" maps a feature to either a bare
+# number (the original "feature > number" form) or an object whose
+# operators must all hold:
+#
+#   {">": 10} {">=": 10} {"<": 10} {"<=": 10} {"==": 80} {"!=": 80}
+#   {"between": [1024, 65535]}          inclusive range
+#   {"in": [22, 23, 3389]}              set membership
+#   {"flags_all": "S"}                  TCP flag bits (letters or bitmask)
+#   {"flags_any": "FPU"} {"flags_none": "A"}
+#   {"cidr": "10.0.0.0/8"}              IPv4 prefix (one or a list)
+RANGE_OPERATORS = (">", ">=", "<", "<=", "==", "between")
+OPERATORS = RANGE_OPERATORS + (
+    "!=", "in", "flags_all", "flags_any", "flags_none", "cidr"
+)
+
+FLAGS_FEATURE = "tcp_flags"
+
+# Fields used to build candidate-rule indexes, in order of preference
+INDEXED_PORT_FEATURES = ("dst_port", "src_port")
+INDEXED_IP_FEATURES = ("dst_ip", "src_ip")
+
+
+class RuleError(ValueError):
+    """
+    Raised for a signature rule that cannot be compiled.
+    """
+
+
+class Condition(NamedTuple):
+    feature: str
+    op: str
+    value: object
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+@lru_cache(maxsize=65536)
+def ipv4_to_int(ip) -> Optional[int]:
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except (OSError, TypeError):
+        return None
+
+
+def _flag_mask(rule_name: str, value) -> int:
+    if isinstance(value, str):
+        try:
+            return tcp_flags_from_str(value)
+        except ValueError as e:
+            raise RuleError(f"Rule '{rule_name}': {e}") from None
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value
+    raise RuleError(f"Rule '{rule_name}': invalid TCP flags {value!r}")
+
+
+def _operand(rule_name: str, feature: str, value):
+    # tcp_flags may be written as letters anywhere a number is expected
+    if feature == FLAGS_FEATURE and isinstance(value, str):
+        return _flag_mask(rule_name, value)
+    return value
+
+
+def parse_conditions(rule_name: str, conditions: dict) -> List[Condition]:
+    """
+    Validates a rule's conditions and normalizes them to a flat list.
+    """
+    if not isinstance(conditions, dict):
+        raise RuleError(f"Rule '{rule_name}': conditions must be an object")
+
+    parsed = []
+    for feature, spec in conditions.items():
+        if _is_number(spec):
+            parsed.append(Condition(feature, ">", float(spec)))
+            continue
+        if not isinstance(spec, dict) or not spec:
+            raise RuleError(
+                f"Rule '{rule_name}': invalid condition for '{feature}': {spec!r}"
+            )
+
+        for op, value in spec.items():
+            if op not in OPERATORS:
+                raise RuleError(f"Rule '{rule_name}': unknown operator '{op}'")
+            parsed.append(
+                Condition(feature, op, _parse_operand(rule_name, feature, op, value))
+            )
+    return parsed
+
+
+def _parse_operand(rule_name: str, feature: str, op: str, value):
+    if op in ("flags_all", "flags_any", "flags_none"):
+        return _flag_mask(rule_name, value)
+
+    if op == "cidr":
+        prefixes = value if isinstance(value, list) else [value]
+        networks = []
+        for prefix in prefixes:
+            try:
+                network = ipaddress.IPv4Network(prefix, strict=False)
+            except (ValueError, TypeError):
+                raise RuleError(
+                    f"Rule '{rule_name}': invalid CIDR {prefix!r}"
+                ) from None
+            length = network.prefixlen
+            networks.append(
+                (length, int(network.network_address) >> (32 - length))
+            )
+        return tuple(networks)
+
+    if op == "in":
+        if not isinstance(value, list) or not value:
+            raise RuleError(f"Rule '{rule_name}': 'in' expects a non-empty list")
+        return frozenset(_operand(rule_name, feature, v) for v in value)
+
+    if op == "between":
+        if (not isinstance(value, list) or len(value) != 2
+                or not all(_is_number(_operand(rule_name, feature, v)) for v in value)):
+            raise RuleError(f"Rule '{rule_name}': 'between' expects [low, high]")
+        low, high = (float(_operand(rule_name, feature, v)) for v in value)
+        return (low, high)
+
+    value = _operand(rule_name, feature, value)
+    if not _is_number(value):
+        raise RuleError(f"Rule '{rule_name}': '{op}' expects a number")
+    return float(value)
+
+
+def _predicate(condition: Condition) -> Callable:
+    op, v = condition.op, condition.value
+
+    if op == ">":
+        return lambda x: x > v
+    if op == ">=":
+        return lambda x: x >= v
+    if op == "<":
+        return lambda x: x < v
+    if op == "<=":
+        return lambda x: x <= v
+    if op == "==":
+        return lambda x: x == v
+    if op == "!=":
+        return lambda x: x != v
+    if op == "between":
+        low, high = v
+        return lambda x: low <= x <= high
+    if op == "in":
+        return lambda x: x in v
+    if op == "flags_all":
+        return lambda x: x & v == v
+    if op == "flags_any":
+        return lambda x: x & v != 0
+    if op == "flags_none":
+        return lambda x: x & v == 0
+
+    def in_networks(x):
+        address = ipv4_to_int(x)
+        return address is not None and any(
+            address >> (32 - length) == network for length, network in v
+        )
+    return in_networks
+
+
+# -----------------------------
+# Compiled rule set
+# -----------------------------
+class CompiledRuleSet:
+    """
+    Signature rules compiled for batch evaluation.
+
+    Rules are split by the kind of conditions they use:
+
+    - Pure range rules (>, >=, <, <=, ==, between) go into bound
+      matrices and a whole batch is evaluated in one vectorized pass
+      per feature.
+    - Rules with an equality / set test on a port, a CIDR test on an
+      address or a required flag bit are indexed on that field, so a
+      packet is only checked against the rules whose key it carries.
+    - Anything else is checked for every packet.
+
+    Results of all three paths are merged into one (packets × rules)
+    boolean mask in rule file order. Missing or non-numeric feature
+    values never satisfy a condition.
+    """
+
+    def __init__(self, rules: Dict[str, dict]):
+        self.rules = rules
+        self.rule_names: List[str] = list(rules)
+        for name in self.rule_names:
+            if not isinstance(rules[name], dict):
+                raise RuleError(f"Rule '{name}': expected an object")
+        self._conditions = [
+            parse_conditions(name, rules[name].get("conditions", {}))
+            for name in self.rule_names
+        ]
+
+        self.vector_rules: List[int] = []
+        self.indexed_rules: List[int] = []
+        self.unindexed_rules: List[int] = []
+
+        self._port_index: Dict[str, Dict[object, List[int]]] = {}
+        self._prefix_index: Dict[str, Dict[int, Dict[int, List[int]]]] = {}
+        self._flag_index: Dict[int, List[int]] = {}
+
+        for r, conditions in enumerate(self._conditions):
+            if self._index_rule(r, conditions):
+                self.indexed_rules.append(r)
+            elif all(c.op in RANGE_OPERATORS for c in conditions):
+                self.vector_rules.append(r)
+            else:
+                self.unindexed_rules.append(r)
+
+        self._compile_vector_rules()
+
+        self._predicates = {
+            r: [(c.feature, _predicate(c)) for c in self._conditions[r]]
+            for r in self.indexed_rules + self.unindexed_rules
+        }
+        self._predicate_features = sorted(
+            {feature for predicates in self._predicates.values()
+             for feature, _ in predicates}
+            | set(self._port_index)
+            | set(self._prefix_index)
+            | ({FLAGS_FEATURE} if self._flag_index else set())
+        )
+
+        self.threat_templates = [
+            {
+                "type": "signature",
+                "name": name,
+                "description": rules[name].get("description"),
+                "severity": rules[name].get("severity"),
+                "mitre_technique": rules[name].get("mitre"),
+                # Optional alert suppression key: flow / source / destination
+                **({"suppress_by": rules[name]["suppress_by"]}
+                   if "suppress_by" in rules[name] else {})
+            }
+            for name in self.rule_names
+        ]
+
+    def __len__(self) -> int:
+        return len(self.rule_names)
+
+    # -----------------------------
+    # Compilation
+    # -----------------------------
+    def _index_rule(self, r: int, conditions: List[Condition]) -> bool:
+        """
+        Files the rule under its most selective indexable condition.
+        """
+        for feature in INDEXED_PORT_FEATURES:
+            for c in conditions:
+                if c.feature != feature:
+                    continue
+                if c.op == "==":
+                    keys = (c.value,)
+                elif c.op == "in":
+                    keys = c.value
+                else:
+                    continue
+                table = self._port_index.setdefault(feature, {})
+                for key in keys:
+                    table.setdefault(key, []).append(r)
+                return True
+
+        for feature in INDEXED_IP_FEATURES:
+            for c in conditions:
+                if c.feature == feature and c.op == "cidr":
+                    by_length = self._prefix_index.setdefault(feature, {})
+                    for length, network in c.value:
+                        by_length.setdefault(length, {}).setdefault(network, []).append(r)
+                    return True
+
+        for c in conditions:
+            if c.feature == FLAGS_FEATURE and c.op == "flags_all" and c.value:
+                self._flag_index.setdefault(c.value, []).append(r)
+                return True
+
+        return False
+
+    def _compile_vector_rules(self):
+        self.features: List[str] = sorted({
+            c.feature for r in self.vector_rules for c in self._conditions[r]
+        })
+        self._feature_index = {name: i for i, name in enumerate(self.features)}
+
+        shape = (len(self.vector_rules), len(self.features))
+        lower_open = np.full(shape, -np.inf)    # x > bound
+        lower_closed = np.full(shape, -np.inf)  # x >= bound
+        upper_open = np.full(shape, np.inf)     # x < bound
+        upper_closed = np.full(shape, np.inf)   # x <= bound
+        self.used = np.zeros(shape, dtype=bool)
+
+        for v, r in enumerate(self.vector_rules):
+            for c in self._conditions[r]:
+                f = self._feature_index[c.feature]
+                self.used[v, f] = True
+                if c.op == ">":
+                    lower_open[v, f] = max(lower_open[v, f], c.value)
+                elif c.op == ">=":
+                    lower_closed[v, f] = max(lower_closed[v, f], c.value)
+                elif c.op == "<":
+                    upper_open[v, f] = min(upper_open[v, f], c.value)
+                elif c.op == "<=":
+                    upper_closed[v, f] = min(upper_closed[v, f], c.value)
+                else:
+                    low, high = c.value if c.op == "between" else (c.value, c.value)
+                    lower_closed[v, f] = max(lower_closed[v, f], low)
+                    upper_closed[v, f] = min(upper_closed[v, f], high)
+
+        # Per feature, only the comparisons some rule actually uses
+        self._vector_tests = []
+        for f in range(len(self.features)):
+            tests = [
+                (op, bounds[:, f])
+                for op, bounds, default in (
+                    (np.greater, lower_open, -np.inf),
+                    (np.greater_equal, lower_closed, -np.inf),
+                    (np.less, upper_open, np.inf),
+                    (np.less_equal, upper_closed, np.inf)
+                )
+                if np.any(bounds[:, f] != default)
+            ]
+            self._vector_tests.append((f, tests, ~self.used[:, f]))
+
+    # -----------------------------
+    # Input conversion
+    # -----------------------------
+    def matrix_from_records(self, records: np.ndarray) -> np.ndarray:
+        """
+        Builds the (packets × features) float matrix for the vectorized
+        rules from a structured array. Absent or non-numeric features
+        become NaN.
+        """
+        matrix = np.full((len(records), len(self.features)), np.nan)
+        names = records.dtype.names or ()
+        for f, name in enumerate(self.features):
+            if name in names and records.dtype[name].kind in "biuf":
+                matrix[:, f] = records[name]
+        return matrix
+
+    def matrix_from_dict(self, features: dict) -> np.ndarray:
+        row = np.full((1, len(self.features)), np.nan)
+        for f, name in enumerate(self.features):
+            value = self._dict_value(features, name)
+            if _is_number(value):
+                row[0, f] = value
+        return row
+
+    @staticmethod
+    def _dict_value(features: dict, name: str):
+        value = features.get(name)
+        # analyze() reports flags in Scapy's letter notation
+        if name == FLAGS_FEATURE and isinstance(value, str):
+            try:
+                return tcp_flags_from_str(value)
+            except ValueError:
+                return None
+        return value
+
+    # -----------------------------
+    # Evaluation
+    # -----------------------------
+    def match_records(self, records: np.ndarray) -> np.ndarray:
+        """
+        Returns the (packets × rules) match mask for a structured array
+        of feature rows.
+        """
+        mask = np.zeros((len(records), len(self.rule_names)), dtype=bool)
+        if len(records) == 0:
+            return mask
+
+        if self.vector_rules:
+            mask[:, self.vector_rules] = self.match(self.matrix_from_records(records))
+
+        if self._predicates:
+            names = records.dtype.names or ()
+            present = [name for name in self._predicate_features if name in names]
+            columns = [records[name].tolist() for name in present]
+            for i, values in enumerate(zip(*columns)):
+                for r in self._matching_predicate_rules(dict(zip(present, values))):
+                    mask[i, r] = True
+
+        return mask
+
+    def match_features(self, features: dict) -> np.ndarray:
+        """
+        Returns the (1 × rules) match mask for a single feature dict.
+        """
+        mask = np.zeros((1, len(self.rule_names)), dtype=bool)
+
+        if self.vector_rules:
+            mask[:, self.vector_rules] = self.match(self.matrix_from_dict(features))
+
+        if self._predicates:
+            row = {}
+            for name in self._predicate_features:
+                value = self._dict_value(features, name)
+                if value is not None and not isinstance(value, bool):
+                    row[name] = value
+            for r in self._matching_predicate_rules(row):
+                mask[0, r] = True
+
+        return mask
+
+    def match(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Returns the (packets × vectorized rules) mask for a matrix built
+        by matrix_from_records() / matrix_from_dict().
+        """
+        mask = np.ones((matrix.shape[0], len(self.vector_rules)), dtype=bool)
+        for f, tests, unused in self._vector_tests:
+            column = matrix[:, f:f + 1]
+            satisfied = np.ones_like(mask)
+            for op, bounds in tests:
+                satisfied &= op(column, bounds)
+            mask &= satisfied | unused
+        return mask
+
+    def candidates(self, row: dict) -> List[int]:
+        """
+        Returns the non-vectorized rules that could match this row.
+        """
+        found = list(self.unindexed_rules)
+
+        for feature, table in self._port_index.items():
+            value = row.get(feature)
+            if value is not None:
+                found.extend(table.get(value, ()))
+
+        for feature, by_length in self._prefix_index.items():
+            address = ipv4_to_int(row.get(feature))
+            if address is None:
+                continue
+            for length, networks in by_length.items():
+                found.extend(networks.get(address >> (32 - length), ()))
+
+        flags = row.get(FLAGS_FEATURE)
+        if self._flag_index and isinstance(flags, int):
+            for required, rules in self._flag_index.items():
+                if flags & required == required:
+                    found.extend(rules)
+
+        return found
+
+    def _matching_predicate_rules(self, row: dict):
+        for r in self.candidates(row):
+            for feature, test in self._predicates[r]:
+                value = row.get(feature)
+                try:
+                    if value is None or not test(value):
+                        break
+                except TypeError:
+                    break
+            else:
+                yield r
+
+    def threats(self, mask_row: np.ndarray) -> List[dict]:
+        """
+        Converts one row of the match mask into threat dicts.
+        """
+        return [dict(self.threat_templates[r]) for r in np.flatnonzero(mask_row)]
@@ -0,0 +1,138 @@
+"""
+Anomaly Model Training
+======================
+Fits the Isolation Forest on baseline (attack-free) traffic and saves
+a versioned artifact that DetectionEngine loads at startup.
+
+The score threshold is calibrated so that ANOMALY_CONTAMINATION of
+the baseline rows would be flagged.
+
+Usage (from src/):
+    python -m detection.train_model --pcap ../data/pcaps/baseline.pcap
+    python -m detection.train_model --pcap a.pcap --pcap b.pcap --out ../data/models/anomaly_model
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+from analysis.traffic_analyzer import TrafficAnalyzer
+from capture.pcap_reader import PCAPReader
+from config.settings import ANOMALY_CONTAMINATION, ANOMALY_MODEL_PATH, BATCH_SIZE
+from detection.detection_engine import DetectionEngine
+from detection.model_artifact import PersistedIsolationForest, export_isolation_forest
+from utils.logger import setup_logger
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logger = setup_logger(
+    name="TrainModel",
+    log_file=os.path.join(BASE_DIR, "data", "logs", "ids_alerts.log")
+)
+
+
+def extract_training_matrix(pcap_files) -> np.ndarray:
+    """
+    Runs each PCAP through TrafficAnalyzer and returns the anomaly
+    feature columns as one (rows × features) matrix.
+    """
+    columns = DetectionEngine.ANOMALY_FEATURES
+    blocks = []
+
+    for pcap_file in pcap_files:
+        analyzer = TrafficAnalyzer()
+        batch = []
+        for packet in PCAPReader(pcap_file).read_packets():
+            batch.append(packet)
+            if len(batch) >= BATCH_SIZE:
+                records = analyzer.analyze_batch(batch)
+                blocks.append(np.column_stack([records[name] for name in columns]))
+                batch = []
+        if batch:
+            records = analyzer.analyze_batch(batch)
+            blocks.append(np.column_stack([records[name] for name in columns]))
+
+    if not blocks:
+        return np.empty((0, len(columns)))
+    return np.concatenate(blocks).astype(float)
+
+
+def train(pcap_files, out_dir, contamination=ANOMALY_CONTAMINATION,
+          n_estimators=100, max_samples=256, seed=42) -> str:
+    """
+    Fits, calibrates, exports and verifies a model.
+    Returns the artifact version directory.
+    """
+    X = extract_training_matrix(pcap_files)
+    if len(X) < 2:
+        raise ValueError("Not enough TCP/IPv4 packets in the baseline to train on")
+    logger.info(f"Training anomaly model on {len(X)} rows from {len(pcap_files)} file(s)")
+
+    model = IsolationForest(
+        n_estimators=n_estimators,
+        max_samples=min(max_samples, len(X)),
+        contamination=contamination,
+        random_state=seed
+    )
+    model.fit(X)
+
+    scores = model.score_samples(X)
+    threshold = float(np.quantile(scores, contamination))
+
+    version_dir = export_isolation_forest(
+        model,
+        out_dir,
+        DetectionEngine.ANOMALY_FEATURES,
+        threshold,
+        extra={
+            "contamination": contamination,
+            "training_rows": int(len(X)),
+            "training_files": [os.path.basename(p) for p in pcap_files]
+        }
+    )
+
+    # The artifact must reproduce sklearn's scores exactly
+    exported = PersistedIsolationForest.load(version_dir).score_samples(X)
+    if not np.allclose(exported, scores, rtol=0, atol=1e-9):
+        raise RuntimeError("Exported model does not reproduce sklearn scores")
+
+    logger.info(
+        f"Anomaly model saved to {version_dir} "
+        f"(threshold={threshold:.4f}, flagged={np.mean(scores < threshold):.2%})"
+    )
+    return version_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--pcap", action="append", required=True,
+                        help="baseline capture (repeat for several files)")
+    parser.add_argument("--out", default=os.path.join(BASE_DIR, ANOMALY_MODEL_PATH))
+    parser.add_argument("--contamination", type=float, default=ANOMALY_CONTAMINATION)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--max-samples", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    version_dir = train(
+        args.pcap, args.out, args.contamination,
+        args.trees, args.max_samples, args.seed
+    )
+
+    start_load = time.perf_counter()
+    model = PersistedIsolationForest.load(args.out, DetectionEngine.ANOMALY_FEATURES)
+    load_ms = (time.perf_counter() - start_load) * 1000
+
+    print(f"Model version:   {model.version}")
+    print(f"Artifact:        {version_dir}")
+    print(f"Score threshold: {model.score_threshold:.4f}")
+    print(f"Training time:   {time.perf_counter() - start:.2f}s")
+    print(f"Load time:       {load_ms:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
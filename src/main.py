@@ -1,6 +1,5 @@
 from capture.pcap_reader import PCAPReader
 import time
-import queue
 import os
 
 from scapy.all import IP, TCP  # type: ignore[import-untyped]
@@ -9,7 +8,16 @@ from capture.packet_capture import PacketCapture
 from analysis.traffic_analyzer import TrafficAnalyzer
 from detection.detection_engine import DetectionEngine
 from alerts.alert_system import AlertSystem
-from config.settings import NETWORK_INTERFACE
+from alerts.suppression import AlertSuppressor
+from pipeline.batch_ingest import BatchPcapIngestor
+from pipeline.sharded import ShardedPipeline
+from config.settings import (
+    NETWORK_INTERFACE, BATCH_SIZE, BATCH_TIMEOUT_MS,
+    SHARD_WORKERS, SHARD_BATCH_SIZE,
+    BATCH_INGEST_WORKERS, BATCH_CHECKPOINT_DIR,
+    ALERT_COOLDOWN, ALERT_SUPPRESSION_KEY, ALERT_SUPPRESSION_MAX_KEYS,
+    HOT_RELOAD
+)
 from utils.logger import setup_logger
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -32,16 +40,28 @@ class IntrusionDetectionSystem:
         mode:
         - 'test'  -> mock packets for development
         - 'live'  -> live packet capture (Linux + Windows)
+        - 'sharded' -> live capture analysed by multiple worker processes
         - 'pcap'  -> offline PCAP file analysis
+        - 'batch' -> offline analysis of a directory of PCAP files
         """
         self.mode = mode
 
+        self.signature_file = os.path.join(
+            BASE_DIR, "data", "signatures", "signature_rules.json"
+        )
         self.packet_capture = PacketCapture()
         self.traffic_analyzer = TrafficAnalyzer()
-        self.detection_engine = DetectionEngine(
-            os.path.join(BASE_DIR, "data", "signatures", "signature_rules.json")
-        )
+        self.detection_engine = DetectionEngine(self.signature_file)
         self.alert_system = AlertSystem()
+        self.alert_suppressor = AlertSuppressor(
+            ALERT_COOLDOWN, ALERT_SUPPRESSION_MAX_KEYS, ALERT_SUPPRESSION_KEY
+        )
+
+        # Per-flow anomaly scoring re-scores flows as they expire
+        self.detection_engine.track_flows(self.traffic_analyzer.flows)
+        # Packet time of the last analysed batch, for alerts on
+        # flows that expire after it
+        self._last_packet_time = None
 
         logger.info(f"IDS initialized in {self.mode.upper()} mode")
 
@@ -57,15 +77,42 @@ class IntrusionDetectionSystem:
 
         reader = PCAPReader(pcap_file_path)
 
+        batch = []
         for packet in reader.read_packets():
-            features = self.traffic_analyzer.analyze(packet)
-            threats = self.detection_engine.detect(features)
-
-            for threat in threats:
-                self.alert_system.generate_alert(threat, features)
+            batch.append(packet)
+            if len(batch) >= BATCH_SIZE:
+                self._process_batch(batch)
+                batch = []
+        self._process_batch(batch)
+        self._finish_flows()
+        self._flush_alerts()
 
         logger.info("PCAP analysis completed")
 
+    # -----------------------------
+    # BATCH MODE (DIRECTORY OF PCAPS)
+    # -----------------------------
+    def run_batch_mode(self, path_or_glob, workers=BATCH_INGEST_WORKERS,
+                       checkpoint_dir=BATCH_CHECKPOINT_DIR):
+        """
+        Runs IDS over a directory or glob of PCAP files in parallel.
+        Alerts from all files are sent in packet-timestamp order.
+        Re-running the same job resumes from the checkpoint.
+        """
+        logger.info(f"Running IDS in BATCH mode: {path_or_glob}")
+
+        ingestor = BatchPcapIngestor(
+            self.signature_file,
+            workers,
+            os.path.join(BASE_DIR, checkpoint_dir)
+        )
+
+        for timestamp, threat, features in ingestor.run(path_or_glob):
+            self._emit(threat, features, timestamp)
+        self._flush_alerts()
+
+        logger.info("Batch analysis completed")
+
 
 
     # -----------------------------
@@ -95,13 +142,15 @@ class IntrusionDetectionSystem:
             packet.time = time.time() - start_time
 
             features = self.traffic_analyzer.analyze(packet)
-            threats = self.detection_engine.detect(features)
-
-            for threat in threats:
-                self.alert_system.generate_alert(threat, features)
+            self._alert_all(self.detection_engine.detect_stream(
+                features, self.traffic_analyzer.current_flow
+            ))
 
-            time.sleep(0.5)
+            self._wait_polling_anomalies(0.5)
 
+        self._alert_all(self.detection_engine.flush_anomalies())
+        self._finish_flows()
+        self._flush_alerts()
         logger.info("TEST mode completed")
 
     # -----------------------------
@@ -119,45 +168,190 @@ class IntrusionDetectionSystem:
             f"Capture limit: {self.packet_capture._max_packets} packets"
         )
 
+        self._start_hot_reload()
         self.packet_capture.start(NETWORK_INTERFACE)
+        packet_buffer = self.packet_capture.packet_buffer
+        batch_timeout = BATCH_TIMEOUT_MS / 1000
 
         try:
             while True:
-                # Check if capture limit reached AND queue is empty
-                if self.packet_capture.has_reached_limit() and self.packet_capture.packet_queue.empty():
-                    count = self.packet_capture.packet_count
-                    logger.info(
-                        f"\n{'='*50}\n"
-                        f"  CAPTURE COMPLETE: {count} packets captured\n"
-                        f"  Capture stopped automatically.\n"
-                        f"  Analyze results on the IDS Dashboard.\n"
-                        f"{'='*50}"
-                    )
-                    print(
-                        f"\n{'='*50}\n"
-                        f"  CAPTURE COMPLETE: {count} packets captured\n"
-                        f"  Capture stopped automatically.\n"
-                        f"  Open the IDS Dashboard to analyze results.\n"
-                        f"{'='*50}\n"
-                    )
+                # Check if capture limit reached AND buffer is empty
+                if self.packet_capture.has_reached_limit() and packet_buffer.empty():
+                    self._finish_flows()
+                    self._flush_alerts()
+                    self._announce_capture_complete()
                     self.packet_capture.stop()
                     break
 
-                try:
-                    packet = self.packet_capture.packet_queue.get(timeout=1)
-                    features = self.traffic_analyzer.analyze(packet)
-                    threats = self.detection_engine.detect(features)
+                self._process_batch(
+                    packet_buffer.drain(BATCH_SIZE, batch_timeout)
+                )
+                self._emit_due_summaries()
+                self.packet_capture.report_drops()
+
+        except KeyboardInterrupt:
+            logger.info("Stopping IDS...")
+            self.packet_capture.stop()
+            self._flush_alerts()
+
+    # -----------------------------
+    # SHARDED LIVE MODE (MULTI-CORE)
+    # -----------------------------
+    def run_sharded_mode(self, num_workers=SHARD_WORKERS):
+        """
+        Runs live capture with analysis spread across worker
+        processes. Packets are routed by source address, so each
+        worker owns a disjoint part of the flow table; alerts
+        are sent from this process only.
+        """
+        logger.info(f"Running IDS in SHARDED mode ({num_workers} workers)")
+
+        pipeline = ShardedPipeline(self.signature_file, num_workers, SHARD_BATCH_SIZE)
+        pipeline.start()
+        # Workers run what this process loaded, from the first packet on
+        pipeline.switch_versions(self.detection_engine.active_definitions())
+        self._start_hot_reload()
+        self.packet_capture.start(NETWORK_INTERFACE)
+        packet_buffer = self.packet_capture.packet_buffer
+        batch_timeout = BATCH_TIMEOUT_MS / 1000
+
+        try:
+            while True:
+                if self.packet_capture.has_reached_limit() and packet_buffer.empty():
+                    self._announce_capture_complete()
+                    self.packet_capture.stop()
+                    break
+
+                for packet in packet_buffer.drain(BATCH_SIZE, batch_timeout):
+                    pipeline.submit(packet)
+                pipeline.flush()
+
+                self._alert_all(pipeline.collect())
+                self._emit_due_summaries()
 
-                    for threat in threats:
-                        self.alert_system.generate_alert(threat, features)
+                # Only this process watches; workers switch when told
+                if self.detection_engine.apply_reloads():
+                    pipeline.switch_versions(self.detection_engine.active_definitions())
 
-                except queue.Empty:
-                    continue
+                self.packet_capture.report_drops()
 
         except KeyboardInterrupt:
             logger.info("Stopping IDS...")
             self.packet_capture.stop()
 
+        finally:
+            self._alert_all(pipeline.stop())
+            self._flush_alerts()
+
+    def _start_hot_reload(self):
+        """
+        Watches the rule file and model for changes and reports the
+        active versions to the backend now and after every switch.
+        """
+        if not HOT_RELOAD:
+            return
+        engine = self.detection_engine
+        engine.add_reload_listener(self.alert_system.report_engine_status)
+        engine.start_watching()
+        self.alert_system.report_engine_status(engine.active_versions())
+
+    def _process_batch(self, packets):
+        """
+        Extracts features for a batch of packets, runs detection on
+        the whole batch and alerts on the rows that matched.
+        """
+        if not packets:
+            return
+
+        records = self.traffic_analyzer.analyze_batch(packets)
+        results = self.detection_engine.detect_batch(
+            records, self.traffic_analyzer.batch_flows
+        )
+
+        for row, threats in zip(records, results):
+            if not threats:
+                continue
+            features = self.traffic_analyzer.features_from_row(row)
+            for threat in threats:
+                self._emit(threat, features, float(row["timestamp"]))
+
+        if len(records):
+            self._last_packet_time = float(records[-1]["timestamp"])
+        self._alert_all(
+            self.detection_engine.expired_flow_verdicts(), self._last_packet_time
+        )
+
+    def _finish_flows(self):
+        """
+        Expires all flows so per-flow scoring gives its final
+        verdicts, and reports how many model calls were avoided.
+        """
+        self.traffic_analyzer.flows.expire_all()
+        self._alert_all(
+            self.detection_engine.expired_flow_verdicts(), self._last_packet_time
+        )
+        logger.info(
+            f"Anomaly scoring: {self.detection_engine.anomaly_scoring_stats()}"
+        )
+
+    def _emit(self, threat, features, timestamp=None):
+        """
+        Passes a detection through the suppression layer and sends
+        whatever alerts (first hits, summaries) it lets through.
+        """
+        for alert in self.alert_suppressor.filter(threat, features, timestamp):
+            self.alert_system.generate_alert(*alert)
+
+    def _alert_all(self, detections, timestamp=None):
+        for threat, features in detections:
+            self._emit(threat, features, timestamp)
+
+    def _emit_due_summaries(self):
+        for alert in self.alert_suppressor.flush_due():
+            self.alert_system.generate_alert(*alert)
+
+    def _flush_alerts(self):
+        """
+        Sends the remaining summaries and waits (briefly) for the
+        background sender to deliver what is queued.
+        """
+        for alert in self.alert_suppressor.flush_all():
+            self.alert_system.generate_alert(*alert)
+        logger.info(f"Alert suppression: {self.alert_suppressor.stats()}")
+        self.alert_system.flush()
+
+    def _wait_polling_anomalies(self, seconds):
+        """
+        Sleeps for `seconds`, waking up to deliver anomaly verdicts
+        whose micro-batch deadline falls inside the wait.
+        """
+        end = time.monotonic() + seconds
+        while True:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            due = self.detection_engine.anomaly_batcher.time_until_deadline()
+            time.sleep(remaining if due is None else min(remaining, due))
+            self._alert_all(self.detection_engine.poll_anomalies())
+
+    def _announce_capture_complete(self):
+        count = self.packet_capture.packet_count
+        logger.info(f"Flow table: {self.traffic_analyzer.flows.stats()}")
+        logger.info(
+            f"\n{'='*50}\n"
+            f"  CAPTURE COMPLETE: {count} packets captured\n"
+            f"  Capture stopped automatically.\n"
+            f"  Analyze results on the IDS Dashboard.\n"
+            f"{'='*50}"
+        )
+        print(
+            f"\n{'='*50}\n"
+            f"  CAPTURE COMPLETE: {count} packets captured\n"
+            f"  Capture stopped automatically.\n"
+            f"  Open the IDS Dashboard to analyze results.\n"
+            f"{'='*50}\n"
+        )
+
 
 # -----------------------------
 # Program Entry Point
@@ -167,7 +361,9 @@ if __name__ == "__main__":
     Change mode here:
     - mode="test"  -> mock packets (any OS)
     - mode="live"  -> live capture (Linux + Windows)
+    - mode="sharded" -> live capture on multiple cores
     - mode="pcap"  -> offline PCAP file analysis
+    - mode="batch" -> offline analysis of a PCAP directory
     """
 
     # FOR PCAP MODE UNCOMMENT BELOW:
@@ -178,11 +374,21 @@ if __name__ == "__main__":
     #ids.run_pcap_mode(pcap_path)
 
 
+    #FOR BATCH MODE (DIRECTORY OF PCAPS) UNCOMMENT BELOW:
+    # ids = IntrusionDetectionSystem(mode="batch")
+    # ids.run_batch_mode(os.path.join(BASE_DIR, "data", "pcaps"))
+
+
     #FOR TEST MODE UNCOMMENT BELOW:
     # ids = IntrusionDetectionSystem(mode="test")
     # ids.run_test_mode()
 
 
+    #FOR MULTI-CORE LIVE MODE UNCOMMENT BELOW:
+    # ids = IntrusionDetectionSystem(mode="sharded")
+    # ids.run_sharded_mode()
+
+
     #FOR LIVE MODE UNCOMMENT BELOW:
     ids = IntrusionDetectionSystem(mode="live")
     ids.run_live_mode()
@@ -0,0 +1,420 @@
+import glob
+import hashlib
+import heapq
+import json
+import os
+import re
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+
+from analysis.traffic_analyzer import TrafficAnalyzer
+from capture.packet_decoder import decode_frame
+from capture.pcap_stream import (
+    PCAP_MAGIC_NSEC, PCAP_MAGIC_USEC, PCAPNG_SHB, PcapStream
+)
+from config.settings import BATCH_WARM_UP_SECONDS
+from detection.detection_engine import DetectionEngine
+from utils.logger import setup_logger
+
+
+logger = setup_logger(
+    name="BatchIngest",
+    log_file="data/logs/ids_alerts.log"
+)
+
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+# First four bytes of classic pcap (both byte orders, µs and ns) and pcapng
+_CAPTURE_MAGICS = {
+    struct.pack(endian + "I", magic)
+    for endian in ("<", ">")
+    for magic in (PCAP_MAGIC_USEC, PCAP_MAGIC_NSEC, PCAPNG_SHB)
+}
+# Also matches rotations (capture.pcap1, capture.pcap.1, ...)
+_CAPTURE_EXTENSION = re.compile(r"\.(pcap|pcapng|cap)(\.?\d+)?$", re.IGNORECASE)
+
+# Explicit rotation suffixes; the rest of the name identifies the capture
+_ROTATION_PATTERNS = (
+    # tcpdump -C / logrotate: capture.pcap, capture.pcap1, capture.pcap.2
+    re.compile(r"^(?P<base>.+\.(?:pcap|pcapng|cap))\.?\d+$", re.IGNORECASE),
+    # dumpcap -b ring buffer: capture_00001_20240101120000.pcapng
+    re.compile(r"^(?P<stem>.+)_\d{5}_\d{14}(?P<ext>\.(?:pcap|pcapng|cap))$", re.IGNORECASE),
+)
+
+# Raised by PcapStream for files that are not (or no longer) readable captures
+_CAPTURE_ERRORS = (ValueError, OSError, struct.error)
+
+
+# -----------------------------
+# File discovery
+# -----------------------------
+def discover_capture_files(path_or_glob: str) -> List[str]:
+    """
+    Expands a directory or glob pattern into a sorted list
+    of capture files.
+
+    Only files with a pcap/pcapng extension or magic number are
+    kept, so notes and other files next to the captures are skipped.
+    """
+    if os.path.isdir(path_or_glob):
+        candidates = [
+            os.path.join(path_or_glob, name)
+            for name in os.listdir(path_or_glob)
+        ]
+    else:
+        candidates = glob.glob(path_or_glob)
+
+    files = []
+    for path in candidates:
+        if not os.path.isfile(path):
+            continue
+        if is_capture_file(path):
+            files.append(os.path.abspath(path))
+        else:
+            logger.info(f"Skipping non-capture file {os.path.basename(path)}")
+    return sorted(files)
+
+
+def is_capture_file(path: str) -> bool:
+    """
+    True for files named like a capture or starting with
+    a pcap/pcapng magic number.
+    """
+    if _CAPTURE_EXTENSION.search(path):
+        return True
+    try:
+        with open(path, "rb") as f:
+            return f.read(4) in _CAPTURE_MAGICS
+    except OSError:
+        return False
+
+
+def _first_timestamp(path: str) -> float:
+    try:
+        for record in PcapStream(path):
+            return record.timestamp
+    except _CAPTURE_ERRORS as e:
+        logger.warning(f"Cannot read {path}: {e}")
+    return float("inf")
+
+
+def rotation_base(name: str) -> str:
+    """
+    File name without its rotation suffix (the name itself if it
+    has none): capture.pcap3 -> capture.pcap,
+    ring_00002_20240101120000.pcapng -> ring.pcapng.
+    """
+    for pattern in _ROTATION_PATTERNS:
+        match = pattern.match(name)
+        if match:
+            groups = match.groupdict()
+            return groups.get("base") or groups["stem"] + groups["ext"]
+    return name
+
+
+def group_rotations(files: List[str]) -> List[List[str]]:
+    """
+    Groups rotations of the same capture into chains ordered by
+    their first packet.
+
+    Only explicit rotation suffixes count (see rotation_base), so
+    host1.pcap and host2.pcap stay separate captures.
+    """
+    groups: Dict[str, List[str]] = {}
+    for path in files:
+        key = os.path.join(os.path.dirname(path), rotation_base(os.path.basename(path)))
+        groups.setdefault(key, []).append(path)
+
+    return [
+        sorted(chain, key=_first_timestamp)
+        for chain in groups.values()
+    ]
+
+
+def warm_up_files(chain: List[str], index: int, first_timestamps: Dict[str, float]) -> List[str]:
+    """
+    Earlier rotations of chain[index] holding packets from the last
+    BATCH_WARM_UP_SECONDS before its first packet, oldest first.
+    """
+    if index == 0:
+        return []
+    since = first_timestamps[chain[index]] - BATCH_WARM_UP_SECONDS
+    files = []
+    for path in reversed(chain[:index]):
+        files.append(path)
+        if first_timestamps[path] <= since:
+            break
+    files.reverse()
+    return files
+
+
+def _last_readable(chain: List[str], first_timestamps: Dict[str, float]) -> int:
+    # Unreadable files sort last; the capture ends with the last readable one
+    for i in range(len(chain) - 1, 0, -1):
+        if first_timestamps[chain[i]] != float("inf"):
+            return i
+    return 0
+
+
+def alerts_path(checkpoint_dir: str, path: str) -> str:
+    digest = hashlib.sha1(path.encode()).hexdigest()[:16]
+    return os.path.join(checkpoint_dir, f"{digest}.alerts.ndjson")
+
+
+# -----------------------------
+# Worker
+# -----------------------------
+def _process_file(path: str, previous: List[str], last_in_chain: bool,
+                  signature_file: str, chunk_size: int, checkpoint_dir: str) -> dict:
+    """
+    Processes one capture file and writes its alerts, in timestamp
+    order, to its alerts file in `checkpoint_dir`.
+
+    Rotations of one capture are processed in parallel like separate
+    files. To keep flows that cross a rotation boundary, the last
+    BATCH_WARM_UP_SECONDS of the `previous` rotations are replayed
+    first (their alerts belong to those files and are dropped). Flows
+    still open at the end are expired only for the last file of a
+    chain; otherwise the next rotation reports them.
+
+    A file that cannot be read is reported with an "error".
+    """
+    started = time.perf_counter()
+    analyzer = TrafficAnalyzer()
+    engine = DetectionEngine(signature_file)
+    engine.track_flows(analyzer.flows)
+
+    since = _first_timestamp(path) - BATCH_WARM_UP_SECONDS
+    for earlier in previous:
+        try:
+            for chunk in PcapStream(earlier, start_time=since).read_chunks(chunk_size):
+                _detect_chunk(chunk, analyzer, engine)
+        except _CAPTURE_ERRORS as e:
+            logger.warning(f"Cannot replay {os.path.basename(earlier)} before "
+                           f"{os.path.basename(path)}: {e}")
+
+    packets = 0
+    alerts = []
+    chunk_end = 0.0
+    try:
+        for chunk in PcapStream(path).read_chunks(chunk_size):
+            records, detections, expired = _detect_chunk(chunk, analyzer, engine)
+            packets += len(records)
+            if not len(records):
+                continue
+            chunk_end = float(records[-1]["timestamp"])
+            for row, threats in zip(records, detections):
+                if threats:
+                    features = analyzer.features_from_row(row)
+                    alerts.extend(
+                        (float(row["timestamp"]), threat, features)
+                        for threat in threats
+                    )
+            alerts.extend((chunk_end, threat, features) for threat, features in expired)
+    except _CAPTURE_ERRORS as e:
+        logger.error(f"Failed to process {os.path.basename(path)}: {e}")
+        return {"path": path, "error": str(e)}
+
+    if last_in_chain:
+        # End of the capture: final per-flow verdicts
+        analyzer.flows.expire_all()
+        alerts.extend(
+            (chunk_end, threat, features)
+            for threat, features in engine.expired_flow_verdicts()
+        )
+
+    alerts.sort(key=lambda alert: alert[0])
+    target = alerts_path(checkpoint_dir, path)
+    with open(target + ".tmp", "w") as f:
+        for ts, threat, features in alerts:
+            f.write(json.dumps([ts, threat, features], default=float) + "\n")
+    os.replace(target + ".tmp", target)
+
+    return {
+        "path": path,
+        "packets": packets,
+        "alerts": len(alerts),
+        "elapsed": time.perf_counter() - started
+    }
+
+
+def _detect_chunk(chunk, analyzer: TrafficAnalyzer, engine: DetectionEngine):
+    """
+    Decodes and analyzes one chunk of records. Returns the feature
+    rows, their threats and the verdicts of flows that expired.
+    """
+    headers = [
+        header for header in (
+            decode_frame(r.data, r.timestamp, r.linktype) for r in chunk
+        )
+        if header is not None
+    ]
+    records = analyzer.analyze_batch(headers)
+    detections = engine.detect_batch(records, analyzer.batch_flows)
+    return records, detections, engine.expired_flow_verdicts()
+
+
+# -----------------------------
+# Orchestration
+# -----------------------------
+class BatchPcapIngestor:
+    """
+    Processes a directory (or glob) of capture files in a process
+    pool, one file per task, and merges their alerts into timestamp
+    order.
+
+    Progress is checkpointed per file as soon as it finishes: its
+    alerts are written to `checkpoint_dir` by the worker, so a re-run
+    only processes what is left. Files that could not be read are
+    recorded as failed and retried by the next run.
+    """
+
+    def __init__(self, signature_file: str, workers: int, checkpoint_dir: str,
+                 chunk_size: int = 1024):
+        self.signature_file = signature_file
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.checkpoint_dir = checkpoint_dir
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        self._checkpoint = self._load_checkpoint()
+
+    # -----------------------------
+    # Checkpointing
+    # -----------------------------
+    def _checkpoint_path(self) -> str:
+        return os.path.join(self.checkpoint_dir, CHECKPOINT_FILE)
+
+    def _load_checkpoint(self) -> dict:
+        try:
+            with open(self._checkpoint_path(), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint: {e}")
+            return {}
+
+    def _save_checkpoint(self):
+        tmp_path = self._checkpoint_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._checkpoint, f, indent=2)
+        os.replace(tmp_path, self._checkpoint_path())
+
+    def _alerts_path(self, path: str) -> str:
+        return alerts_path(self.checkpoint_dir, path)
+
+    def _is_done(self, path: str) -> bool:
+        entry = self._checkpoint.get(path)
+        if entry is None or "failed" in entry:
+            return False
+        stat = os.stat(path)
+        return entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime
+
+    def _record_done(self, result: dict):
+        stat = os.stat(result["path"])
+        self._checkpoint[result["path"]] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "packets": result["packets"],
+            "alerts": result["alerts"]
+        }
+        self._save_checkpoint()
+
+    def _record_failed(self, result: dict):
+        stat = os.stat(result["path"])
+        self._checkpoint[result["path"]] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "failed": result["error"]
+        }
+        self._save_checkpoint()
+
+    def _load_alerts(self, path: str):
+        with open(self._alerts_path(path), "r") as f:
+            for line in f:
+                ts, threat, features = json.loads(line)
+                yield ts, threat, features
+
+    # -----------------------------
+    # Run
+    # -----------------------------
+    def run(self, path_or_glob: str):
+        """
+        Processes all pending files and yields (timestamp, threat,
+        features) for every alert across all files, in timestamp order.
+        """
+        files = discover_capture_files(path_or_glob)
+        if not files:
+            logger.warning(f"No capture files found for {path_or_glob}")
+            return
+
+        done = {path for path in files if self._is_done(path)}
+        chains = group_rotations(files)
+        first_timestamps = {
+            path: _first_timestamp(path)
+            for chain in chains if len(chain) > 1
+            for path in chain
+        }
+
+        logger.info(
+            f"Batch ingest: {len(files)} files in {len(chains)} capture(s), "
+            f"{len(done)} already done, {self.workers} workers"
+        )
+
+        started = time.perf_counter()
+        total_packets = 0
+        completed = len(done)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = [
+                pool.submit(
+                    _process_file, path, warm_up_files(chain, i, first_timestamps),
+                    i == _last_readable(chain, first_timestamps), self.signature_file,
+                    self.chunk_size, self.checkpoint_dir
+                )
+                for chain in chains
+                for i, path in enumerate(chain)
+                if path not in done
+            ]
+
+            for future in as_completed(futures):
+                result = future.result()
+                completed += 1
+                if "error" in result:
+                    self._record_failed(result)
+                    logger.warning(
+                        f"[{completed}/{len(files)}] {os.path.basename(result['path'])}: "
+                        f"failed ({result['error']})"
+                    )
+                    continue
+                self._record_done(result)
+                total_packets += result["packets"]
+                rate = result["packets"] / max(result["elapsed"], 1e-9)
+                logger.info(
+                    f"[{completed}/{len(files)}] {os.path.basename(result['path'])}: "
+                    f"{result['packets']} packets, {result['alerts']} alerts, "
+                    f"{rate:,.0f} packets/sec"
+                )
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Batch ingest finished: {total_packets} packets in {elapsed:.1f}s "
+            f"({total_packets / max(elapsed, 1e-9):,.0f} packets/sec)"
+        )
+
+        # Files whose alerts went out in a previous complete run are not re-sent
+        to_merge = [
+            path for path in files
+            if self._is_done(path) and not self._checkpoint[path].get("emitted")
+        ]
+        yield from heapq.merge(
+            *(self._load_alerts(path) for path in to_merge),
+            key=lambda alert: alert[0]
+        )
+
+        for path in to_merge:
+            self._checkpoint[path]["emitted"] = True
+        self._save_checkpoint()
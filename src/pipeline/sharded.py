@@ -0,0 +1,295 @@
+import multiprocessing as mp
+import queue
+import signal
+import time
+from typing import List, Optional
+
+from analysis.traffic_analyzer import TrafficAnalyzer
+from config.settings import AGGREGATE_SYNC_INTERVAL
+from detection.detection_engine import DetectionEngine
+from utils.logger import setup_logger
+
+
+logger = setup_logger(
+    name="ShardedPipeline",
+    log_file="data/logs/ids_alerts.log"
+)
+
+
+# Seconds stop() waits for workers to report before terminating them
+STOP_TIMEOUT = 10.0
+
+
+def source_shard(header, num_shards: int) -> int:
+    """
+    Maps a packet to a shard by hashing its source address.
+
+    Flows are keyed by direction (source first), so every flow
+    lives in its source's shard, and so do all per-source
+    aggregates (scanned ports and hosts, SYNs sent).
+    """
+    return hash(header.src_ip) % num_shards
+
+
+def _shard_worker(shard_id: int, conn, results, signature_file: str,
+                  share_destinations: bool = False):
+    """
+    Worker process: owns one flow table and detection engine
+    and reports alerts back to the parent. Rule set and model
+    switches come from the parent (see switch_versions).
+
+    With `share_destinations`, the worker reports its per-destination
+    counts every AGGREGATE_SYNC_INTERVAL and adds the other workers'
+    counts relayed by the parent.
+
+    Ctrl+C is left to the parent, which drains and stops the
+    workers through stop().
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    analyzer = TrafficAnalyzer()
+    engine = DetectionEngine(signature_file)
+    engine.track_flows(analyzer.flows)
+    aggregates = analyzer.host_aggregates
+    if share_destinations:
+        aggregates.track_destination_changes()
+    sync_due = time.monotonic() + AGGREGATE_SYNC_INTERVAL
+    processed = 0
+
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+
+            if message[0] == "destinations":
+                aggregates.add_remote_destinations(message[1], message[2])
+                continue
+            if message[0] == "reload":
+                engine.switch_to(*message[1:])
+                continue
+
+            batch = message[1]
+            records = analyzer.analyze_batch(batch)
+            alerts = []
+            detections = engine.detect_batch(records, analyzer.batch_flows)
+            for row, threats in zip(records, detections):
+                if threats:
+                    features = analyzer.features_from_row(row)
+                    alerts.extend((threat, features) for threat in threats)
+            alerts.extend(engine.expired_flow_verdicts())
+
+            processed += len(batch)
+            if alerts:
+                results.put(("alerts", alerts))
+
+            if share_destinations and time.monotonic() >= sync_due:
+                sync_due = time.monotonic() + AGGREGATE_SYNC_INTERVAL
+                epoch, counts = aggregates.destination_changes()
+                if counts:
+                    results.put(("destinations", shard_id, epoch, counts))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        results.put(("done", shard_id, processed))
+        conn.close()
+
+
+class ShardedPipeline:
+    """
+    Distributes packets across worker processes by source address.
+
+    Each worker runs its own TrafficAnalyzer and DetectionEngine,
+    so flow state is never split and analysis is not bound by the
+    GIL of the capture process. Headers are sent to workers in
+    batches over pipes; alerts come back on a single queue so one
+    AlertSystem in the parent does all the sending.
+
+    Per-source aggregates are exact in the source's worker. A
+    destination's traffic comes from sources spread over all
+    workers; since each source belongs to one worker, its distinct
+    source and SYN counts are the sums of the per-worker counts.
+    Workers report the destinations they touched every
+    AGGREGATE_SYNC_INTERVAL and the parent relays the changes to the
+    other workers, so dst_* features include other workers' packets
+    up to that long ago. The parent only routes: no per-packet
+    hashing or sketch updates happen here.
+    """
+
+    def __init__(self, signature_file: str, num_workers: int, batch_size: int):
+        if num_workers < 1:
+            raise ValueError("Sharded pipeline needs at least one worker")
+
+        self.signature_file = signature_file
+        self.num_workers = num_workers
+        self.batch_size = batch_size
+
+        self._connections = []
+        self._workers: List[mp.Process] = []
+        self._pending: List[list] = [[] for _ in range(num_workers)]
+        self._results: Optional[mp.Queue] = None
+        self._finished = 0
+        self.processed_per_worker: List[int] = [0] * num_workers
+
+        # Destination counts per worker for the newest aggregate window,
+        # and the changes not yet relayed to each worker
+        self._destination_epoch = None
+        self._reported: List[dict] = [{} for _ in range(num_workers)]
+        self._relay: List[dict] = [{} for _ in range(num_workers)]
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def start(self):
+        self._results = mp.Queue()
+
+        for shard_id in range(self.num_workers):
+            receiver, sender = mp.Pipe(duplex=False)
+            worker = mp.Process(
+                target=_shard_worker,
+                args=(shard_id, receiver, self._results,
+                      self.signature_file, self.num_workers > 1),
+                name=f"ids-shard-{shard_id}",
+                daemon=True
+            )
+            worker.start()
+            receiver.close()
+            self._connections.append(sender)
+            self._workers.append(worker)
+
+        logger.info(f"Started {self.num_workers} analysis workers")
+
+    def stop(self) -> list:
+        """
+        Flushes pending packets, stops the workers and returns
+        any alerts that were still in flight.
+
+        A worker that died is skipped, and one that has not reported
+        within STOP_TIMEOUT is terminated, so this always returns.
+        """
+        for shard, conn in enumerate(self._connections):
+            try:
+                if self._pending[shard]:
+                    self._send(shard)
+                conn.send(None)
+            except (BrokenPipeError, EOFError, OSError):
+                logger.warning(f"Worker {shard} is gone; its pending packets are lost")
+
+        alerts = []
+        deadline = time.monotonic() + STOP_TIMEOUT
+        while self._finished < self.num_workers:
+            try:
+                item = self._results.get(timeout=0.2)
+            except queue.Empty:
+                if (time.monotonic() > deadline
+                        or not any(worker.is_alive() for worker in self._workers)):
+                    break
+                continue
+            except (EOFError, OSError):
+                break
+            self._handle_result(item, alerts)
+
+        for shard, worker in enumerate(self._workers):
+            worker.join(timeout=1.0)
+            if worker.is_alive():
+                logger.warning(f"Worker {shard} did not stop; terminating it")
+                worker.terminate()
+                worker.join()
+        for conn in self._connections:
+            conn.close()
+
+        logger.info(
+            f"Workers stopped. Packets per worker: {self.processed_per_worker}"
+        )
+        return alerts
+
+    # -----------------------------
+    # Data path
+    # -----------------------------
+    def submit(self, header):
+        """
+        Routes a decoded header to its shard.
+        """
+        shard = source_shard(header, self.num_workers)
+        pending = self._pending[shard]
+        pending.append(header)
+        if len(pending) >= self.batch_size:
+            self._send(shard)
+
+    def flush(self):
+        """
+        Sends all partially filled batches.
+        """
+        for shard, pending in enumerate(self._pending):
+            if pending:
+                self._send(shard)
+
+    def switch_versions(self, definitions: tuple):
+        """
+        Makes every worker switch to the rule set and model in
+        `definitions` (DetectionEngine.active_definitions()). Batches
+        already routed are sent first, so all workers switch at the
+        same point in the packet stream.
+        """
+        self.flush()
+        for conn in self._connections:
+            conn.send(("reload",) + tuple(definitions))
+
+    def _send(self, shard: int):
+        self._connections[shard].send(("batch", self._pending[shard]))
+        self._pending[shard] = []
+
+    def collect(self) -> list:
+        """
+        Returns (threat, features) pairs reported by the workers
+        without blocking, and relays destination counts.
+        """
+        alerts = []
+        while True:
+            try:
+                self._handle_result(self._results.get_nowait(), alerts)
+            except queue.Empty:
+                break
+
+        for shard, changes in enumerate(self._relay):
+            if changes:
+                self._connections[shard].send(
+                    ("destinations", self._destination_epoch, changes)
+                )
+                self._relay[shard] = {}
+        return alerts
+
+    def _handle_result(self, item, alerts: list):
+        kind = item[0]
+        if kind == "alerts":
+            alerts.extend(item[1])
+        elif kind == "destinations":
+            self._merge_destinations(*item[1:])
+        elif kind == "done":
+            _, shard_id, processed = item
+            self.processed_per_worker[shard_id] = processed
+            self._finished += 1
+
+    def _merge_destinations(self, shard: int, epoch: int, counts: dict):
+        """
+        Records a worker's destination counts and queues the change
+        for every other worker.
+        """
+        if self._destination_epoch is None or epoch > self._destination_epoch:
+            self._destination_epoch = epoch
+            self._reported = [{} for _ in range(self.num_workers)]
+            self._relay = [{} for _ in range(self.num_workers)]
+        elif epoch < self._destination_epoch:
+            return
+
+        reported = self._reported[shard]
+        for ip, (hosts, syn) in counts.items():
+            old_hosts, old_syn = reported.get(ip, (0, 0))
+            reported[ip] = (hosts, syn)
+            delta_hosts, delta_syn = hosts - old_hosts, syn - old_syn
+            for other, changes in enumerate(self._relay):
+                if other == shard:
+                    continue
+                queued = changes.get(ip)
+                changes[ip] = (delta_hosts, delta_syn) if queued is None else (
+                    queued[0] + delta_hosts, queued[1] + delta_syn
+                )
@@ -0,0 +1,94 @@
+import os
+import random
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(BASE_DIR, "backend"))
+
+from alert_stats import AlertStats, SpaceSaving, merge_deltas  # noqa: E402
+from alert_store import AlertStore  # noqa: E402
+
+
+def make_alert(rng, second):
+    return {
+        # Naive UTC, as the IDS writes it
+        "timestamp": datetime.utcfromtimestamp(1767225600 + second).isoformat(),
+        "severity": rng.choice(["high", "medium", "low"]),
+        "alert_type": rng.choice(["signature", "anomaly"]),
+        "attack_name": rng.choice(["syn_flood", "port_scan", None]),
+        "source": {"ip": rng.choice(["10.0.0.1"] * 5 + [f"10.9.0.{i}" for i in range(50)])},
+        "destination": {"ip": "192.168.1.10"},
+    }
+
+
+def apply(snapshot, delta):
+    """
+    What a dashboard does with a delta (see frontend stats.js).
+    """
+    assert delta["base"] == snapshot["total"]
+    snapshot["total"] = delta["total"]
+    for field, values in delta["counts"].items():
+        counts = snapshot["counts"].setdefault(field, {})
+        for value, n in values.items():
+            counts[value] = counts.get(value, 0) + n
+    for name, buckets in delta["histograms"].items():
+        series = dict(map(tuple, snapshot["histograms"][name]["buckets"]))
+        for start, n in buckets.items():
+            series[start] = series.get(start, 0) + n
+        snapshot["histograms"][name]["buckets"] = sorted(series.items())
+
+
+rng = random.Random(3)
+store = AlertStore(max_alerts=100)
+stats = AlertStats(ip_capacity=20)
+ingested = []
+
+snapshot = stats.snapshot()
+pending = None
+for batch_number in range(20):
+    batch = [make_alert(rng, batch_number * 30 + i) for i in range(rng.randint(1, 40))]
+    accepted = [alert for alert in batch if store.add(alert) is not None]
+    ingested.extend(accepted)
+    delta = stats.add(accepted)
+    # Dashboards may get several deltas merged into one frame
+    pending = delta if pending is None else merge_deltas(pending, delta)
+    if batch_number % 3 == 0:
+        apply(snapshot, pending)
+        pending = None
+apply(snapshot, pending)
+
+# Retention evicted most alerts; the aggregates still count all of them
+assert len(store) == 100 < len(ingested)
+assert stats.total == len(ingested)
+expected = Counter(alert["severity"] for alert in ingested)
+assert stats.counts["severity"] == dict(expected)
+assert stats.counts["attack_name"] == dict(Counter(a["attack_name"] for a in ingested if a["attack_name"]))
+
+current = stats.snapshot()
+assert snapshot["total"] == current["total"] and snapshot["counts"] == current["counts"]
+
+# Histograms bucket by UTC time
+minutes = Counter(
+    int(datetime.fromisoformat(a["timestamp"]).replace(tzinfo=timezone.utc).timestamp()) // 60 * 60
+    for a in ingested
+)
+for histogram in (current, snapshot):
+    series = dict(map(tuple, histogram["histograms"]["1m"]["buckets"]))
+    assert {start: n for start, n in series.items() if n} == dict(minutes)
+
+# The heavy source leads the top list and is never undercounted
+top = dict(current["top_sources"])
+heavy = sum(1 for a in ingested if a["source"]["ip"] == "10.0.0.1")
+assert top["10.0.0.1"] >= heavy and list(top)[0] == "10.0.0.1"
+
+# Space-Saving never underestimates and keeps frequent keys
+counter = SpaceSaving(capacity=10)
+stream = ["hot"] * 300 + [f"cold-{i}" for i in range(700)]
+rng.shuffle(stream)
+for key in stream:
+    counter.add(key)
+assert len(counter.counts) == 10
+assert counter.top(1)[0][0] == "hot" and counter.top(1)[0][1] >= 300
+print(f"AlertStats: {stats.total} alerts counted, {len(store)} stored, top source {current['top_sources'][0]}")
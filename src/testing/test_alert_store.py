@@ -0,0 +1,189 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(BASE_DIR, "backend"))
+
+from alert_store import AlertStore  # noqa: E402
+from sqlite_store import SqliteAlertStore  # noqa: E402
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_alert(i, severity="high", src="10.0.0.1", dst="192.168.1.10", seq=None):
+    alert = {
+        "timestamp": f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}",
+        "severity": severity,
+        "alert_type": "signature",
+        "attack_name": "syn_flood",
+        "source": {"ip": src, "port": 1234},
+        "destination": {"ip": dst, "port": 80},
+    }
+    if seq is not None:
+        alert["journal_id"] = "journal-a"
+        alert["journal_seq"] = seq
+    return alert
+
+
+def check_basics(store):
+    ids = [store.add(make_alert(i, severity="high" if i % 3 else "low", seq=i + 1)) for i in range(10)]
+    assert ids == list(range(1, 11))
+    assert store.get(4)["status"] == "new"
+
+    # Replayed journal records are duplicates; another journal is not
+    assert store.add(make_alert(0, seq=1)) is None
+    other = make_alert(0, seq=1)
+    other["journal_id"] = "journal-b"
+    assert store.add(other) == 11
+
+    store.update_status(4, "resolved")
+    store.update_status(7, "investigating")
+    assert store.get(4)["status"] == "resolved"
+    assert [a["id"] for a in store.find(status="new")] == [1, 2, 3, 5, 6, 8, 9, 10, 11]
+    assert [a["id"] for a in store.find(severity="low")] == [1, 4, 7, 10]
+    assert [a["id"] for a in store.find(severity="low", status="new")] == [1, 10]
+    assert store.count("status", "resolved") == 1
+    assert sorted(store.values("severity")) == ["high", "low"]
+    assert store.ids_for_timestamp("2026-01-01T00:00:03") == [4]
+    try:
+        store.find(attack_name="syn_flood")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("attack_name is not indexed")
+
+
+def check_retention(store, clock):
+    for i in range(8):
+        store.add(make_alert(i, seq=i + 1))
+        clock.now += 1
+    # Count limit (5): the oldest are evicted, ids stay contiguous
+    assert [a["id"] for a in store.all()] == [4, 5, 6, 7, 8]
+    assert store.evicted == 3
+
+    # Age limit (10s)
+    clock.now += 7.5
+    store.evict()
+    assert [a["id"] for a in store.all()] == [7, 8]
+    assert len(store) == 2 and store.count("severity", "high") == 2
+
+    # Evicted alerts stay below the journal high-water mark
+    assert store.journal_mark("journal-a") == 8
+    assert store.journal_mark("journal-b") == 0
+
+
+def collect_pages(store, filters, limit, descending=False, **bounds):
+    ids, cursor = [], None
+    while True:
+        page, cursor = store.page(filters, cursor=cursor, limit=limit,
+                                  descending=descending, **bounds)
+        assert len(page) <= limit
+        ids.extend(a["id"] for a in page)
+        if cursor is None:
+            return ids
+
+
+def check_paging(store):
+    ips = ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    for i in range(100):
+        store.add(make_alert(i, severity=("high", "medium", "low")[i % 3],
+                             src=ips[i % 3], dst=ips[(i + 1) % 3]))
+    for alert_id in range(5, 100, 7):
+        store.update_status(alert_id, "resolved")
+    alerts = {a["id"]: a for a in store.all()}
+
+    def expected(keep, descending=False):
+        ids = [alert_id for alert_id, a in sorted(alerts.items()) if keep(a)]
+        return ids[::-1] if descending else ids
+
+    # Every page size and direction walks the same ids exactly once
+    for descending in (False, True):
+        for limit in (1, 7, 100, 1000):
+            assert collect_pages(store, {}, limit, descending) == expected(lambda a: True, descending)
+            assert collect_pages(store, {"severity": "low"}, limit, descending) == \
+                expected(lambda a: a["severity"] == "low", descending)
+            assert collect_pages(store, {"status": "resolved", "severity": "high"}, limit, descending) == \
+                expected(lambda a: a["status"] == "resolved" and a["severity"] == "high", descending)
+            assert collect_pages(store, {"ip": "10.0.0.2"}, limit, descending) == \
+                expected(lambda a: "10.0.0.2" in (a["source"]["ip"], a["destination"]["ip"]), descending)
+
+    start, end = "2026-01-01T00:00:30", "2026-01-01T00:01:09"
+    assert collect_pages(store, {"dst_ip": "10.0.0.1"}, 4, start=start, end=end) == \
+        expected(lambda a: a["destination"]["ip"] == "10.0.0.1" and start <= a["timestamp"] <= end)
+    assert store.page({"severity": "none"}, limit=10) == ([], None)
+
+    # Deltas: only what was added or changed after a seq, in change order
+    seq = store.seq
+    store.update_status(3, "investigating")
+    new_id = store.add(make_alert(200))
+    store.update_status(1, "investigating")
+    changed, last = store.changed_since(seq, {})
+    assert [a["id"] for a in changed] == [3, new_id, 1] and last == store.seq
+    changed, last = store.changed_since(seq, {"status": "investigating"})
+    assert [a["id"] for a in changed] == [3, 1]
+    changed, partial = store.changed_since(seq, {}, limit=2)
+    assert [a["id"] for a in changed] == [3, new_id]
+    assert [a["id"] for a in store.changed_since(partial, {})[0]] == [1]
+    assert store.changed_since(store.seq, {}) == ([], store.seq)
+
+
+memory = AlertStore(max_alerts=100)
+check_basics(memory)
+check_paging(AlertStore(max_alerts=1000))
+
+clock = Clock()
+check_retention(AlertStore(max_alerts=5, max_age=10, clock=clock), clock)
+print("AlertStore: ids, duplicates, status, indexes, paging, deltas and retention OK")
+
+# Same behaviour from SQLite, plus what survives a restart
+db_dir = tempfile.mkdtemp(prefix="ids-store-")
+try:
+    path = os.path.join(db_dir, "alerts.db")
+    store = SqliteAlertStore(path, max_alerts=100)
+    check_basics(store)
+    store.close()
+
+    store = SqliteAlertStore(path, max_alerts=100)
+    assert len(store) == 11 and store.get(4)["status"] == "resolved"
+    assert store.add(make_alert(0, seq=1)) is None
+    assert store.add(make_alert(20)) == 12
+    store.close()
+
+    store = SqliteAlertStore(os.path.join(db_dir, "paging.db"), max_alerts=1000)
+    check_paging(store)
+    store.close()
+
+    clock = Clock()
+    path = os.path.join(db_dir, "retention.db")
+    store = SqliteAlertStore(path, max_alerts=5, max_age=10, clock=clock)
+    check_retention(store, clock)
+    store.close()
+
+    store = SqliteAlertStore(path, max_alerts=5)
+    assert store.journal_mark("journal-a") == 8 and len(store) == 2
+
+    # A failed transaction forgets its journal keys, so the replay is stored
+    apply_retention = store._apply_retention
+
+    def fail_once():
+        store._apply_retention = apply_retention
+        raise sqlite3.OperationalError("disk I/O error")
+
+    store._apply_retention = fail_once
+    store.add(make_alert(30, seq=9))
+    assert len(store) == 2 and store.journal_mark("journal-a") == 8
+    assert store.add(make_alert(30, seq=9)) is not None
+    assert len(store) == 3 and store.journal_mark("journal-a") == 9
+    store.close()
+finally:
+    shutil.rmtree(db_dir)
+print("SqliteAlertStore: same results, persisted across restarts")
@@ -1,6 +1,45 @@
+import json
+
 from alerts.alert_system import AlertSystem
 
-alert_system = AlertSystem()
+
+class StubResponse:
+    status_code = 200
+
+    def __init__(self, body: dict):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+class StubSession:
+    """
+    Stands in for requests.Session: records every POST and accepts it.
+    """
+
+    def __init__(self):
+        self.posts = []
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        payload = json.loads(data)
+        self.posts.append((url, payload))
+        accepted = len(payload) if isinstance(payload, list) else 1
+        return StubResponse({"accepted": accepted, "rejected": []})
+
+    def close(self):
+        pass
+
+
+session = StubSession()
+alert_system = AlertSystem(
+    api_url="http://backend.test/alerts",
+    journal_dir=None,
+    session=session
+)
 
 threat = {
     "type": "signature",
@@ -20,5 +59,21 @@ features = {
     "tcp_flags": "S"
 }
 
-alert = alert_system.generate_alert(threat, features)
+alert = alert_system.generate_alert(threat, features, timestamp=1700000000)
 print(alert)
+
+assert alert["attack_name"] == "syn_flood"
+assert alert["timestamp"] == "2023-11-14T22:13:20"
+assert alert["source"] == {"ip": "10.0.0.1", "port": 1234}
+assert alert["destination"] == {"ip": "192.168.1.10", "port": 80}
+assert "journal_seq" not in alert
+
+# Delivered by the background sender as one batch
+assert alert_system.flush(timeout=2.0)
+alert_system.close()
+
+assert [url for url, _ in session.posts] == ["http://backend.test/alerts/batch"]
+delivered = session.posts[0][1]
+assert delivered == [alert]
+assert alert_system.sender.stats()["sent"] == 1
+print("Delivered:", delivered)
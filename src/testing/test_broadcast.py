@@ -0,0 +1,103 @@
+import asyncio
+import json
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(BASE_DIR, "backend"))
+
+from alert_stats import AlertStats  # noqa: E402
+from broadcast import BroadcastHub  # noqa: E402
+
+
+class FakeWebSocket:
+    """
+    Records frames; `blocked` holds sends until released, like a
+    client that stopped reading.
+    """
+
+    def __init__(self, blocked=False):
+        self.frames = []
+        self.closed_with = None
+        self.released = asyncio.Event()
+        if not blocked:
+            self.released.set()
+
+    async def send_text(self, text):
+        await self.released.wait()
+        self.frames.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def alerts(start, count):
+    return [{"id": i, "severity": "high", "timestamp": "2026-01-01T00:00:00"}
+            for i in range(start, start + count)]
+
+
+def last_stats(websocket):
+    return [frame["stats"] for frame in websocket.frames if "stats" in frame][-1]
+
+
+async def drop_oldest():
+    hub = BroadcastHub(max_queue=5, max_batch=3, policy="drop_oldest")
+    stats = AlertStats()
+    fast, slow = FakeWebSocket(), FakeWebSocket(blocked=True)
+    hub.connect(fast)
+    hub.connect(slow)
+
+    for start in range(0, 12, 4):
+        batch = alerts(start, 4)
+        hub.publish(batch, stats.add(batch))
+        await asyncio.sleep(0.01)
+
+    # The fast client got everything, coalesced into frames of <= max_batch
+    received = [a["id"] for frame in fast.frames for a in frame["alerts"]]
+    assert received == list(range(12))
+    assert all(len(frame["alerts"]) <= 3 for frame in fast.frames)
+    assert sum(frame["dropped"] for frame in fast.frames) == 0
+    assert last_stats(fast)["total"] == 12
+
+    # The slow one is stuck sending its first frame; its queue kept the newest
+    slow.released.set()
+    await asyncio.sleep(0.01)
+    received = [a["id"] for frame in slow.frames for a in frame["alerts"]]
+    dropped = sum(frame["dropped"] for frame in slow.frames)
+    assert received[-5:] == list(range(7, 12))
+    assert len(received) + dropped == 12 and dropped == hub.dropped > 0
+    # Stats deltas are merged, never dropped
+    assert last_stats(slow)["total"] == 12
+    assert slow.closed_with is None and len(hub.clients) == 2
+    print(f"drop_oldest: slow client dropped {dropped}, got {received}")
+
+
+async def disconnect():
+    hub = BroadcastHub(max_queue=5, max_batch=3, policy="disconnect")
+    fast, slow = FakeWebSocket(), FakeWebSocket(blocked=True)
+    hub.connect(fast)
+    hub.connect(slow)
+
+    for start in range(0, 12, 4):
+        hub.publish(alerts(start, 4))
+        await asyncio.sleep(0.01)
+
+    assert slow.closed_with == 1013
+    assert hub.stats()["disconnected"] == 1 and len(hub.clients) == 1
+    assert [a["id"] for frame in fast.frames for a in frame["alerts"]] == list(range(12))
+    print(f"disconnect: slow client closed with {slow.closed_with}, {hub.stats()}")
+
+
+async def send_timeout():
+    hub = BroadcastHub(max_queue=5, max_batch=3, send_timeout=0.05)
+    stalled = FakeWebSocket(blocked=True)
+    hub.connect(stalled)
+    hub.publish(alerts(0, 1))
+    await asyncio.sleep(0.1)
+    assert stalled.closed_with == 1013 and not hub.clients
+    print("send_timeout: stalled client closed")
+
+
+asyncio.run(drop_oldest())
+asyncio.run(disconnect())
+asyncio.run(send_timeout())
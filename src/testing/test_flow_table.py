@@ -0,0 +1,39 @@
+from analysis.flow_table import FlowTable
+
+
+expired = []
+table = FlowTable(max_entries=3, idle_timeout=10.0, active_timeout=60.0, sweep_batch=8)
+table.add_expiry_listener(lambda flow, reason: expired.append((flow.key, reason)))
+
+# Capacity: the least recently seen flow is evicted
+table.touch("a", 0.0)
+table.touch("b", 1.0)
+table.touch("c", 2.0)
+table.touch("a", 3.0)          # "b" is now the least recently seen
+table.touch("d", 4.0)
+assert expired == [("b", "capacity")]
+assert "b" not in table and len(table) == 3
+
+# Idle: flows silent for idle_timeout are swept on a later lookup
+flow = table.touch("d", 13.5)
+assert [key for key, reason in expired if reason == "idle"] == ["c", "a"]
+assert len(table) == 1 and "d" in table
+
+# Idle expiry also applies to the flow being looked up
+table.touch("d", 30.0)
+assert expired[-1] == ("d", "idle")
+assert table.get("d").start_time == 30.0
+
+# Active: a long-lived flow restarts after active_timeout
+for t in range(31, 95, 5):
+    flow = table.touch("d", float(t))
+    flow.packet_count += 1
+assert expired[-1] == ("d", "active")
+assert table.get("d").start_time > 90.0 and table.get("d").packet_count == 1
+
+table.expire_all()
+assert len(table) == 0 and expired[-1] == ("d", "flush")
+
+stats = table.stats()
+assert (stats["evicted_capacity"], stats["evicted_idle"], stats["evicted_active"], stats["flushed"]) == (1, 3, 1, 1)
+print(stats)
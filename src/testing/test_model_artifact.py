@@ -0,0 +1,71 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+from detection.model_artifact import (
+    META_FILE, ModelArtifactError, PersistedIsolationForest, export_isolation_forest
+)
+from detection.train_model import train
+
+
+SCHEMA = ("packet_size", "packet_rate", "byte_rate")
+out_dir = tempfile.mkdtemp(prefix="ids-model-")
+
+try:
+    # Exported forest scores new data exactly like sklearn
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 3)) * [100, 50, 10000] + [500, 100, 50000]
+    model = IsolationForest(n_estimators=50, max_samples=256, random_state=1).fit(X)
+    first = export_isolation_forest(model, out_dir, SCHEMA, score_threshold=-0.6)
+
+    loaded = PersistedIsolationForest.load(out_dir, expected_schema=SCHEMA)
+    assert loaded.path == first
+    probe = np.vstack([
+        rng.normal(size=(500, 3)) * [100, 50, 10000] + [500, 100, 50000],
+        rng.uniform(0, 1e6, size=(100, 3))
+    ])
+    assert np.allclose(loaded.score_samples(probe), model.score_samples(probe), rtol=0, atol=1e-9)
+    assert loaded.score_threshold == -0.6 and loaded.meta["n_estimators"] == 50
+
+    # CURRENT moves to the newest version; older versions stay loadable
+    second = export_isolation_forest(model, out_dir, SCHEMA, score_threshold=-0.5)
+    assert PersistedIsolationForest.load(out_dir).path == second
+    assert PersistedIsolationForest.load(first).score_threshold == -0.6
+
+    # Incompatible artifacts are rejected
+    for broken in (
+        lambda: PersistedIsolationForest.load(out_dir, expected_schema=("packet_size",)),
+        lambda: PersistedIsolationForest.load(os.path.join(out_dir, "missing")),
+    ):
+        try:
+            broken()
+        except ModelArtifactError as e:
+            print(f"Rejected: {e}")
+        else:
+            raise AssertionError("expected ModelArtifactError")
+
+    with open(os.path.join(first, META_FILE)) as f:
+        meta = json.load(f)
+    meta["format"] = 99
+    with open(os.path.join(first, META_FILE), "w") as f:
+        json.dump(meta, f)
+    try:
+        PersistedIsolationForest.load(first)
+    except ModelArtifactError as e:
+        print(f"Rejected: {e}")
+    else:
+        raise AssertionError("expected ModelArtifactError")
+
+    # Training CLI path: fit on a capture, export and verify
+    trained = train(["data/pcaps/sample.pcap"], os.path.join(out_dir, "trained"), n_estimators=20)
+    artifact = PersistedIsolationForest.load(os.path.join(out_dir, "trained"))
+    assert artifact.path == trained
+    assert artifact.meta["training_files"] == ["sample.pcap"]
+    print(f"Trained artifact {artifact.version}: {artifact.meta['training_rows']} rows, "
+          f"threshold {artifact.score_threshold:.4f}")
+finally:
+    shutil.rmtree(out_dir)
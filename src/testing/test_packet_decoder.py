@@ -0,0 +1,41 @@
+from scapy.all import CookedLinux, Dot1Q, Ether, IP, TCP, UDP  # type: ignore[import-untyped]
+
+from capture.packet_decoder import (
+    LINKTYPE_ETHERNET, LINKTYPE_LINUX_SLL, LINKTYPE_RAW,
+    decode_frame, decode_with_scapy, tcp_flags_from_str, tcp_flags_to_str
+)
+from capture.pcap_stream import PcapStream
+
+
+# Every frame of the sample capture decodes exactly like Scapy
+records = list(PcapStream("data/pcaps/sample.pcap"))
+decoded = 0
+for record in records:
+    fast = decode_frame(record.data, record.timestamp, record.linktype)
+    slow = decode_with_scapy(record.data, record.timestamp, record.linktype)
+    assert fast == slow, (record.offset, fast, slow)
+    decoded += fast is not None
+assert decoded > 0
+print(f"Frames: {len(records)}, TCP/IPv4 headers identical to Scapy: {decoded}")
+
+# Link layers and packets the sample does not contain
+tcp = IP(src="10.0.0.1", dst="10.0.0.2", options=b"\x01\x01\x01\x01") / TCP(
+    sport=1234, dport=443, flags="SEC"
+)
+frames = [
+    ("vlan", bytes(Ether() / Dot1Q(vlan=7) / tcp), LINKTYPE_ETHERNET),
+    ("raw ip", bytes(tcp), LINKTYPE_RAW),
+    ("linux sll", bytes(CookedLinux(proto=0x0800) / tcp), LINKTYPE_LINUX_SLL),
+    ("udp", bytes(Ether() / IP() / UDP()), LINKTYPE_ETHERNET),
+    ("fragment", bytes(Ether() / IP(frag=10, proto=6) / (b"x" * 40)), LINKTYPE_ETHERNET),
+    ("truncated", bytes(Ether() / tcp)[:30], LINKTYPE_ETHERNET),
+]
+for name, frame, linktype in frames:
+    fast = decode_frame(frame, 1.5, linktype)
+    assert fast == decode_with_scapy(frame, 1.5, linktype), name
+    print(f"{name}: {fast}")
+
+header = decode_frame(bytes(tcp), 1.5, LINKTYPE_RAW)
+assert (header.src_port, header.dst_port) == (1234, 443)
+assert tcp_flags_to_str(header.tcp_flags) == "SEC"
+assert tcp_flags_from_str("CES") == header.tcp_flags
@@ -0,0 +1,22 @@
+from capture.pcap_stream import PcapStream
+from capture.pcap_reader import PCAPReader
+
+stream = PcapStream("data/pcaps/sample.pcap")
+records = list(stream)
+print(f"Records: {len(records)}")
+
+# Resume from the offset of the 100th record
+resumed = PcapStream("data/pcaps/sample.pcap", start_offset=records[100].offset)
+print(f"Records after resume: {sum(1 for _ in resumed)}")
+
+headers = list(PCAPReader("data/pcaps/sample.pcap").read_packets())
+print(f"TCP/IP packets: {len(headers)}")
+print(headers[0])
+
+# Resuming works the same on the Scapy fallback path
+start = records[100].offset
+fast = list(PCAPReader("data/pcaps/sample.pcap", fast_path=True, start_offset=start).read_packets())
+slow = list(PCAPReader("data/pcaps/sample.pcap", fast_path=False, start_offset=start).read_packets())
+assert len(slow) == len(fast)
+assert [float(p.time) for p in slow] == [h.timestamp for h in fast]
+print(f"TCP/IP packets after resume: {len(fast)}")
@@ -0,0 +1,42 @@
+import threading
+import time
+
+from capture.ring_buffer import PacketRingBuffer
+
+
+# Full buffer drops new items and keeps the old ones in order
+buffer = PacketRingBuffer(capacity=5)
+accepted = [buffer.append(i) for i in range(8)]
+assert accepted == [True] * 5 + [False] * 3
+assert (buffer.appended, buffer.dropped, len(buffer)) == (5, 3, 5)
+
+assert buffer.drain(3, timeout=0) == [0, 1, 2]
+assert buffer.drain(10, timeout=0) == [3, 4]
+assert buffer.empty()
+
+# Empty buffer waits for at most the timeout
+start = time.monotonic()
+assert buffer.drain(10, timeout=0.05) == []
+assert time.monotonic() - start >= 0.04
+
+# A waiting consumer is woken by the producer and sees FIFO order
+buffer = PacketRingBuffer(capacity=100000)
+received = []
+
+
+def consume():
+    while len(received) < 50000:
+        received.extend(buffer.drain(512, timeout=1.0))
+
+
+consumer = threading.Thread(target=consume)
+consumer.start()
+time.sleep(0.01)
+for i in range(50000):
+    while not buffer.append(i):
+        time.sleep(0)
+consumer.join(timeout=10)
+
+assert not consumer.is_alive()
+assert received == list(range(50000))
+print(f"Ring buffer: {buffer.appended} appended, {buffer.dropped} dropped, order kept")
@@ -0,0 +1,163 @@
+import random
+
+import numpy as np
+
+from detection.rule_compiler import CompiledRuleSet
+
+
+def match_conditions(features, conditions):
+    """
+    Reference: the original per-rule check (every feature > threshold).
+    """
+    for key, threshold in conditions.items():
+        if key not in features or not features[key] > threshold:
+            return False
+    return True
+
+
+FEATURE_DTYPE = np.dtype([
+    ("src_ip", "U15"),
+    ("dst_ip", "U15"),
+    ("src_port", "u2"),
+    ("dst_port", "u2"),
+    ("packet_size", "u4"),
+    ("packet_rate", "f8"),
+    ("byte_rate", "f8"),
+    ("tcp_flags", "u2"),
+])
+
+
+def random_rows(count, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        rows.append((
+            rng.choice(["10.0.0.5", "10.1.2.3", "192.168.1.20", "8.8.8.8"]),
+            rng.choice(["10.0.0.1", "172.16.5.4", "192.168.1.10", "1.1.1.1"]),
+            rng.choice([1234, 22, 53, 40000]),
+            rng.choice([22, 23, 80, 443, 3389, 8080]),
+            rng.choice([40, 60, 100, 1500]),
+            rng.choice([0.5, 10.0, 100.0, 150.0, 1000.0]),
+            rng.choice([0.0, 500.0, 120000.0]),
+            rng.choice([0x02, 0x12, 0x10, 0x18, 0x11, 0x04, 0x29, rng.randrange(0, 0x200)]),
+        ))
+    return np.array(rows, dtype=FEATURE_DTYPE)
+
+
+def check(rules, reference, records):
+    """
+    Compiled matches (batch and single dict) equal the reference.
+    """
+    compiled = CompiledRuleSet(rules)
+    batch = compiled.match_records(records)
+    for i, row in enumerate(records):
+        features = dict(zip(records.dtype.names, row.item()))
+        expected = [reference(features, rules[name]["conditions"]) for name in rules]
+        assert batch[i].tolist() == expected, (features, batch[i], expected)
+        assert compiled.match_features(features)[0].tolist() == expected
+    return compiled, batch
+
+
+# Threshold rules (bare numbers) are vectorized and match like the original loop
+threshold_rules = {
+    "syn_flood": {"conditions": {"packet_rate": 100, "packet_size": 50}},
+    "big_packets": {"conditions": {"packet_size": 1000}},
+    "exfiltration": {"conditions": {"byte_rate": 100000, "packet_rate": 1}},
+    "unknown_feature": {"conditions": {"not_extracted": 0}},
+    "empty": {"conditions": {}},
+}
+records = random_rows(500)
+compiled, batch = check(threshold_rules, match_conditions, records)
+assert compiled.vector_rules == list(range(len(threshold_rules)))
+assert batch[:, 3].sum() == 0 and batch[:, 4].all()
+print(f"Threshold rules: {batch.sum(axis=0).tolist()} matches in {len(records)} rows")
+
+
+def flag_bits(value):
+    if isinstance(value, int):
+        return value
+    return sum(1 << "FSRPAUECN".index(letter) for letter in value)
+
+
+def in_cidr(ip, prefix):
+    address = int.from_bytes(bytes(int(part) for part in ip.split(".")), "big")
+    network, length = prefix.split("/")
+    base = int.from_bytes(bytes(int(part) for part in network.split(".")), "big")
+    mask = (0xFFFFFFFF << (32 - int(length))) & 0xFFFFFFFF
+    return address & mask == base & mask
+
+
+def operator_holds(x, op, value, feature):
+    if feature == "tcp_flags" and op in (">", ">=", "<", "<=", "==", "!="):
+        value = flag_bits(value)
+    if op == ">":
+        return x > value
+    if op == ">=":
+        return x >= value
+    if op == "<":
+        return x < value
+    if op == "<=":
+        return x <= value
+    if op == "==":
+        return x == value
+    if op == "!=":
+        return x != value
+    if op == "between":
+        return value[0] <= x <= value[1]
+    if op == "in":
+        return x in value
+    if op == "flags_all":
+        return x & flag_bits(value) == flag_bits(value)
+    if op == "flags_any":
+        return x & flag_bits(value) != 0
+    if op == "flags_none":
+        return x & flag_bits(value) == 0
+    if op == "cidr":
+        return any(in_cidr(x, prefix) for prefix in ([value] if isinstance(value, str) else value))
+    raise AssertionError(op)
+
+
+def match_dsl(features, conditions):
+    """
+    Reference for the condition language, one operator at a time.
+    """
+    for feature, spec in conditions.items():
+        if feature not in features:
+            return False
+        if not isinstance(spec, dict):
+            spec = {">": spec}
+        for op, value in spec.items():
+            if not operator_holds(features[feature], op, value, feature):
+                return False
+    return True
+
+
+# One rule per operator, plus combinations of index and vector paths
+dsl_rules = {
+    "gt": {"conditions": {"packet_rate": {">": 100}}},
+    "ge": {"conditions": {"packet_rate": {">=": 100}}},
+    "lt": {"conditions": {"packet_size": {"<": 100}}},
+    "le": {"conditions": {"packet_size": {"<=": 100}}},
+    "eq_port": {"conditions": {"dst_port": {"==": 22}}},
+    "ne_port": {"conditions": {"dst_port": {"!=": 443}}},
+    "between": {"conditions": {"src_port": {"between": [1024, 65535]}}},
+    "in_ports": {"conditions": {"dst_port": {"in": [23, 3389]}, "packet_rate": 1}},
+    "flags_all": {"conditions": {"tcp_flags": {"flags_all": "S", "flags_none": "A"}}},
+    "flags_any": {"conditions": {"tcp_flags": {"flags_any": "FPU"}}},
+    "flags_eq": {"conditions": {"tcp_flags": {"==": "SA"}}},
+    "flags_mask": {"conditions": {"tcp_flags": {"flags_all": 0x12}}},
+    "cidr_dst": {"conditions": {"dst_ip": {"cidr": "192.168.0.0/16"}}},
+    "cidr_src_list": {"conditions": {"src_ip": {"cidr": ["10.0.0.0/24", "8.8.8.8/32"]}}},
+    "cidr_and_port": {"conditions": {"src_ip": {"cidr": "10.0.0.0/8"}, "dst_port": {"==": 80}}},
+    "range_mix": {"conditions": {"packet_size": {"between": [40, 100], "!=": 60}, "byte_rate": {"<": 1000}}},
+}
+compiled, batch = check(dsl_rules, match_dsl, records)
+assert compiled.indexed_rules and compiled.vector_rules and compiled.unindexed_rules
+assert batch.any(axis=0).all(), "every operator should match some row"
+
+# Feature dicts from analyze() carry tcp_flags as letters
+compiled = CompiledRuleSet(dsl_rules)
+letters = {"tcp_flags": "S", "dst_ip": "192.168.1.10", "dst_port": 22}
+matched = [name for name, hit in zip(dsl_rules, compiled.match_features(letters)[0]) if hit]
+assert matched == ["eq_port", "ne_port", "flags_all", "cidr_dst"], matched
+print(f"DSL rules: {dict(zip(dsl_rules, batch.sum(axis=0).tolist()))}")
@@ -0,0 +1,29 @@
+from alerts.suppression import AlertSuppressor
+
+suppressor = AlertSuppressor(cooldown=10, max_keys=1000)
+
+threat = {
+    "type": "signature",
+    "name": "syn_flood",
+    "severity": "high",
+    "mitre_technique": "T1499"
+}
+
+features = {
+    "src_ip": "10.0.0.1",
+    "dst_ip": "192.168.1.10",
+    "src_port": 1234,
+    "dst_port": 80
+}
+
+# 5,000 hits of the same rule on the same flow within one window
+sent = []
+for i in range(5000):
+    sent.extend(suppressor.filter(threat, features, timestamp=1000 + i * 0.001))
+
+# Window closes: one summary alert for everything suppressed
+sent.extend(suppressor.flush_due(now=1011))
+
+for alert_threat, _, _ in sent:
+    print(alert_threat.get("summary") or alert_threat["name"])
+print(suppressor.stats())